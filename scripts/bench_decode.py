@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for stream-json decoding.
+
+Measures how many MB/s of stream-json a single core can push through the
+runner's decode step: full json.loads on every line (the previous
+approach) against EventDecoder, which peeks the event type and skips
+tool_use/tool_result payloads. orjson is included when installed. Record a
+corpus with:
+
+    claude --print --output-format stream-json --verbose "..." > corpus.jsonl
+
+Usage:
+    python scripts/bench_decode.py [corpus.jsonl] [--repeat N]
+
+Without a corpus, a synthetic one is generated in which tool results
+carrying whole files make up most of the bytes.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tempo import decode  # noqa: E402
+from tempo.decode import EventDecoder  # noqa: E402
+from tempo.runner import HANDLED_EVENT_TYPES  # noqa: E402
+
+
+def synthetic_corpus(lines: int = 5000) -> list:
+    """Generate stream-json lines resembling a tool-heavy Claude session."""
+    rng = random.Random(0)
+    words = "the quick brown fox jumps over lazy dog function return value test".split()
+    source = "\n".join(
+        "    " + " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        for _ in range(400)
+    )
+    corpus = []
+    for i in range(lines):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(5, 80)))
+        kind = rng.random()
+        if kind < 0.35:
+            event = {"type": "assistant", "message": {"model": "claude", "content": [{"type": "text", "text": text}]}}
+        elif kind < 0.6:
+            event = {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}}
+        elif kind < 0.8:
+            event = {"type": "assistant", "message": {"model": "claude", "content": [
+                {"type": "tool_use", "id": f"toolu_{i}", "name": "Write", "input": {"file_path": "a.py", "content": source}},
+            ]}}
+        else:
+            event = {"type": "user", "message": {"content": [
+                {"type": "tool_result", "tool_use_id": f"toolu_{i}", "content": source},
+            ]}}
+        corpus.append(json.dumps(event).encode())
+    corpus.append(json.dumps({"type": "result", "is_error": False, "result": "done"}).encode())
+    return corpus
+
+
+def full_decode(line: bytes):
+    """The previous approach: decode every line completely."""
+    return json.loads(line.decode("utf-8", errors="replace"))
+
+
+def bench(name: str, fn, lines: list, repeat: int) -> float:
+    """Time fn over all lines and print the throughput."""
+    total_bytes = sum(len(line) for line in lines)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - start)
+    mb_per_s = total_bytes / best / 1e6
+    print(f"{name:<28} {mb_per_s:10.1f} MB/s  ({best * 1000:.1f} ms total)")
+    return mb_per_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", nargs="?", help="stream-json file to replay")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.corpus:
+        lines = [line for line in Path(args.corpus).read_bytes().splitlines() if line.strip()]
+    else:
+        lines = synthetic_corpus()
+
+    total_mb = sum(len(line) for line in lines) / 1e6
+    decoder = EventDecoder(HANDLED_EVENT_TYPES)
+    skipped = sum(1 for line in lines if decoder.decode(line)[1] is None)
+    print(f"{len(lines)} lines, {total_mb:.1f} MB, {skipped} lines skipped by EventDecoder\n")
+
+    orjson = decode.orjson
+    decode.orjson = None
+    full = bench("json.loads (every line)", full_decode, lines, args.repeat)
+    lazy = bench("EventDecoder (stdlib)", decoder.decode, lines, args.repeat)
+    decode.orjson = orjson
+
+    if orjson is not None:
+        bench("EventDecoder (orjson)", decoder.decode, lines, args.repeat)
+    else:
+        print(f"{'EventDecoder (orjson)':<28} {'not installed':>15}")
+
+    print(f"\nspeedup (stdlib EventDecoder vs full decode): {lazy / full:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
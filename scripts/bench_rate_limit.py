@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for rate limit detection.
+
+Measures the per-line cost of the compiled RateLimitMatcher against the
+previous approach (lowercase + one re.search per pattern) on a stream-json
+corpus. Record a corpus with:
+
+    claude --print --output-format stream-json --verbose "..." > corpus.jsonl
+
+Usage:
+    python scripts/bench_rate_limit.py [corpus.jsonl] [--repeat N]
+
+Without a corpus, a synthetic one is generated.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tempo.config import RATE_LIMIT_PATTERNS  # noqa: E402
+from tempo.parser import RateLimitMatcher  # noqa: E402
+
+
+def legacy_detect(output: str) -> bool:
+    """The original per-pattern detection."""
+    output_lower = output.lower()
+    return any(
+        re.search(pattern, output_lower, re.IGNORECASE)
+        for pattern in RATE_LIMIT_PATTERNS
+    )
+
+
+def synthetic_corpus(lines: int = 20000) -> list:
+    """Generate stream-json lines resembling a Claude session."""
+    rng = random.Random(0)
+    words = "the quick brown fox jumps over lazy dog function return value test".split()
+    corpus = []
+    for i in range(lines):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(5, 80)))
+        kind = rng.random()
+        if kind < 0.6:
+            event = {"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}}
+        elif kind < 0.9:
+            event = {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}}
+        else:
+            event = {"type": "user", "message": {"content": [{"type": "tool_result", "content": text * 20}]}}
+        corpus.append(json.dumps(event))
+    corpus.append(json.dumps({"type": "result", "is_error": True, "result": "Spending cap reached resets 4am"}))
+    return corpus
+
+
+def extract_texts(lines: list) -> list:
+    """Pull the text the runner would scan out of each stream-json line."""
+    texts = []
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            texts.append(line)
+            continue
+        if event.get("type") == "assistant":
+            for block in event.get("message", {}).get("content", []):
+                if block.get("type") == "text":
+                    texts.append(block.get("text", ""))
+        elif event.get("type") == "result":
+            texts.append(str(event.get("result", "")))
+        elif event.get("type") in ("error", "system"):
+            texts.append(str(event.get("error", event.get("message", ""))))
+    return texts
+
+
+def bench(name: str, fn, texts: list, repeat: int) -> float:
+    """Time fn over all texts and print the per-line cost."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    per_line = best / max(1, len(texts)) * 1e9
+    print(f"{name:<24} {per_line:10.0f} ns/line  ({best * 1000:.1f} ms total)")
+    return per_line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", nargs="?", help="stream-json file to replay")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.corpus:
+        lines = Path(args.corpus).read_text(errors="replace").splitlines()
+    else:
+        lines = synthetic_corpus()
+
+    texts = extract_texts(lines)
+    print(f"{len(lines)} lines, {len(texts)} scanned texts\n")
+
+    matcher = RateLimitMatcher()
+    legacy = bench("legacy (per pattern)", legacy_detect, texts, args.repeat)
+    compiled = bench("RateLimitMatcher.search", matcher.search, texts, args.repeat)
+    streaming = RateLimitMatcher()
+    bench("RateLimitMatcher.feed", streaming.feed, texts, args.repeat)
+
+    print(f"\nspeedup (search vs legacy): {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
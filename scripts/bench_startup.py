@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Import-time regression check for CLI startup.
+
+`tempo status` and `tempo --version` are run from shell prompts and
+monitoring scripts every few seconds, so they must not pay for the runner,
+yaml, dateutil or asyncio. This runs each command under `python -X
+importtime`, reports the median total import time and the slowest
+top-level imports, and fails if a command goes over its target or imports
+one of the modules it should never need.
+
+Usage:
+    python scripts/bench_startup.py [--repeat N] [--version-ms MS] [--status-ms MS]
+
+The package is byte-compiled first, so source compilation isn't counted.
+Exits with status 1 on a regression.
+"""
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that only `tempo run` and friends need
+HEAVY_MODULES = ("tempo.runner", "asyncio", "yaml", "dateutil", "rich.panel", "rich.progress")
+
+
+def measure(args: List[str], cwd: str, env: Dict[str, str]) -> Tuple[float, Dict[str, float], Set[str]]:
+    """
+    Run `python -X importtime -m tempo <args>` once.
+    
+    Returns:
+        (total import ms, cumulative ms of each top-level import, every module imported)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "tempo", *args],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    top_level = {}
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        if name.startswith(" ") and not name.startswith("  ") and cumulative.strip().isdigit():
+            top_level[name.strip()] = int(cumulative) / 1000
+    return sum(top_level.values()), top_level, imported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command")
+    parser.add_argument("--version-ms", type=float, default=100.0, help="Target for tempo --version")
+    parser.add_argument("--status-ms", type=float, default=160.0, help="Target for tempo status")
+    args = parser.parse_args()
+    
+    compileall.compile_dir(str(ROOT / "tempo"), quiet=1)
+    
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TEMPO_HOME=tmp, PYTHONPATH=str(ROOT))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        
+        for command, target in ((["--version"], args.version_ms), (["status"], args.status_ms)):
+            runs = [measure(command, tmp, env) for _ in range(args.repeat)]
+            total = statistics.median(run[0] for run in runs)
+            _, modules, imported = runs[-1]
+            heavy = [name for name in HEAVY_MODULES if name in imported]
+            
+            ok = total <= target and not heavy
+            failed = failed or not ok
+            label = "tempo " + " ".join(command)
+            print(f"{label:<16} {total:7.1f} ms  (target {target:.0f} ms)  {'ok' if ok else 'REGRESSION'}")
+            for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:5]:
+                print(f"    {ms:7.1f} ms  {name}")
+            if heavy:
+                print(f"    imports {', '.join(heavy)}")
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -95,6 +95,43 @@ assert info.reset_time.hour == 4, 'Should parse 4am correctly'
 print('Parser tests passed')
 " && pass "Rate limit parser works" || fail "Parser test failed"
 
+info "Testing streamed rate limit matching..."
+$PYTHON -c "
+from tempo.parser import RateLimitMatcher, detect_event_rate_limit
+
+# A match split across chunks is found once, with stream offsets
+matcher = RateLimitMatcher()
+assert matcher.feed('some output, then: rate li') is None, 'Partial text should not match'
+match = matcher.feed('mit exceeded, try later')
+assert match is not None, 'Should match across the chunk boundary'
+assert match.text == 'rate limit', f'Unexpected match {match.text!r}'
+assert match.start == len('some output, then: '), f'Wrong stream offset {match.start}'
+assert matcher.feed(' more text') is None, 'Should not report the same match twice'
+
+# Text older than the carry window is forgotten
+matcher = RateLimitMatcher(window=4)
+matcher.feed('rate li')
+assert matcher.feed('x' * 10 + 'mit') is None, 'Should not match beyond the window'
+
+# Reset drops the carry
+matcher = RateLimitMatcher()
+matcher.feed('rate li')
+matcher.reset()
+assert matcher.feed('mit exceeded') is None, 'Reset should forget the carry'
+
+# Model-written text about rate limits is not a rate limit
+def assistant(model, text):
+    return {'type': 'assistant', 'message': {'model': model, 'content': [{'type': 'text', 'text': text}]}}
+
+matcher = RateLimitMatcher()
+assert detect_event_rate_limit(assistant('claude-sonnet-4', 'Handle rate limit exceeded errors'), matcher) is None, 'Assistant text should be ignored'
+assert detect_event_rate_limit({'type': 'result', 'is_error': False, 'result': 'Limit reached'}, matcher) is None, 'Successful results should be ignored'
+signal = detect_event_rate_limit(assistant('<synthetic>', 'Spending cap reached resets 4am'), matcher)
+assert signal is not None and signal.channel == 'synthetic', 'CLI-synthesized text should match'
+
+print('Matcher tests passed')
+" && pass "Streamed rate limit matching works" || fail "Matcher test failed"
+
 # Test 6: Session persistence
 echo ""
 echo "Test 6: Session persistence"
@@ -125,6 +162,79 @@ with tempfile.TemporaryDirectory() as tmpdir:
 print('Session tests passed')
 " && pass "Session persistence works" || fail "Session test failed"
 
+info "Testing session journal replay..."
+$PYTHON -c "
+import os
+import tempfile
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    os.environ['TEMPO_HOME'] = tmpdir
+    from tempo.session import SessionManager
+    
+    manager = SessionManager(tmpdir)
+    session = manager.create_new(prompt='Test prompt')
+    manager.save(session)
+    
+    # Changes are journaled, then replayed on load
+    session.increment_cycle()
+    manager.save(session)
+    session.record_stall('inactivity', 12.0)
+    manager.save(session)
+    manager.close()
+    journal = manager.journal_file.read_text().splitlines()
+    assert journal and session.session_id not in journal[-1], 'Should journal only the changes'
+    
+    loaded = SessionManager(tmpdir).load()
+    assert loaded.cycle_count == 1, 'Should replay set fields'
+    assert len(loaded.stalls) == 1, 'Should replay appended entries'
+    
+    # A torn last line is ignored, and the next save compacts
+    with open(manager.journal_file, 'a') as f:
+        f.write(journal[-1][:-8])
+    reader = SessionManager(tmpdir)
+    loaded = reader.load()
+    assert loaded.cycle_count == 1 and len(loaded.stalls) == 1, 'Torn line should be skipped'
+    loaded.increment_cycle()
+    reader.save(loaded)
+    reader.close()
+    assert reader.journal_file.read_text() == '', 'Save after a torn line should compact'
+    assert SessionManager(tmpdir).load().cycle_count == 2, 'Compacted snapshot should hold the change'
+    
+    # Records already in the snapshot aren't applied twice
+    reader.journal_file.write_text('\\n'.join(journal) + '\\n')
+    loaded = SessionManager(tmpdir).load()
+    assert len(loaded.stalls) == 1, 'Replayed records should be skipped by sequence number'
+
+print('Journal tests passed')
+" && pass "Session journal replay works" || fail "Journal test failed"
+
+info "Testing event log rotation..."
+$PYTHON -c "
+import tempfile
+from pathlib import Path
+from tempo.eventlog import EventIndex, EventLog, log_parts, read_events
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    path = Path(tmpdir) / 'tempo_test.jsonl'
+    log = EventLog(path, rotate_bytes=400)
+    for cycle in range(1, 5):
+        for index in range(3):
+            log.append('output', cycle, 'p%d' % index, index, text='word%d%d ' % (cycle, index) * 5)
+    log.close()
+    assert len(log_parts(path)) > 2, 'Should rotate into gzipped parts'
+    assert not list(Path(tmpdir).glob('*.tmp')), 'Rotation should leave no temporary files'
+    
+    # Offsets count across parts, so reading from any of them lands on that record
+    records = list(read_events(path))
+    assert sum(record['type'] == 'output' for _, record in records) == 12, 'Should read every part'
+    for offset, record in records:
+        assert next(read_events(path, offset))[1] == record, 'Offsets should stay valid'
+    offset = EventIndex(path).seek(cycle=3)
+    assert next(read_events(path, offset))[1]['cycle'] == 3, 'Index should seek across parts'
+
+print('Event log tests passed')
+" && pass "Event log rotation works" || fail "Event log test failed"
+
 # Test 7: PyInstaller availability (optional)
 echo ""
 echo "Test 7: PyInstaller build test (optional)"
@@ -170,6 +280,792 @@ assert prompts[0].name == 'Project Initialization', 'First prompt name should ma
 print('YAML parsing tests passed')
 " && pass "YAML parsing works" || fail "YAML parsing failed"
 
+# Test 9: Streamed completion detection
+echo ""
+echo "Test 9: Streamed completion detection"
+info "Testing completion marker split across text deltas..."
+$PYTHON -c "
+from tempo.parser import CompletionDetector
+from tempo.config import COMPLETION_CODE
+
+# Marker split across several deltas
+detector = CompletionDetector()
+pieces = ['All done. ', COMPLETION_CODE[:3], COMPLETION_CODE[3:7], COMPLETION_CODE[7:], ' bye']
+results = [detector.feed(piece) for piece in pieces]
+assert results == [False, False, False, True, True], f'Should find split marker, got {results}'
+
+# One character at a time
+detector = CompletionDetector()
+assert any(detector.feed(char) for char in 'x' + COMPLETION_CODE), 'Should find marker fed per character'
+
+# A partial marker is not a match, and reset forgets the carry
+detector = CompletionDetector()
+assert not detector.feed(COMPLETION_CODE[:-1]), 'Partial marker should not match'
+detector.reset()
+assert not detector.feed(COMPLETION_CODE[-1]), 'Reset should drop the carried prefix'
+assert not detector.found, 'Reset should clear found'
+
+print('Completion detector tests passed')
+" && pass "Completion detection works" || fail "Completion detection failed"
+
+# Test 10: CLI startup time
+echo ""
+echo "Test 10: CLI startup time"
+info "Checking that tempo status and --version import only what they need..."
+$PYTHON scripts/bench_startup.py --repeat 5 && pass "CLI startup is fast" || fail "CLI startup regression"
+
+# Test 11: Output buffer
+echo ""
+echo "Test 11: Output buffer"
+info "Testing spilling, tail and deduplication..."
+$PYTHON -c "
+from tempo.buffer import OutputBuffer
+
+# Many small chunks spill the oldest text and keep the tail in memory
+buffer = OutputBuffer(max_memory_chars=100)
+text = ''.join('%05d' % i for i in range(2000))
+for i in range(0, len(text), 5):
+    buffer.append(text[i:i + 5])
+assert len(buffer) == len(text), 'Should count spilled text'
+assert buffer._memory_chars <= 100, 'Should bound the in-memory tail'
+assert ''.join(buffer.iter_chunks(chunk_chars=7)) == text, 'Should read spilled text back in order'
+for size in (10, 60, 500, 9000, 20000):
+    assert buffer.tail(size) == text[-size:], f'Wrong tail of {size} chars'
+
+# A single block larger than the budget spills all but its tail
+buffer = OutputBuffer(max_memory_chars=100)
+buffer.append('a' * 10)
+buffer.append('b' * 1000)
+assert buffer._memory_chars == 50, f'Should keep half the budget, kept {buffer._memory_chars}'
+assert ''.join(buffer.iter_chunks()) == 'a' * 10 + 'b' * 1000, 'Should keep the full text'
+assert buffer.tail(100) == 'b' * 100, 'Tail should span memory and spill file'
+
+# The result repeats a recent block or the whole message
+buffer = OutputBuffer()
+buffer.start_message('m1')
+buffer.append('Hello ')
+buffer.start_message('m1')
+buffer.append('world')
+assert buffer.contains_block('world'), 'Should match a recent block'
+assert buffer.contains_block('Hello world'), 'Should match the whole message'
+buffer.start_message('m2')
+assert buffer.contains_block('Hello world'), 'Should still match the finished message'
+assert not buffer.contains_block('Hello'), 'Should not match partial text'
+buffer.close()
+assert not buffer and not buffer.contains_block('world'), 'Close should forget everything'
+
+print('Output buffer tests passed')
+" && pass "Output buffer works" || fail "Output buffer test failed"
+
+# Test 12: Dependency-aware sequences
+echo ""
+echo "Test 12: Dependency-aware sequences"
+info "Testing DAG validation, ordering and failure propagation..."
+$PYTHON -c "
+import asyncio
+import io
+import os
+import tempfile
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    os.environ['TEMPO_HOME'] = tmpdir
+    from tempo import runner as runner_module
+    from tempo.events import JsonlEmitter
+    from tempo.session import PromptItem, validate_dependencies
+    
+    def items(*specs):
+        return [PromptItem(name=name, prompt=name, depends_on=deps) for name, deps in specs]
+    
+    # Cycles, unknown steps and names sharing a worktree are rejected
+    for bad in (
+        items(('a', ['b']), ('b', ['a'])),
+        items(('a', ['x'])),
+        items(('Step A', []), ('step-a', ['Step A'])),
+    ):
+        try:
+            validate_dependencies(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f'Should reject {[p.name for p in bad]}')
+    
+    # Without depends_on, repeated names are fine
+    validate_dependencies(items(('Same', []), ('Same', [])))
+    
+    # Run the scheduler with stand-in steps: b raises, c doesn't complete
+    async def yes(*args, **kwargs):
+        return True
+    
+    started = []
+    
+    async def run_node(self, index):
+        item = self.session.prompts[index]
+        started.append(item.name)
+        self.session.mark_prompt_started(index)
+        item.worktree = tmpdir
+        await asyncio.sleep(0.01)
+        if item.name == 'b':
+            raise RuntimeError('boom')
+        return item.name != 'c'
+    
+    runner_module.is_git_repo = yes
+    runner_module.merge_worktree = yes
+    runner_module.TempoRunner._run_dag_node = run_node
+    runner_module.TempoRunner._remove_dag_worktree = yes
+    
+    prompts = items(('a', []), ('b', []), ('c', ['a']), ('d', ['c']), ('e', ['b']), ('f', ['a']))
+    runner = runner_module.TempoRunner(tmpdir, emitter=JsonlEmitter(stream=io.StringIO()), concurrency=2)
+    assert not asyncio.run(runner.run_sequence_async(prompts)), 'Should report the failed steps'
+    
+    assert started[:2] == ['a', 'b'] and sorted(started) == ['a', 'b', 'c', 'f'], f'Wrong order {started}'
+    status = {p.name: p.status for p in runner.session.prompts}
+    assert status == {'a': 'completed', 'b': 'failed', 'c': 'failed', 'd': 'pending', 'e': 'pending', 'f': 'completed'}, status
+    assert runner.session.prompts[1].error == 'RuntimeError: boom', 'Should record the exception'
+    assert runner.session.status == 'failed', 'Session should fail'
+
+print('DAG tests passed')
+" && pass "Dependency-aware sequences work" || fail "DAG test failed"
+
+# Test 13: Rate limit waits
+echo ""
+echo "Test 13: Rate limit waits"
+info "Testing deadlines and early wake-ups..."
+$PYTHON -c "
+import asyncio
+import os
+import signal
+import tempfile
+import time
+from pathlib import Path
+from tempo.scheduler import get_scheduler
+
+async def main(wake_dir):
+    scheduler = get_scheduler()
+    loop = asyncio.get_running_loop()
+    
+    # Several waits share one timer, armed once per deadline
+    ticks = []
+    tick = scheduler._tick
+    scheduler._tick = lambda: (ticks.append(time.time()), tick())
+    results = await asyncio.gather(scheduler.wait_for(0.6), scheduler.wait_for(0.3))
+    assert results == [False, False], f'Deadlines should pass unwoken, got {results}'
+    if hasattr(signal, 'SIGUSR1'):
+        assert len(ticks) == 2, f'Timer should fire once per deadline, fired {len(ticks)} times'
+    
+    # SIGUSR1 wakes every wait
+    if hasattr(signal, 'SIGUSR1'):
+        loop.call_later(0.1, os.kill, os.getpid(), signal.SIGUSR1)
+        start = time.time()
+        assert await scheduler.wait_for(30), 'SIGUSR1 should wake the wait'
+        assert time.time() - start < 10, 'SIGUSR1 should wake promptly'
+    
+    # The wake file wakes that directory's waits, and is consumed
+    loop.call_later(0.1, (wake_dir / 'wake').touch)
+    other = asyncio.ensure_future(scheduler.wait_for(0.5, wake_dir=wake_dir / 'other'))
+    start = time.time()
+    assert await scheduler.wait_for(30, wake_dir=wake_dir), 'Wake file should wake the wait'
+    assert time.time() - start < 10, 'Wake file should wake promptly'
+    assert not (wake_dir / 'wake').exists(), 'Wake file should be consumed'
+    assert not await other, 'Other directories should keep waiting'
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    asyncio.run(main(Path(tmpdir)))
+
+print('Wait tests passed')
+" && pass "Rate limit waits work" || fail "Wait test failed"
+
+# Test 14: Rate limit probes
+echo ""
+echo "Test 14: Rate limit probes"
+info "Testing probe outcomes against a stand-in claude..."
+$PYTHON -c "
+import asyncio
+import json
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+
+# A claude that prints FAKE_OUTPUT and records where it ran
+FAKE_CLAUDE = [
+    '#!' + sys.executable,
+    'import os, sys',
+    'open(os.environ[\'FAKE_CWD\'], \'w\').write(os.getcwd())',
+    'sys.stdout.write(os.environ[\'FAKE_OUTPUT\'])',
+]
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    tmp = Path(tmpdir)
+    os.environ['TEMPO_HOME'] = tmpdir
+    (tmp / 'bin').mkdir()
+    (tmp / 'bin' / 'claude').write_text(chr(10).join(FAKE_CLAUDE))
+    (tmp / 'bin' / 'claude').chmod(stat.S_IRWXU)
+    os.environ['PATH'] = str(tmp / 'bin') + os.pathsep + os.environ['PATH']
+    os.environ['FAKE_CWD'] = str(tmp / 'cwd')
+    
+    from tempo.runner import TempoRunner
+    runner = TempoRunner(tmpdir)
+    
+    def probe(*lines):
+        os.environ['FAKE_OUTPUT'] = ''.join(line + chr(10) for line in lines)
+        return asyncio.run(runner._probe())
+    
+    ok = json.dumps({'type': 'result', 'is_error': False, 'result': 'OK'})
+    assert probe(ok) == ('lifted', None), 'A successful result means the limit lifted'
+    assert (tmp / 'cwd').read_text() != str(runner.project_dir), 'Probe should not run in the project'
+    
+    outcome, info = probe('Spending cap reached resets 4am')
+    assert outcome == 'limited' and info.reset_time.hour == 4, 'Should report the reset time'
+    assert probe('Usage limit reached. Please try again later.') == ('limited', None), 'Limit without a reset time'
+    assert probe('something went wrong') == ('error', None), 'Neither a result nor a limit is an error'
+
+print('Probe tests passed')
+" && pass "Rate limit probes work" || fail "Probe test failed"
+
+# Test 15: Shared rate limit state
+echo ""
+echo "Test 15: Shared rate limit state"
+info "Testing reset publishing and stagger slots..."
+$PYTHON -c "
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from tempo.config import QUOTA_MAX_STAGGER_SLOTS, QUOTA_STAGGER_SECONDS, RESET_BUFFER_SECONDS
+from tempo.quota import QuotaCoordinator
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    path = Path(tmpdir) / 'quota.json'
+    publisher = QuotaCoordinator(path, account='a')
+    waiter = QuotaCoordinator(path, account='a')
+    assert waiter.claim_wait() is None, 'Nothing published, nothing to wait for'
+    
+    reset = datetime.fromtimestamp(int(time.time()) + 3600)
+    asyncio.run(publisher.publish_reset_async(reset))
+    assert waiter.current_reset() == reset, 'Waiters should see the published reset'
+    
+    # Claims start at slot 1 (slot 0 is the publisher's) and wrap without reaching 0
+    base = reset.timestamp() + RESET_BUFFER_SECONDS
+    slots = [round((waiter.claim_wait() - base) / QUOTA_STAGGER_SECONDS) for _ in range(QUOTA_MAX_STAGGER_SLOTS + 2)]
+    assert slots[:3] == [1, 2, 3], f'Wrong first slots {slots[:3]}'
+    assert 0 not in slots and max(slots) == QUOTA_MAX_STAGGER_SLOTS - 1, f'Slots should wrap past 0, got {slots}'
+    assert asyncio.run(waiter.claim_wait_async()) > base, 'Async claims should stagger too'
+    
+    # Publishing the same reset again keeps the claims, and leaves the file alone
+    mtime = path.stat().st_mtime_ns
+    publisher.publish_reset(reset)
+    assert path.stat().st_mtime_ns == mtime, 'Unchanged state should not be rewritten'
+    
+    # Other accounts are independent; a passed reset or a corrupt file means go now
+    assert QuotaCoordinator(path, account='b').claim_wait() is None, 'Accounts should not share limits'
+    publisher.publish_reset(datetime.fromtimestamp(time.time() - 60))
+    assert waiter.claim_wait() is None and waiter.current_reset() is None, 'A passed reset is stale'
+    path.write_text('not json')
+    assert waiter.claim_wait() is None, 'A corrupt file should read as empty'
+    publisher.publish_reset(reset)
+    waiter.clear()
+    assert waiter.claim_wait() is None, 'Clear should forget the limit'
+
+print('Quota tests passed')
+" && pass "Shared rate limit state works" || fail "Quota test failed"
+
+info "Testing rate limit history and wait prediction..."
+$PYTHON -c "
+import tempfile
+import time
+from pathlib import Path
+from tempo.history import HistoryStore, limit_duration
+
+# The earlier of reset and resume ends a limit; neither means unknown
+event = {'detected_at': 100.0, 'reset_at': 400.0, 'resumed_at': 250.0}
+assert limit_duration(event) == 150.0, 'Resume before the reset bounds the duration'
+assert limit_duration(dict(event, resumed_at=None)) == 300.0, 'Reset time alone'
+assert limit_duration(dict(event, reset_at=None, resumed_at=None)) is None, 'Nothing known yet'
+assert limit_duration(dict(event, reset_at=50.0, resumed_at=None)) == 0.0, 'Never negative'
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    store = HistoryStore(Path(tmpdir) / 'history.db', account='a')
+    assert store.predict_wait() is None, 'No prediction without history'
+    
+    now = time.time()
+    for minutes in (60, 120, 180, 240, 300):
+        store.record_limit('/p', 's', 1, reset_at=now + minutes * 60)
+    limit = store.record_limit('/p', 's', 2)
+    assert len(store.observed_waits()) == 5, 'A limit with no end yet has no duration'
+    store.record_resume(limit)
+    store.record_resume(limit)
+    assert len(store.observed_waits()) == 6, 'Resume should end the limit once'
+    
+    prediction = store.predict_wait()
+    assert prediction.samples == 6, f'Wrong sample count {prediction.samples}'
+    assert prediction.first_probe < 3600 and prediction.max_wait > 17000, f'Wrong quantiles {prediction}'
+    assert HistoryStore(Path(tmpdir) / 'history.db', account='b').predict_wait() is None, 'Accounts are separate'
+
+print('History tests passed')
+" && pass "Rate limit history works" || fail "History test failed"
+
+# Test 16: Usage and budgets
+echo ""
+echo "Test 16: Usage and budgets"
+info "Testing token accounting and budget caps..."
+$PYTHON -c "
+import json
+import tempfile
+from tempo.runner import TempoRunner
+from tempo.session import Budget, PromptItem, SessionManager, Usage
+
+result = {
+    'type': 'result', 'total_cost_usd': 0.5, 'duration_ms': 1000,
+    'usage': {'input_tokens': 100, 'output_tokens': 200,
+              'cache_creation_input_tokens': 300, 'cache_read_input_tokens': 400},
+}
+usage = Usage.from_result(result)
+assert usage.total_tokens == 1000 and usage.runs == 1, f'Wrong usage {usage}'
+assert usage.cache_hit_rate == 0.5, f'Wrong cache hit rate {usage.cache_hit_rate}'
+assert Usage().cache_hit_rate is None, 'No input means no hit rate'
+assert usage.describe() == '1.0k tokens, \$0.50', f'Wrong description {usage.describe()}'
+
+# A cap is reached at its limit, not only past it; no caps means no budget
+assert not Budget() and Budget().exceeded(usage) is None, 'An empty budget never runs out'
+assert Budget(max_tokens=1000).exceeded(usage), 'Token cap should be reached'
+assert Budget(max_tokens=1001).exceeded(usage) is None, 'Token cap not reached yet'
+assert 'spent' in Budget(max_cost_usd=0.5).exceeded(usage), 'Cost cap should be reached'
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    manager = SessionManager(tmpdir)
+    session = manager.create_new(prompts=[PromptItem(name='a', prompt='A'), PromptItem(name='b', prompt='B')])
+    session.record_usage(usage)
+    session.current_prompt_index = 1
+    session.record_usage(usage, continuation=True)
+    manager.save(session)
+    
+    # Runs add up per prompt and for the session, and survive a reload
+    session = SessionManager(tmpdir).load()
+    assert session.usage.total_tokens == 2000 and session.usage.runs == 2, f'Wrong session usage {session.usage}'
+    assert [p.usage.runs for p in session.prompts] == [1, 1], 'Each prompt should count its own run'
+    assert [c.continuation for c in session.cycle_usage] == [False, True], 'Cycles should be recorded in order'
+    
+    runner = TempoRunner(tmpdir, prompt_budget=Budget(max_tokens=1500), session_budget=Budget(max_cost_usd=1.0))
+    runner.session = session
+    assert runner._budget_exceeded().startswith('Session budget reached'), 'Session cost cap should stop the run'
+    runner.session_budget = Budget()
+    assert runner._budget_exceeded() is None, 'The current prompt is still within budget'
+    
+    # Live usage counts each message once, however many blocks repeat it
+    message = {'type': 'assistant', 'message': {'id': 'm1', 'content': [], 'usage': result['usage']}}
+    for _ in range(3):
+        runner._process_line(json.dumps(message).encode())
+    live = runner._current_run_usage()
+    assert live.total_tokens == 1000 and live.runs == 1, f'Wrong live usage {live}'
+    runner._process_line(json.dumps(result).encode())
+    assert runner._current_run_usage().cost_usd == 0.5, 'The result event should replace the live estimate'
+
+print('Usage tests passed')
+" && pass "Usage and budgets work" || fail "Usage test failed"
+
+# Test 17: Continuation prompts
+echo ""
+echo "Test 17: Continuation prompts"
+info "Testing the prompt sent after an interruption..."
+$PYTHON -c "
+import tempfile
+from tempo.config import CONTINUATION_EXCERPT_CHARS
+from tempo.runner import CONTINUATION_PROMPT, TempoRunner, continuation_prompt
+from tempo.session import PromptItem, SessionManager
+
+# The task is referenced by name, or by its first line; never resent in full
+assert continuation_prompt('Do it', 'build') == CONTINUATION_PROMPT + ' Task: build', 'Name should be preferred'
+assert continuation_prompt('  Fix the bug  ') == CONTINUATION_PROMPT + ' Task: Fix the bug', 'Short prompt as is'
+assert continuation_prompt('First line\\nmore detail').endswith('Task: First line...'), 'Only the first line'
+long_prompt = 'x' * (CONTINUATION_EXCERPT_CHARS * 2)
+reference = continuation_prompt(long_prompt).split('Task: ')[1]
+assert reference == 'x' * CONTINUATION_EXCERPT_CHARS + '...', 'Long lines should be cut'
+assert continuation_prompt('   ') == CONTINUATION_PROMPT, 'Nothing to reference'
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    runner = TempoRunner(tmpdir)
+    task = 'Refactor the parser. ' * 50
+    
+    # Single-prompt mode references an excerpt; the first run sends the prompt
+    runner.session = SessionManager(tmpdir).create_new(prompt=task)
+    assert runner._build_command(task)[-1] == task, 'The first run sends the prompt'
+    cmd = runner._build_command(task, is_continuation=True)
+    assert '--continue' in cmd and cmd[-1] != task, f'Continuation should not resend the prompt: {cmd[-2:]}'
+    assert cmd[-1].startswith(CONTINUATION_PROMPT), 'Continuations share a fixed prefix'
+    
+    # Sequences reference the current prompt by name, resumed by id if known
+    runner.session = SessionManager(tmpdir).create_new(prompts=[PromptItem(name='parser', prompt=task)])
+    runner.session.claude_session_id = 'abc'
+    cmd = runner._build_command(task, is_continuation=True)
+    assert cmd[-3:] == ['--resume', 'abc', CONTINUATION_PROMPT + ' Task: parser'], f'Wrong command {cmd[-3:]}'
+
+print('Continuation tests passed')
+" && pass "Continuation prompts work" || fail "Continuation test failed"
+
+# Test 18: Resuming conversations
+echo ""
+echo "Test 18: Resuming conversations"
+info "Testing the fallback when a conversation can't be resumed..."
+$PYTHON -c "
+import io
+import json
+import os
+import stat
+import sys
+import tempfile
+from pathlib import Path
+
+# A claude that logs its arguments and only knows no conversation by id
+FAKE_CLAUDE = [
+    '#!' + sys.executable,
+    'import json, os, sys',
+    'open(os.environ[\'FAKE_ARGS\'], \'a\').write(json.dumps(sys.argv[1:]) + chr(10))',
+    'if \'--resume\' in sys.argv:',
+    '    sys.stderr.write(\'No conversation found with session ID: gone\' + chr(10))',
+    '    sys.exit(1)',
+    'print(json.dumps({\'type\': \'system\', \'subtype\': \'init\', \'session_id\': \'fresh\'}))',
+    'print(json.dumps({\'type\': \'result\', \'is_error\': False, \'result\': os.environ[\'FAKE_RESULT\']}))',
+]
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    tmp = Path(tmpdir)
+    os.environ['TEMPO_HOME'] = tmpdir
+    (tmp / 'bin').mkdir()
+    (tmp / 'bin' / 'claude').write_text(chr(10).join(FAKE_CLAUDE))
+    (tmp / 'bin' / 'claude').chmod(stat.S_IRWXU)
+    os.environ['PATH'] = str(tmp / 'bin') + os.pathsep + os.environ['PATH']
+    os.environ['FAKE_ARGS'] = str(tmp / 'args')
+    
+    from tempo.config import COMPLETION_CODE
+    from tempo.events import JsonlEmitter
+    from tempo.runner import TempoRunner
+    from tempo.session import SessionManager
+    os.environ['FAKE_RESULT'] = 'Done. ' + COMPLETION_CODE
+    
+    project = tmp / 'project'
+    project.mkdir()
+    manager = SessionManager(str(project))
+    session = manager.create_new(prompt='Fix the bug')
+    session.claude_session_id = 'gone'
+    session.cycle_count = 1
+    manager.save(session)
+    manager.close()
+    
+    # No session at all still builds a continuation command
+    runner = TempoRunner(str(project), emitter=JsonlEmitter(stream=io.StringIO()))
+    assert '--continue' in runner._build_command('Fix the bug', is_continuation=True), 'No session, no id'
+    
+    # The stale id is dropped and the next attempt continues the latest conversation
+    assert runner.run(resume=True), 'Resume should complete after falling back'
+    calls = [json.loads(line) for line in (tmp / 'args').read_text().splitlines()]
+    assert len(calls) == 2, f'Expected two claude runs, got {len(calls)}'
+    assert calls[0][calls[0].index('--resume') + 1] == 'gone', 'First run should resume by id'
+    assert '--continue' in calls[1] and '--resume' not in calls[1], 'Second run should fall back to --continue'
+    assert SessionManager(str(project)).load().claude_session_id == 'fresh', 'The new conversation id is kept'
+
+print('Resume tests passed')
+" && pass "Resuming conversations works" || fail "Resume test failed"
+
+# Test 19: Session registry
+echo ""
+echo "Test 19: Session registry"
+info "Testing the cross-project session index..."
+$PYTHON -c "
+import tempfile
+from pathlib import Path
+from tempo.registry import SessionRegistry
+from tempo.session import PromptItem, SessionManager, Usage
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    tmp = Path(tmpdir)
+    registry = SessionRegistry(tmp / 'registry.db')
+    assert registry.sessions() == [] and registry.projects() == [], 'A new registry is empty'
+    
+    projects = []
+    for name in ('one', 'two'):
+        (tmp / name).mkdir()
+        manager = SessionManager(str(tmp / name), registry=registry)
+        session = manager.create_new(prompts=[PromptItem(name='a', prompt='A'), PromptItem(name='b', prompt='B')])
+        projects.append(session.project_dir)
+    
+    # Saves that change an indexed field update the row; others leave it alone
+    row = registry.sessions(project=projects[1])[0]
+    assert (row['status'], row['current_prompt'], row['prompts_total']) == ('pending', 'a', 2), f'Wrong row {row}'
+    session.original_prompt = 'not indexed'
+    manager.save(session)
+    assert registry.sessions(project=projects[1])[0]['updated_at'] == row['updated_at'], 'Row should not change'
+    session.status = 'running'
+    session.record_usage(Usage(input_tokens=10, output_tokens=5, cost_usd=0.25, runs=1))
+    session.mark_current_complete()
+    manager.save(session)
+    row = registry.sessions(project=projects[1])[0]
+    assert (row['status'], row['current_prompt'], row['prompts_done']) == ('running', 'b', 1), f'Wrong row {row}'
+    assert (row['tokens'], row['cost_usd']) == (15, 0.25), 'Usage should be indexed'
+    assert [r['project'] for r in registry.sessions(status='running')] == [projects[1]], 'Filter by status'
+    
+    # Archived rows point at the kept snapshot
+    path = manager.archive()
+    row = registry.sessions(project=projects[1])[0]
+    assert row['archived'] == 1 and row['path'] == str(path), 'Archive should update the row'
+    
+    # Forgetting a project drops only its sessions
+    registry.forget(projects[0])
+    assert registry.projects() == [projects[1]], f'Wrong projects {registry.projects()}'
+    
+    # The registry recovers if its database is removed
+    (tmp / 'registry.db').unlink()
+    manager.save(session)
+    session.status = 'completed'
+    manager.save(session)
+    assert [r['status'] for r in registry.sessions()] == ['completed'], 'Registry should be recreated'
+
+print('Registry tests passed')
+" && pass "Session registry works" || fail "Registry test failed"
+
+# Test 20: Transcript rotation
+echo ""
+echo "Test 20: Transcript rotation"
+info "Testing rotated transcripts read back in order..."
+$PYTHON -c "
+import asyncio
+import tempfile
+from pathlib import Path
+import tempo.transcript as transcript_module
+from tempo.transcript import TranscriptWriter, find_transcripts, read_transcript, transcript_parts
+
+transcript_module.TRANSCRIPT_ROTATE_CHARS = 2000
+
+def write(tmpdir, session_id):
+    writer = TranscriptWriter(tmpdir, session_id)
+    for n in range(20):
+        writer.log_output(f'line {n:02d} ' + 'x' * 200)
+    writer.close()
+    return writer.get_path()
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    # Without an event loop the segments are compressed right away
+    path = write(tmpdir, 'sync')
+    parts = transcript_parts(path)
+    assert len(parts) > 2 and all(p.suffix == '.gz' for p in parts[:-1]), f'Wrong parts {parts}'
+    text = ''.join(read_transcript(path))
+    assert [f'line {n:02d}' in text for n in range(20)] == [True] * 20, 'Every entry should read back'
+    assert text.index('line 00') < text.index('line 19'), 'Parts should read back in order'
+    
+    # In an event loop the gzip runs in a worker thread, finished by the time the loop closes
+    async def run():
+        return write(tmpdir, 'async')
+    path = asyncio.run(run())
+    assert not list(path.parent.glob('*.part')) and not list(path.parent.glob('*.tmp')), 'Leftover files'
+    assert ''.join(read_transcript(path)).count('line ') == 20, 'Every entry should read back'
+    assert [p.name for p in find_transcripts(Path(tmpdir))] == sorted(p.name for p in path.parent.glob('*.md')), 'Segments are not transcripts'
+    
+    # A segment waiting for compression is read as is; a damaged one up to the damage
+    last = transcript_parts(path)[-2]
+    last.with_suffix('.part').write_bytes(b'line pending' + chr(10).encode())
+    last.write_bytes(last.read_bytes()[:40])
+    text = ''.join(read_transcript(path))
+    assert 'line pending' not in text, 'A compressed segment wins over its .part'
+    assert 'line 00' in text and 'line 19' in text, 'Parts after the damage should still be read'
+    last.unlink()
+    assert 'line pending' in ''.join(read_transcript(path)), 'An uncompressed segment should be read'
+
+print('Transcript rotation tests passed')
+" && pass "Transcript rotation works" || fail "Transcript rotation test failed"
+
+# Test 21: Following event logs
+echo ""
+echo "Test 21: Following event logs"
+info "Testing a follower across log rotations..."
+$PYTHON -c "
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from tempo.eventlog import EventLog, log_parts
+from tempo.follow import _Inotify, follow_events
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    path = Path(tmpdir) / 'tempo_test.jsonl'
+    log = EventLog(path, rotate_bytes=500)
+    log.append('session_start')
+    log.flush()
+    
+    def write():
+        for n in range(30):
+            log.append('output', text='line %02d ' % n + 'x' * 40)
+            log.flush()
+            time.sleep(0.01)
+        log.append('session_end', status='completed')
+        log.close()
+    
+    # The follower sees every record once, in order, and stops at the end
+    writer = threading.Thread(target=write)
+    writer.start()
+    records = [record for _, record in follow_events(path, follow=True, timeout=0.2)]
+    writer.join()
+    assert len(log_parts(path)) > 3, 'The log should have rotated while followed'
+    texts = [record['text'][:7] for record in records if record['type'] == 'output']
+    assert texts == ['line %02d' % n for n in range(30)], f'Wrong records {texts}'
+    assert records[-1]['type'] == 'session_end', 'Following should stop at session_end'
+    
+    # A replaced file's watch is removed, even while the old file is still open
+    if sys.platform.startswith('linux'):
+        watcher = _Inotify(path)
+        held = []
+        for n in range(3):
+            held.append(open(path, 'rb'))
+            (Path(tmpdir) / 'fresh').write_text('{}')
+            os.replace(Path(tmpdir) / 'fresh', path)
+            watcher.wait(0)
+        watches = [line for line in open(f'/proc/self/fdinfo/{watcher.fd}') if line.startswith('inotify')]
+        assert len(watches) == 1, f'Expected one watch, found {len(watches)}'
+        watcher.close()
+        for f in held:
+            f.close()
+
+print('Follow tests passed')
+" && pass "Following event logs works" || fail "Follow test failed"
+
+# Test 22: Search
+echo ""
+echo "Test 22: Search"
+info "Testing incremental indexing and full-text search..."
+$PYTHON -c "
+import tempfile
+from pathlib import Path
+from tempo.eventlog import EventLog, read_events
+from tempo.search import SearchIndex, event_logs
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    tmp = Path(tmpdir)
+    logs = []
+    for project, words in (('alpha', 'parser refactor'), ('beta', 'database migration')):
+        transcripts = tmp / project / '.tempo' / 'transcripts'
+        transcripts.mkdir(parents=True)
+        log = EventLog(transcripts / f'20250101_000000_{project}1.jsonl')
+        log.append('prompt', prompt='main', text=f'Start the {words}')
+        log.append('output', prompt='main', text=f'Working on the {words} now')
+        log.append('usage', prompt='main', text='not searchable')
+        log.flush()
+        logs.append(log)
+    
+    index = SearchIndex(tmp / 'search.db')
+    paths = [path for project in ('alpha', 'beta') for path in event_logs(tmp / project)]
+    assert index.index_logs(paths + [tmp / 'gone.jsonl']) == 4, 'A missing log should not stop the rest'
+    assert index.index_logs(paths) == 0, 'Unchanged logs are skipped'
+    
+    # Only what was appended since is indexed again
+    logs[0].append('error', prompt='main', message='parser crashed')
+    logs[0].flush()
+    assert index.index_log(paths[0]) == 1, 'Only the new record should be indexed'
+    
+    hits = index.search('parser')
+    assert len(hits) == 3 and {hit['project'] for hit in hits} == {str((tmp / 'alpha').resolve())}, f'Wrong hits {hits}'
+    assert [hit['type'] for hit in index.search('parser', event_type='error')] == ['error'], 'Filter by type'
+    assert index.search('migration', session_id='beta')[0]['snippet'].count('[migration]') == 1, 'Highlighted snippet'
+    assert index.search('parser', project=str((tmp / 'beta').resolve())) == [], 'Filter by project'
+    assert index.search('parser refactor)') != [], 'Invalid query syntax should be searched as a phrase'
+    
+    # A hit's offset opens the record it came from
+    hit = index.search('crashed')[0]
+    assert next(read_events(Path(hit['log']), hit['offset']))[1]['message'] == 'parser crashed', 'Wrong offset'
+    
+    # The index is rebuilt if its database is removed
+    (tmp / 'search.db').unlink()
+    assert index.index_logs(paths) == 5 and len(index.search('parser')) == 3, 'Index should be recreated'
+
+print('Search tests passed')
+" && pass "Search works" || fail "Search test failed"
+
+# Test 23: Daemon
+echo ""
+echo "Test 23: Daemon"
+info "Testing submit, list, attach and stop against a running daemon..."
+$PYTHON -c "
+import asyncio
+import contextlib
+import io
+import json
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# A claude that takes a moment, then finishes the task
+FAKE_CLAUDE = [
+    '#!' + sys.executable,
+    'import json, os, time',
+    'time.sleep(0.5)',
+    'print(json.dumps({\'type\': \'result\', \'is_error\': False, \'result\': os.environ[\'FAKE_RESULT\']}))',
+]
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    tmp = Path(tmpdir)
+    os.environ['TEMPO_HOME'] = tmpdir
+    (tmp / 'bin').mkdir()
+    (tmp / 'bin' / 'claude').write_text(chr(10).join(FAKE_CLAUDE))
+    (tmp / 'bin' / 'claude').chmod(stat.S_IRWXU)
+    os.environ['PATH'] = str(tmp / 'bin') + os.pathsep + os.environ['PATH']
+    (tmp / 'project').mkdir()
+    
+    from tempo.config import COMPLETION_CODE
+    from tempo.daemon import DaemonError, TempoDaemon, _listening, attach, request
+    os.environ['FAKE_RESULT'] = 'Done. ' + COMPLETION_CODE
+    
+    socket_path = tmp / 'daemon.sock'
+    daemon = TempoDaemon(socket_path, concurrency=2)
+    results = {}
+    
+    def refused(message):
+        try:
+            request(message, socket_path)
+        except DaemonError as e:
+            return str(e)
+        return None
+    
+    def client():
+        try:
+            while not _listening(socket_path):
+                time.sleep(0.05)
+            assert refused({'op': 'submit', 'project_dir': str(tmp / 'missing'), 'prompt': 'x'}), 'Not a directory'
+            job = request({'op': 'submit', 'project_dir': str(tmp / 'project'), 'prompt': 'Fix the bug'}, socket_path)['job']
+            assert 'already' in refused({'op': 'submit', 'project_dir': str(tmp / 'project'), 'prompt': 'y'}), 'One job per project'
+            results['events'] = list(attach(job['id'], socket_path))
+            results['replay'] = list(attach(job['id'], socket_path))
+            results['jobs'] = request({'op': 'list'}, socket_path)['jobs']
+            results['unknown'] = refused({'op': 'nope'})
+            results['missing'] = refused({'op': 'cancel', 'job': 99})
+        finally:
+            request({'op': 'stop'}, socket_path)
+    
+    thread = threading.Thread(target=client)
+    thread.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(daemon.serve())
+    thread.join()
+    
+    events = results['events']
+    assert events[-1]['event'] == 'job_end' and events[-1]['status'] == 'completed', f'Wrong end {events[-1:]}'
+    assert any(e['event'] == 'session_end' for e in events), 'Attach should stream the runner events'
+    assert results['replay'][-1]['event'] == 'job_end', 'A finished job should replay its events'
+    assert [(j['id'], j['status']) for j in results['jobs']] == [(1, 'completed')], f'Wrong jobs {results[\"jobs\"]}'
+    assert results['jobs'][0]['session_id'], 'The job should report its session'
+    assert 'Unknown op' in results['unknown'] and 'No job 99' in results['missing'], 'Bad requests are refused'
+    
+    # Jobs share the daemon's rate limit state, and the socket is removed on stop
+    runner = daemon.jobs[1].runner
+    assert runner.quota is daemon._quota and runner.history is daemon._history, 'Jobs should share quota state'
+    assert not socket_path.exists(), 'Stopping should remove the socket'
+
+print('Daemon tests passed')
+" && pass "Daemon works" || fail "Daemon test failed"
+
 echo ""
 echo "╔════════════════════════════════════════════════════════════╗"
 echo "║              All tests passed! ✓                           ║"
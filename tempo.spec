@@ -15,7 +15,19 @@ a = Analysis(
         'rich.table',
         'rich.text',
         'rich.live',
+        'rich.markup',
         'rich.spinner',
+        # Imported inside the CLI commands that need them
+        'tempo.runner',
+        'tempo.daemon',
+        'tempo.multi',
+        'tempo.transcript',
+        'tempo.eventlog',
+        'tempo.follow',
+        'tempo.search',
+        'tempo.registry',
+        'tempo.history',
+        'sqlite3',
         'yaml',
         'dateutil',
         'dateutil.parser',
@@ -0,0 +1,186 @@
+"""Bounded-memory output buffer for streamed Claude output."""
+
+import hashlib
+import tempfile
+from collections import deque
+from typing import IO, Deque, Iterator, Optional, Tuple
+
+from tempo.config import OUTPUT_BUFFER_MEMORY_CHARS, OUTPUT_BUFFER_READ_CHARS
+
+# Digests of the latest blocks and messages kept for result deduplication
+# (the result repeats the final message, so only recent ones can match)
+_RECENT_DIGESTS = 8
+
+# Spill file positions remembered, so tail() seeks near the end of the file
+_SPILL_CHECKPOINTS = 64
+
+
+def _digest(text: str) -> bytes:
+    """Hash a block of text for duplicate detection."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class OutputBuffer:
+    """
+    Accumulates output text as a list of chunks.
+    
+    Only the most recent text is kept in memory; once the in-memory tail
+    grows past max_memory_chars, the oldest text is spilled to an
+    anonymous temporary file, down to half the budget. Readers iterate over chunks instead of
+    building one large string.
+    
+    Digests of the latest few blocks (and of the current message, which
+    may span several blocks or deltas) are kept so that a final `result`
+    payload can be deduplicated in constant time and memory.
+    """
+    
+    def __init__(self, max_memory_chars: int = OUTPUT_BUFFER_MEMORY_CHARS):
+        self.max_memory_chars = max_memory_chars
+        
+        self._chunks: Deque[str] = deque()
+        self._memory_chars = 0
+        self._spilled_chars = 0
+        self._spill_file: Optional[IO[str]] = None
+        
+        # (character offset, file position) where recent spilled chunks start
+        self._checkpoints: Deque[Tuple[int, int]] = deque(maxlen=_SPILL_CHECKPOINTS)
+        
+        self._recent_digests: Deque[bytes] = deque(maxlen=_RECENT_DIGESTS)
+        self._message_id: Optional[str] = None
+        self._message_hash = hashlib.blake2b(digest_size=16)
+        self._message_empty = True
+    
+    def __len__(self) -> int:
+        return self._spilled_chars + self._memory_chars
+    
+    def __bool__(self) -> bool:
+        return len(self) > 0
+    
+    def append(self, text: str) -> None:
+        """Append a block of text."""
+        if not text:
+            return
+        
+        self._chunks.append(text)
+        self._memory_chars += len(text)
+        
+        self._recent_digests.append(_digest(text))
+        self._message_hash.update(text.encode("utf-8", "surrogatepass"))
+        self._message_empty = False
+        
+        if self._memory_chars > self.max_memory_chars:
+            self._spill()
+    
+    def start_message(self, message_id: Optional[str] = None) -> None:
+        """
+        Mark the start of an assistant message.
+        
+        Blocks appended after this call are hashed together so the whole
+        message can be matched against a later `result` payload. The CLI
+        sends one event per content block, each with its message's id, so
+        a call with the current message's id continues that message.
+        """
+        if message_id is not None and message_id == self._message_id:
+            return
+        self._message_id = message_id
+        if not self._message_empty:
+            self._recent_digests.append(self._message_hash.digest())
+        self._message_hash = hashlib.blake2b(digest_size=16)
+        self._message_empty = True
+    
+    def contains_block(self, text: str) -> bool:
+        """Check if text was already appended as a block or a whole message."""
+        digest = _digest(text)
+        if digest in self._recent_digests:
+            return True
+        return not self._message_empty and digest == self._message_hash.digest()
+    
+    def tail(self, max_chars: int = 2000) -> str:
+        """Return up to the last max_chars characters of output."""
+        parts = []
+        remaining = max_chars
+        for chunk in reversed(self._chunks):
+            if remaining <= 0:
+                break
+            parts.append(chunk[-remaining:])
+            remaining -= len(chunk)
+        
+        text = "".join(reversed(parts))
+        if remaining > 0 and self._spill_file is not None:
+            # Not enough text in memory, read the end of the spill file
+            self._spill_file.flush()
+            spilled = self._read_spilled(max(0, self._spilled_chars - remaining))
+            text = spilled + text
+        
+        return text
+    
+    def iter_chunks(self, chunk_chars: int = OUTPUT_BUFFER_READ_CHARS) -> Iterator[str]:
+        """Yield the full output in order, spilled text first."""
+        if self._spill_file is not None:
+            self._spill_file.flush()
+            self._spill_file.seek(0)
+            while True:
+                chunk = self._spill_file.read(chunk_chars)
+                if not chunk:
+                    break
+                yield chunk
+        
+        yield from self._chunks
+    
+    def write_to(self, f: IO[str]) -> None:
+        """Write the full output to a file object."""
+        for chunk in self.iter_chunks():
+            f.write(chunk)
+    
+    def close(self) -> None:
+        """Release the spill file and drop all buffered text."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        
+        self._chunks = deque()
+        self._memory_chars = 0
+        self._spilled_chars = 0
+        self._checkpoints.clear()
+        self._recent_digests.clear()
+        self.start_message()
+    
+    def _spill(self) -> None:
+        """Move the oldest in-memory chunks to the spill file."""
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(
+                mode="w+", encoding="utf-8", errors="surrogatepass", prefix="tempo-output-"
+            )
+        
+        # Keep half of the memory budget as the in-memory tail
+        keep = self.max_memory_chars // 2
+        self._spill_file.seek(0, 2)
+        while self._chunks and self._memory_chars > keep:
+            chunk = self._chunks.popleft()
+            excess = self._memory_chars - keep
+            if len(chunk) > excess:
+                # Spill only the head of a chunk that straddles the budget,
+                # so even a single oversized block leaves just its tail here
+                self._chunks.appendleft(chunk[excess:])
+                chunk = chunk[:excess]
+            self._checkpoints.append((self._spilled_chars, self._spill_file.tell()))
+            self._spill_file.write(chunk)
+            self._memory_chars -= len(chunk)
+            self._spilled_chars += len(chunk)
+    
+    def _read_spilled(self, start_char: int) -> str:
+        """Read spilled text from a character offset to the end."""
+        # Text-mode files can't seek to character offsets: start at the
+        # last recorded chunk start before the offset and skip forward
+        skipped, position = 0, 0
+        for chars, pos in reversed(self._checkpoints):
+            if chars <= start_char:
+                skipped, position = chars, pos
+                break
+        self._spill_file.seek(position)
+        while skipped < start_char:
+            chunk = self._spill_file.read(min(OUTPUT_BUFFER_READ_CHARS, start_char - skipped))
+            if not chunk:
+                break
+            skipped += len(chunk)
+        return self._spill_file.read()
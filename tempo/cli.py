@@ -1,21 +1,164 @@
-"""Command-line interface for Tempo."""
+"""
+Command-line interface for Tempo.
 
-import os
+`tempo status` is run from shell prompts and monitoring scripts every few
+seconds, so this module imports only click and the config at load time.
+Each command imports what it needs (the runner, rich, yaml, ...) when it
+runs; keep it that way, and check with scripts/bench_startup.py.
+"""
+
+import re
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 import click
-import yaml
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
 from tempo import __version__
-from tempo.runner import TempoRunner
-from tempo.session import PromptItem, SessionManager
+from tempo.config import (
+    COMPLETION_GRACE_SECONDS,
+    CYCLE_TIMEOUT_SECONDS,
+    DAEMON_CONCURRENCY,
+    DAG_CONCURRENCY,
+    RUN_MANY_CONCURRENCY,
+    SEARCHABLE_FIELDS,
+    SESSION_DIR,
+    STALL_TIMEOUT_SECONDS,
+)
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    
+    from tempo.events import JsonlEmitter
+    from tempo.session import Session
+
+
+class _LazyConsole:
+    """Stands in for the rich Console, creating it (and importing rich) on first use."""
+    
+    def __init__(self):
+        object.__setattr__(self, "_console", None)
+    
+    def _get(self) -> "Console":
+        if self._console is None:
+            from rich.console import Console
+            
+            object.__setattr__(self, "_console", Console())
+        return self._console
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get(), name, value)
+
 
-console = Console()
+console = _LazyConsole()
+
+
+def _options(*options: Callable) -> Callable:
+    """Combine click options into one decorator, keeping their order in --help."""
+    def decorator(func: Callable) -> Callable:
+        for option in reversed(options):
+            func = option(func)
+        return func
+    return decorator
+
+
+# How Claude is run and supervised: run, resume, run-many and daemon
+_claude_options = _options(
+    click.option(
+        "--no-skip-permissions",
+        is_flag=True,
+        help="Don't use --dangerously-skip-permissions flag.",
+    ),
+    click.option(
+        "--completion-grace",
+        type=click.FloatRange(min=0),
+        default=COMPLETION_GRACE_SECONDS,
+        show_default=True,
+        help="Seconds to let Claude finish after the completion marker before stopping it.",
+    ),
+    click.option(
+        "--stall-timeout",
+        type=click.FloatRange(min=0),
+        default=STALL_TIMEOUT_SECONDS,
+        show_default=True,
+        help="Seconds without output before Claude is treated as hung and restarted (0 disables).",
+    ),
+    click.option(
+        "--cycle-timeout",
+        type=click.FloatRange(min=0),
+        default=CYCLE_TIMEOUT_SECONDS,
+        show_default=True,
+        help="Hard limit in seconds for a single Claude process (0 disables).",
+    ),
+    click.option(
+        "--verbose", "-v",
+        is_flag=True,
+        help="Enable verbose output.",
+    ),
+)
+
+# Token/cost caps and extra rate limit patterns: run, resume and run-many
+_budget_options = _options(
+    click.option(
+        "--max-tokens",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Stop the session once it has used this many tokens (including cache).",
+    ),
+    click.option(
+        "--max-cost",
+        type=click.FloatRange(min=0),
+        default=None,
+        help="Stop the session once it has cost this many USD.",
+    ),
+    click.option(
+        "--max-prompt-tokens",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Stop when a single prompt has used this many tokens.",
+    ),
+    click.option(
+        "--max-prompt-cost",
+        type=click.FloatRange(min=0),
+        default=None,
+        help="Stop when a single prompt has cost this many USD.",
+    ),
+    click.option(
+        "--rate-limit-pattern",
+        "rate_limit_patterns",
+        multiple=True,
+        callback=lambda ctx, param, value: _validate_patterns(value),
+        help="Extra regex treated as a rate limit message. Can be repeated.",
+    ),
+)
+
+# Machine-readable output: run and resume
+_output_options = _options(
+    click.option(
+        "--output", "-o",
+        type=click.Choice(["rich", "jsonl"]),
+        default="rich",
+        show_default=True,
+        help="Output format. jsonl emits machine-readable events and skips all rich rendering.",
+    ),
+    click.option(
+        "--output-fd",
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help="File descriptor for --output jsonl events.",
+    ),
+    click.option(
+        "--deltas",
+        is_flag=True,
+        help="Include streamed text deltas in --output jsonl events.",
+    ),
+)
 
 
 @click.group()
@@ -48,20 +191,25 @@ def main():
     default=".",
     help="Project directory to run Claude in. Defaults to current directory.",
 )
-@click.option(
-    "--no-skip-permissions",
-    is_flag=True,
-    help="Don't use --dangerously-skip-permissions flag.",
-)
 @click.option(
     "--force",
     is_flag=True,
     help="Force start a new session even if one exists.",
 )
 @click.option(
-    "--verbose", "-v",
+    "--concurrency", "-j",
+    type=click.IntRange(min=1),
+    default=DAG_CONCURRENCY,
+    show_default=True,
+    help="Maximum independent sequence steps (depends_on) run in parallel.",
+)
+@_claude_options
+@_budget_options
+@_output_options
+@click.option(
+    "--detach",
     is_flag=True,
-    help="Enable verbose output.",
+    help="Submit the run to tempo daemon and return immediately.",
 )
 def run(
     prompt: Optional[str],
@@ -70,7 +218,20 @@ def run(
     dir: str,
     no_skip_permissions: bool,
     force: bool,
+    concurrency: int,
+    completion_grace: float,
+    stall_timeout: float,
+    cycle_timeout: float,
+    max_tokens: Optional[int],
+    max_cost: Optional[float],
+    max_prompt_tokens: Optional[int],
+    max_prompt_cost: Optional[float],
+    rate_limit_patterns: Tuple[str, ...],
+    output: str,
+    output_fd: int,
+    deltas: bool,
     verbose: bool,
+    detach: bool,
 ):
     """
     Run a task with Claude Code.
@@ -83,8 +244,16 @@ def run(
         tempo run --file ./my-task.md
         tempo run --sequence ./prompts.yaml
         tempo run "Add tests" --dir ./my-project
+        tempo run --file ./task.md --output jsonl > events.jsonl
+        tempo run --file ./task.md --detach
     """
+    from rich.panel import Panel
+    
+    from tempo.runner import TempoRunner
+    from tempo.session import Budget, SessionManager
+    
     project_dir = Path(dir).resolve()
+    emitter = _make_emitter(output, output_fd, deltas)
     
     # Validate inputs
     if sequence:
@@ -94,10 +263,22 @@ def run(
             console.print("[red]Failed to load sequence file.[/red]")
             sys.exit(1)
         
+        if detach:
+            _submit_detached(project_dir, prompts=prompts, force=force)
+            return
+        
         runner = TempoRunner(
             str(project_dir),
             skip_permissions=not no_skip_permissions,
             verbose=verbose,
+            completion_grace=completion_grace,
+            stall_timeout=stall_timeout,
+            cycle_timeout=cycle_timeout,
+            prompt_budget=Budget(max_prompt_tokens, max_prompt_cost),
+            session_budget=Budget(max_tokens, max_cost),
+            rate_limit_patterns=list(rate_limit_patterns),
+            concurrency=concurrency,
+            emitter=emitter,
         )
         
         if force:
@@ -120,6 +301,12 @@ def run(
     if not force and session_manager.exists():
         existing = session_manager.load()
         if existing and existing.status not in ("completed", "failed"):
+            if emitter:
+                emitter.emit(
+                    "error",
+                    session=existing.session_id,
+                    message="Existing session found; use tempo resume or --force",
+                )
             console.print(
                 Panel(
                     f"[yellow]Existing session found[/yellow]\n\n"
@@ -134,11 +321,22 @@ def run(
             )
             sys.exit(1)
     
+    if detach:
+        _submit_detached(project_dir, prompt=prompt, force=force)
+        return
+    
     # Run
     runner = TempoRunner(
         str(project_dir),
         skip_permissions=not no_skip_permissions,
         verbose=verbose,
+        completion_grace=completion_grace,
+        stall_timeout=stall_timeout,
+        cycle_timeout=cycle_timeout,
+        prompt_budget=Budget(max_prompt_tokens, max_prompt_cost),
+        session_budget=Budget(max_tokens, max_cost),
+        rate_limit_patterns=list(rate_limit_patterns),
+        emitter=emitter,
     )
     
     if force:
@@ -155,17 +353,25 @@ def run(
     default=".",
     help="Project directory. Defaults to current directory.",
 )
-@click.option(
-    "--no-skip-permissions",
-    is_flag=True,
-    help="Don't use --dangerously-skip-permissions flag.",
-)
-@click.option(
-    "--verbose", "-v",
-    is_flag=True,
-    help="Enable verbose output.",
-)
-def resume(dir: str, no_skip_permissions: bool, verbose: bool):
+@_claude_options
+@_budget_options
+@_output_options
+def resume(
+    dir: str,
+    no_skip_permissions: bool,
+    completion_grace: float,
+    stall_timeout: float,
+    cycle_timeout: float,
+    max_tokens: Optional[int],
+    max_cost: Optional[float],
+    max_prompt_tokens: Optional[int],
+    max_prompt_cost: Optional[float],
+    rate_limit_patterns: Tuple[str, ...],
+    output: str,
+    output_fd: int,
+    deltas: bool,
+    verbose: bool,
+):
     """
     Resume after a crash (emergency recovery).
     
@@ -173,18 +379,118 @@ def resume(dir: str, no_skip_permissions: bool, verbose: bool):
     Normal rate limit handling is automatic—you don't need this
     for regular overnight runs.
     """
+    from tempo.runner import TempoRunner
+    from tempo.session import Budget
+    
     project_dir = Path(dir).resolve()
     
     runner = TempoRunner(
         str(project_dir),
         skip_permissions=not no_skip_permissions,
         verbose=verbose,
+        completion_grace=completion_grace,
+        stall_timeout=stall_timeout,
+        cycle_timeout=cycle_timeout,
+        prompt_budget=Budget(max_prompt_tokens, max_prompt_cost),
+        session_budget=Budget(max_tokens, max_cost),
+        rate_limit_patterns=list(rate_limit_patterns),
+        emitter=_make_emitter(output, output_fd, deltas),
     )
     
     success = runner.run(resume=True)
     sys.exit(0 if success else 1)
 
 
+@main.command("run-many")
+@click.argument("dirs", nargs=-1, required=True, type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--prompt", "-p",
+    help="The prompt to send to Claude in every directory.",
+)
+@click.option(
+    "--file", "-f",
+    type=click.Path(exists=True),
+    help="Read prompt from a file instead of command line.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Resume the existing session in each directory instead of starting new ones.",
+)
+@click.option(
+    "--concurrency", "-j",
+    type=click.IntRange(min=1),
+    default=RUN_MANY_CONCURRENCY,
+    show_default=True,
+    help="Maximum number of projects running at the same time.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Force start new sessions even if some exist.",
+)
+@_claude_options
+@_budget_options
+def run_many(
+    dirs: Tuple[str, ...],
+    prompt: Optional[str],
+    file: Optional[str],
+    resume: bool,
+    concurrency: int,
+    no_skip_permissions: bool,
+    force: bool,
+    completion_grace: float,
+    stall_timeout: float,
+    cycle_timeout: float,
+    max_tokens: Optional[int],
+    max_cost: Optional[float],
+    max_prompt_tokens: Optional[int],
+    max_prompt_cost: Optional[float],
+    rate_limit_patterns: Tuple[str, ...],
+    verbose: bool,
+):
+    """
+    Run a task in many project directories at once.
+    
+    One tempo process drives a session per directory, with at most
+    --concurrency of them running Claude at the same time.
+    
+    \b
+    Examples:
+        tempo run-many ./api ./web ./worker -p "Update dependencies"
+        tempo run-many ~/src/* --file ./task.md -j 8
+        tempo run-many ./api ./web --resume
+    """
+    from tempo.multi import run_many as run_many_dirs
+    from tempo.session import Budget, SessionManager
+    
+    if file:
+        prompt = Path(file).read_text().strip()
+    elif not prompt and not resume:
+        console.print("[red]Please provide --prompt, --file, or --resume.[/red]")
+        sys.exit(1)
+    
+    if force:
+        for project_dir in dirs:
+            SessionManager(project_dir).delete()
+    
+    success = run_many_dirs(
+        list(dirs),
+        prompt=prompt,
+        resume=resume,
+        concurrency=concurrency,
+        skip_permissions=not no_skip_permissions,
+        verbose=verbose,
+        completion_grace=completion_grace,
+        stall_timeout=stall_timeout,
+        cycle_timeout=cycle_timeout,
+        prompt_budget=Budget(max_prompt_tokens, max_prompt_cost),
+        session_budget=Budget(max_tokens, max_cost),
+        rate_limit_patterns=list(rate_limit_patterns),
+    )
+    sys.exit(0 if success else 1)
+
+
 @main.command()
 @click.option(
     "--dir", "-d",
@@ -192,13 +498,77 @@ def resume(dir: str, no_skip_permissions: bool, verbose: bool):
     default=".",
     help="Project directory. Defaults to current directory.",
 )
-def status(dir: str):
+@click.option(
+    "--all", "show_all",
+    is_flag=True,
+    help="List sessions in every project, from the session registry.",
+)
+@click.option(
+    "--status", "status_filter",
+    default=None,
+    help="List sessions in every project with this status (e.g. rate_limited).",
+)
+@click.option(
+    "--history",
+    is_flag=True,
+    help="List this project's earlier sessions.",
+)
+@click.option(
+    "--limit", "-n",
+    type=click.IntRange(min=1),
+    default=50,
+    show_default=True,
+    help="Number of sessions to list with --all, --status or --history.",
+)
+def status(dir: str, show_all: bool, status_filter: Optional[str], history: bool, limit: int):
     """
     Show the status of the current session.
+    
+    With --all or --status, list sessions across all projects instead.
     """
+    from rich.table import Table
+    
+    from tempo.quota import QuotaCoordinator
+    from tempo.registry import SessionRegistry
+    from tempo.session import SessionManager
+    
     project_dir = Path(dir).resolve()
+    
+    if show_all or status_filter:
+        rows = SessionRegistry().sessions(status=status_filter, limit=limit)
+        if not rows:
+            console.print("[dim]No sessions found.[/dim]")
+            return
+        _print_session_rows(rows, title="Sessions")
+        return
+    
     session_manager = SessionManager(str(project_dir))
     
+    if history:
+        past = session_manager.history()[:limit]
+        if not past:
+            console.print("[dim]No earlier sessions in this directory.[/dim]")
+            return
+        table = Table(title=f"Earlier Sessions in {project_dir.name}")
+        table.add_column("Session")
+        table.add_column("Status")
+        table.add_column("Cycles", justify="right")
+        table.add_column("Prompts", justify="right")
+        table.add_column("Cost", justify="right")
+        table.add_column("Updated")
+        for past_session in past:
+            completed = sum(1 for p in past_session.prompts if p.completed)
+            table.add_row(
+                past_session.session_id,
+                _format_status(past_session.status),
+                str(past_session.cycle_count),
+                f"{completed}/{len(past_session.prompts)}" if past_session.prompts else "-",
+                f"${past_session.usage.cost_usd:.2f}",
+                past_session.updated_at[:16].replace("T", " "),
+            )
+        console.print(table)
+        return
+    
     if not session_manager.exists():
         console.print("[dim]No active session in this directory.[/dim]")
         return
@@ -218,7 +588,37 @@ def status(dir: str):
     table.add_row("Project", session.project_dir)
     table.add_row("Created", session.created_at)
     table.add_row("Updated", session.updated_at)
+    if session.claude_session_id:
+        table.add_row("Claude Conversation", session.claude_session_id)
     table.add_row("Rate Limit Cycles", str(session.cycle_count))
+    if session.rate_limit_channel:
+        table.add_row(
+            "Last Rate Limit",
+            f"{session.rate_limit_channel} (confidence {session.rate_limit_confidence:.2f})",
+        )
+    
+    if session.stalls:
+        last = session.stalls[-1]
+        table.add_row("Stalls", f"{len(session.stalls)} (last: {last.reason} after {last.seconds:.0f}s)")
+    
+    shared_reset = QuotaCoordinator().current_reset()
+    if shared_reset:
+        table.add_row("Account Rate Limited Until", shared_reset.strftime("%Y-%m-%d %I:%M %p"))
+    
+    if session.probes:
+        last_probe = session.probes[-1]
+        table.add_row("Rate Limit Probes", f"{len(session.probes)} (last: {last_probe.outcome})")
+    
+    if session.usage.runs:
+        usage = session.usage
+        table.add_row(
+            "Tokens",
+            f"{usage.input_tokens:,} in / {usage.output_tokens:,} out / "
+            f"{usage.cache_read_tokens:,} cache read / {usage.cache_creation_tokens:,} cache write",
+        )
+        if usage.cache_hit_rate is not None:
+            table.add_row("Prompt Cache Hits", _format_cache_hits(session))
+        table.add_row("Cost", f"${usage.cost_usd:.4f} over {usage.runs} Claude run(s)")
     
     if session.prompts:
         completed = sum(1 for p in session.prompts if p.completed)
@@ -227,12 +627,606 @@ def status(dir: str):
     console.print(table)
     
     # Show prompts if in sequence mode
-    if session.prompts:
+    if session.prompts and session.is_dag():
+        console.print("\n[bold]Prompt Graph:[/bold]")
+        icons = {"completed": "✓", "running": "→", "failed": "✗", "pending": "○"}
+        styles = {"completed": "green", "running": "yellow", "failed": "red", "pending": "dim"}
+        for prompt in session.prompts:
+            style = styles.get(prompt.status, "dim")
+            after = f" (after {', '.join(prompt.depends_on)})" if prompt.depends_on else ""
+            spent = f" [dim]({prompt.usage.describe()})[/dim]" if prompt.usage.runs else ""
+            console.print(f"  [{style}]{icons.get(prompt.status, '○')} {prompt.name}{after}[/{style}]{spent}")
+            if prompt.error:
+                console.print(f"      [dim]{prompt.error}[/dim]")
+    elif session.prompts:
         console.print("\n[bold]Prompt Sequence:[/bold]")
         for i, prompt in enumerate(session.prompts):
             status_icon = "✓" if prompt.completed else ("→" if i == session.current_prompt_index else "○")
             status_style = "green" if prompt.completed else ("yellow" if i == session.current_prompt_index else "dim")
-            console.print(f"  [{status_style}]{status_icon} {prompt.name}[/{status_style}]")
+            spent = f" [dim]({prompt.usage.describe()})[/dim]" if prompt.usage.runs else ""
+            console.print(f"  [{status_style}]{status_icon} {prompt.name}[/{status_style}]{spent}")
+
+
+@main.command()
+@click.argument("session", required=False)
+@click.option(
+    "--dir", "-d",
+    type=click.Path(exists=True),
+    default=".",
+    help="Project directory. Defaults to current directory.",
+)
+@click.option(
+    "--list", "list_only",
+    is_flag=True,
+    help="List the project's transcripts instead of printing one.",
+)
+@click.option(
+    "--cycle",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Only print this rate limit cycle.",
+)
+@click.option(
+    "--prompt", "prompt_ref",
+    default=None,
+    help="Only print this prompt of a sequence (name or 1-based number).",
+)
+def transcript(
+    session: Optional[str],
+    dir: str,
+    list_only: bool,
+    cycle: Optional[int],
+    prompt_ref: Optional[str],
+):
+    """
+    Print a session transcript.
+    
+    Prints the latest transcript, or the one for SESSION (a session ID or
+    a prefix of it). Rotated, compressed parts are read back in order.
+    With --cycle or --prompt, that part is rendered from the session's
+    event log, seeking to it through the log's index.
+    """
+    from tempo.eventlog import EventIndex, read_events
+    from tempo.session import SessionManager
+    from tempo.transcript import find_transcripts, read_transcript, render_markdown, transcript_parts
+    
+    project_dir = Path(dir).resolve()
+    paths = find_transcripts(project_dir)
+    
+    if list_only:
+        for path in paths:
+            size = sum(part.stat().st_size for part in transcript_parts(path))
+            console.print(f"{path.name}  [dim]({len(transcript_parts(path))} part(s), {size:,} bytes)[/dim]")
+        return
+    
+    if session:
+        paths = [path for path in paths if path.stem.split("_", 2)[-1].startswith(session)]
+    if not paths:
+        console.print("[dim]No transcript found.[/dim]")
+        sys.exit(1)
+    
+    if cycle is None and prompt_ref is None:
+        for chunk in read_transcript(paths[-1]):
+            sys.stdout.write(chunk)
+        sys.stdout.flush()
+        return
+    
+    log_path = paths[-1].with_suffix(".jsonl")
+    current = SessionManager(str(project_dir)).load()
+    if prompt_ref is not None:
+        key, target = "prompt_index", _resolve_prompt_index(current, prompt_ref)
+        offset = EventIndex(log_path).seek(prompt_index=target)
+    else:
+        key, target = "cycle", cycle
+        offset = EventIndex(log_path).seek(cycle=cycle)
+    
+    if offset is None:
+        console.print("[dim]Nothing logged for that cycle or prompt.[/dim]")
+        sys.exit(1)
+    
+    # Parallel steps interleave; otherwise the range ends at the first
+    # record outside it
+    interleaved = key == "prompt_index" and current is not None and current.is_dag()
+    for _, record in read_events(log_path, offset):
+        if record[key] != target:
+            if interleaved:
+                continue
+            break
+        sys.stdout.write(render_markdown(record))
+    sys.stdout.flush()
+
+
+def _resolve_prompt_index(session: Optional["Session"], prompt_ref: str) -> int:
+    """Turn a prompt name or 1-based number into a prompt index."""
+    if prompt_ref.isdigit():
+        return int(prompt_ref) - 1
+    
+    names = [p.name for p in session.prompts] if session else []
+    if prompt_ref not in names:
+        console.print(f"[red]No prompt named '{prompt_ref}' in the current session.[/red]")
+        sys.exit(1)
+    return names.index(prompt_ref)
+
+
+@main.command()
+@click.option(
+    "--dir", "-d",
+    type=click.Path(exists=True),
+    default=".",
+    help="Project directory. Defaults to current directory.",
+)
+@click.option(
+    "--follow", "-f",
+    is_flag=True,
+    help="Keep printing new events until the session ends.",
+)
+@click.option(
+    "--session", "session_ref",
+    default=None,
+    help="Session ID (or prefix) to show. Defaults to the current session.",
+)
+@click.option(
+    "--type", "-t", "event_types",
+    multiple=True,
+    help="Only show events of this type (repeatable), e.g. rate_limit.",
+)
+@click.option(
+    "--rate-limits",
+    is_flag=True,
+    help="Only show rate limit, probe, stall and resume events.",
+)
+@click.option(
+    "--prompt", "prompt_name",
+    default=None,
+    help="Only show events of this prompt.",
+)
+@click.option(
+    "--offset",
+    type=int,
+    default=0,
+    help="Byte offset in the event log to start at; negative counts from the end.",
+)
+@click.option(
+    "--json", "as_json",
+    is_flag=True,
+    help="Print raw event records instead of rendered markdown.",
+)
+def logs(
+    dir: str,
+    follow: bool,
+    session_ref: Optional[str],
+    event_types: Tuple[str, ...],
+    rate_limits: bool,
+    prompt_name: Optional[str],
+    offset: int,
+    as_json: bool,
+):
+    """
+    Show or follow a session's event log.
+    
+    Finds the current session's log (or SESSION's) and prints its events,
+    rendered as markdown. With --follow, new events are printed as they are
+    written, without re-reading the file.
+    """
+    import json
+    
+    from tempo.eventlog import log_end
+    from tempo.follow import follow_events
+    from tempo.session import SessionManager
+    from tempo.transcript import find_transcripts, render_markdown
+    
+    project_dir = Path(dir).resolve()
+    
+    if session_ref is None:
+        session = SessionManager(str(project_dir)).load()
+        if not session:
+            console.print("[dim]No session in this directory.[/dim]")
+            sys.exit(1)
+        session_ref = session.session_id
+    
+    paths = [
+        path.with_suffix(".jsonl")
+        for path in find_transcripts(project_dir)
+        if path.stem.split("_", 2)[-1].startswith(session_ref)
+    ]
+    paths = [path for path in paths if path.exists()]
+    if not paths:
+        console.print(f"[dim]No event log found for session {session_ref}.[/dim]")
+        sys.exit(1)
+    log_path = paths[-1]
+    
+    types = set(event_types)
+    if rate_limits:
+        types.update(("rate_limit", "probe", "stall", "resume"))
+    
+    def keep(record: Dict[str, Any]) -> bool:
+        if types and record.get("type") not in types:
+            return False
+        return prompt_name is None or record.get("prompt") == prompt_name
+    
+    if offset < 0:
+        offset = max(0, log_end(log_path) + offset)
+    
+    position = offset
+    try:
+        for position, record in follow_events(log_path, offset, follow=follow, keep=keep):
+            if as_json:
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            else:
+                sys.stdout.write(render_markdown(record))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        console.print(f"\n[dim]Stopped at offset {position} of {log_path.name}[/dim]")
+
+
+@main.command()
+@click.argument("query")
+@click.option(
+    "--project", "-p",
+    type=click.Path(exists=True),
+    default=None,
+    help="Only search sessions of this project directory.",
+)
+@click.option(
+    "--session", "session_ref",
+    default=None,
+    help="Only search this session (ID or prefix).",
+)
+@click.option(
+    "--type", "-t", "event_type",
+    type=click.Choice(sorted(SEARCHABLE_FIELDS)),
+    default=None,
+    help="Only search prompts, output or errors.",
+)
+@click.option(
+    "--limit", "-n",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="Number of results.",
+)
+def search(
+    query: str,
+    project: Optional[str],
+    session_ref: Optional[str],
+    event_type: Optional[str],
+    limit: int,
+):
+    """
+    Search all transcripts.
+    
+    QUERY uses SQLite full-text syntax: words, "exact phrases", prefix*
+    and AND/OR/NOT. Logs of every project in the session registry (and the
+    current directory) are brought up to date first; only what was written
+    since the last search is read.
+    """
+    import sqlite3
+    
+    from rich.markup import escape
+    
+    from tempo.registry import SessionRegistry
+    from tempo.search import SearchIndex, event_logs
+    
+    index = SearchIndex()
+    projects = set(SessionRegistry().projects())
+    projects.add(str(Path(".").resolve()))
+    index.index_logs(log for project_dir in sorted(projects) for log in event_logs(Path(project_dir)))
+    
+    try:
+        results = index.search(
+            query,
+            project=str(Path(project).resolve()) if project else None,
+            session_id=session_ref,
+            event_type=event_type,
+            limit=limit,
+        )
+    except sqlite3.Error as e:
+        console.print(f"[red]Search failed: {e}[/red]")
+        sys.exit(1)
+    
+    if not results:
+        console.print("[dim]No matches.[/dim]")
+        return
+    
+    for result in results:
+        when = datetime.fromtimestamp(result["ts"]).strftime("%Y-%m-%d %H:%M")
+        prompt = f" · {result['prompt']}" if result["prompt"] else ""
+        console.print(
+            f"[bold]{result['session_id']}[/bold]{prompt} · {result['type']} · {when} "
+            f"[dim]{result['project']}[/dim]"
+        )
+        console.print(f"  {escape(result['snippet'])}")
+        console.print(
+            f"  [dim]tempo logs -d {result['project']} --session {result['session_id']} "
+            f"--offset {result['offset']}[/dim]"
+        )
+
+
+@main.command()
+@click.option(
+    "--days",
+    type=click.IntRange(min=1),
+    default=30,
+    show_default=True,
+    help="How far back to look.",
+)
+@click.option(
+    "--project", "-p",
+    type=click.Path(exists=True),
+    default=None,
+    help="Only show rate limits hit in this project directory.",
+)
+@click.option(
+    "--recent", "-n",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of recent rate limits to list.",
+)
+def limits(days: int, project: Optional[str], recent: int):
+    """
+    Summarize rate limit history.
+    
+    Shows how often limits were hit, how long they lasted, how many tokens
+    were spent before each one and at what times of day they happen, across
+    every tempo run on this machine and Claude account.
+    """
+    from rich.table import Table
+    
+    from tempo.history import HistoryStore, limit_duration
+    from tempo.scheduler import format_duration
+    
+    store = HistoryStore()
+    since = time.time() - days * 86400
+    events = store.events(since, project=str(Path(project).resolve()) if project else None)
+    
+    if not events:
+        console.print(f"[dim]No rate limits recorded in the last {days} days.[/dim]")
+        return
+    
+    waits = sorted(d for d in map(limit_duration, events) if d is not None)
+    tokens = sorted(event["tokens"] for event in events if event["tokens"])
+    
+    table = Table(title=f"Rate Limits (last {days} days)", show_header=False)
+    table.add_column("Field", style="bold")
+    table.add_column("Value")
+    table.add_row("Limits Hit", str(len(events)))
+    table.add_row("With Reset Time", str(sum(1 for event in events if event["reset_at"])))
+    if waits:
+        table.add_row("Median Wait", format_duration(waits[len(waits) // 2]))
+        table.add_row("Longest Wait", format_duration(waits[-1]))
+    if tokens:
+        table.add_row("Median Tokens Before Limit", f"{tokens[len(tokens) // 2]:,}")
+    prediction = store.predict_wait()
+    if prediction:
+        table.add_row(
+            "Unparsed Limit Prediction",
+            f"first probe after {format_duration(prediction.first_probe)}, "
+            f"give up after {format_duration(prediction.max_wait)}",
+        )
+    console.print(table)
+    
+    # When in the day limits are hit, to plan where jobs go
+    by_hour = [0] * 24
+    for event in events:
+        by_hour[datetime.fromtimestamp(event["detected_at"]).hour] += 1
+    peak = max(by_hour)
+    console.print("\n[bold]Limits by hour of day:[/bold]")
+    for hour, count in enumerate(by_hour):
+        if count:
+            bar = "█" * max(1, round(count / peak * 30))
+            console.print(f"  {hour:02d}:00  [yellow]{bar}[/yellow] {count}")
+    
+    if recent:
+        recent_table = Table(title="Recent")
+        recent_table.add_column("Detected")
+        recent_table.add_column("Project")
+        recent_table.add_column("Via")
+        recent_table.add_column("Lasted", justify="right")
+        recent_table.add_column("Tokens", justify="right")
+        for event in events[-recent:]:
+            lasted = limit_duration(event)
+            recent_table.add_row(
+                datetime.fromtimestamp(event["detected_at"]).strftime("%Y-%m-%d %H:%M"),
+                Path(event["project"]).name,
+                event["channel"] or "-",
+                format_duration(lasted) if lasted is not None else "-",
+                f"{event['tokens']:,}" if event["tokens"] else "-",
+            )
+        console.print()
+        console.print(recent_table)
+
+
+@main.group(invoke_without_command=True)
+@click.option(
+    "--concurrency", "-j",
+    type=click.IntRange(min=1),
+    default=DAEMON_CONCURRENCY,
+    show_default=True,
+    help="Maximum number of jobs running at the same time.",
+)
+@_claude_options
+@click.pass_context
+def daemon(
+    ctx: click.Context,
+    concurrency: int,
+    no_skip_permissions: bool,
+    completion_grace: float,
+    stall_timeout: float,
+    cycle_timeout: float,
+    verbose: bool,
+):
+    """
+    Run jobs in the background.
+    
+    Without a subcommand, starts the daemon in the foreground. It runs the
+    jobs submitted with tempo run --detach, at most --concurrency at a
+    time, sharing one rate limit state. The options here are the defaults
+    for every job; options given to tempo run --detach override them.
+    
+    \b
+    Examples:
+        tempo daemon -j 8
+        tempo run --file ./task.md --dir ./api --detach
+        tempo daemon list
+        tempo daemon attach 3
+    """
+    if ctx.invoked_subcommand is not None:
+        return
+    
+    import asyncio
+    
+    from tempo.daemon import DaemonError, TempoDaemon
+    
+    server = TempoDaemon(
+        concurrency=concurrency,
+        options={
+            "skip_permissions": not no_skip_permissions,
+            "verbose": verbose,
+            "completion_grace": completion_grace,
+            "stall_timeout": stall_timeout,
+            "cycle_timeout": cycle_timeout,
+        },
+    )
+    try:
+        asyncio.run(server.serve())
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+
+
+@daemon.command("list")
+def daemon_list():
+    """List the daemon's queued, running and finished jobs."""
+    from rich.table import Table
+    
+    from tempo.daemon import DaemonError, request
+    
+    try:
+        jobs = request({"op": "list"})["jobs"]
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+    
+    if not jobs:
+        console.print("[dim]No jobs.[/dim]")
+        return
+    
+    table = Table(title="Daemon Jobs")
+    table.add_column("Job", justify="right")
+    table.add_column("Status")
+    table.add_column("Project")
+    table.add_column("Task")
+    table.add_column("Session")
+    table.add_column("Submitted")
+    for job in jobs:
+        table.add_row(
+            str(job["id"]),
+            _format_status(job["status"]),
+            job["project_dir"],
+            job["task"] or "-",
+            job["session_id"] or "-",
+            datetime.fromtimestamp(job["submitted_at"]).strftime("%Y-%m-%d %H:%M"),
+        )
+    console.print(table)
+
+
+@daemon.command("attach")
+@click.argument("job", type=int)
+@click.option(
+    "--json", "as_json",
+    is_flag=True,
+    help="Print raw event records instead of text.",
+)
+def daemon_attach(job: int, as_json: bool):
+    """
+    Follow a job's output until it ends.
+    
+    Starts with the job's latest events. Ctrl-C detaches; the job keeps
+    running.
+    """
+    import json
+    
+    from tempo.daemon import DaemonError, attach
+    
+    try:
+        for record in attach(job):
+            if as_json:
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            elif record.get("event") == "delta":
+                sys.stdout.write(record.get("text", ""))
+            elif record.get("event") == "job_end":
+                console.print(f"\n[bold]Job {job} {_format_status(record.get('status', ''))}[/bold]")
+            else:
+                details = ", ".join(
+                    f"{key}={value}" for key, value in record.items()
+                    if key not in ("event", "ts", "session", "label")
+                )
+                console.print(f"\n[dim]{record.get('event')}{': ' + details if details else ''}[/dim]")
+            sys.stdout.flush()
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        console.print(f"\n[dim]Detached; job {job} keeps running.[/dim]")
+
+
+@daemon.command("cancel")
+@click.argument("job", type=int)
+def daemon_cancel(job: int):
+    """Cancel a queued or running job."""
+    from tempo.daemon import DaemonError, request
+    
+    try:
+        request({"op": "cancel", "job": job})
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+    console.print(f"[green]Cancelled job {job}.[/green]")
+
+
+@daemon.command("stop")
+def daemon_stop():
+    """Cancel every job and stop the daemon."""
+    from tempo.daemon import DaemonError, request
+    
+    try:
+        request({"op": "stop"})
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+    console.print("[green]Daemon stopping.[/green]")
+
+
+@main.command()
+@click.option(
+    "--dir", "-d",
+    type=click.Path(exists=True),
+    default=".",
+    help="Project directory. Defaults to current directory.",
+)
+def wake(dir: str):
+    """
+    End a rate limit wait early.
+    
+    Use this when the limit is back before the announced reset time. The
+    waiting tempo (and any parallel steps of its sequence) continues now.
+    """
+    from tempo.quota import QuotaCoordinator
+    from tempo.scheduler import send_wake
+    
+    project_dir = Path(dir).resolve()
+    
+    # The limit is back for every process on this account
+    QuotaCoordinator().clear()
+    
+    if send_wake(project_dir / SESSION_DIR):
+        console.print("[green]Woke the waiting session.[/green]")
+    else:
+        console.print(
+            "[dim]No session is listening; one that is waiting will notice "
+            "the wake file shortly.[/dim]"
+        )
 
 
 @main.command()
@@ -249,6 +1243,8 @@ def clear(dir: str):
     
     Removes session state, allowing you to start fresh.
     """
+    from tempo.session import SessionManager
+    
     project_dir = Path(dir).resolve()
     session_manager = SessionManager(str(project_dir))
     
@@ -259,33 +1255,147 @@ def clear(dir: str):
         console.print("[dim]No session to clear.[/dim]")
 
 
+def _submit_detached(
+    project_dir: Path,
+    prompt: Optional[str] = None,
+    prompts: Optional[list] = None,
+    force: bool = False,
+) -> None:
+    """Submit a run to tempo daemon and print its job id."""
+    from click.core import ParameterSource
+    
+    from tempo.daemon import JOB_OPTIONS, DaemonError, request
+    
+    # Options left at their defaults come from the daemon
+    ctx = click.get_current_context()
+    options = {
+        name: ctx.params[name]
+        for name in JOB_OPTIONS
+        if name in ctx.params and ctx.get_parameter_source(name) != ParameterSource.DEFAULT
+    }
+    if ctx.params.get("no_skip_permissions"):
+        options["skip_permissions"] = False
+    
+    message: Dict[str, Any] = {"op": "submit", "project_dir": str(project_dir), "force": force, "options": options}
+    if prompts:
+        message["prompts"] = [{"name": p.name, "prompt": p.prompt, "depends_on": p.depends_on} for p in prompts]
+    else:
+        message["prompt"] = prompt
+    
+    try:
+        job = request(message)["job"]
+    except DaemonError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+    
+    console.print(f"[green]Submitted job {job['id']}[/green] for {job['project_dir']}")
+    console.print(f"[dim]Follow it with: tempo daemon attach {job['id']}[/dim]")
+
+
+def _print_session_rows(rows: List[Dict[str, Any]], title: str) -> None:
+    """Print sessions from the registry as a table."""
+    from rich.table import Table
+    
+    table = Table(title=title)
+    table.add_column("Session")
+    table.add_column("Status")
+    table.add_column("Project")
+    table.add_column("Prompt")
+    table.add_column("Cycles", justify="right")
+    table.add_column("Cost", justify="right")
+    table.add_column("Updated")
+    for row in rows:
+        prompts = f" ({row['prompts_done']}/{row['prompts_total']})" if row["prompts_total"] else ""
+        table.add_row(
+            row["session_id"],
+            _format_status(row["status"]) + (" [dim](archived)[/dim]" if row["archived"] else ""),
+            row["project"],
+            (row["current_prompt"] or "-") + prompts,
+            str(row["cycle_count"]),
+            f"${row['cost_usd']:.2f}",
+            (row["updated_at"] or "")[:16].replace("T", " "),
+        )
+    console.print(table)
+
+
+def _format_cache_hits(session: "Session") -> str:
+    """Describe the prompt cache hit rate overall and for continuation runs."""
+    from tempo.session import Usage
+    
+    text = f"{session.usage.cache_hit_rate:.0%} of input tokens"
+    
+    continued = Usage()
+    for entry in session.cycle_usage:
+        if entry.continuation:
+            continued.add(entry.usage)
+    if continued.cache_hit_rate is not None:
+        text += f", {continued.cache_hit_rate:.0%} in continued runs"
+    return text
+
+
 def _format_status(status: str) -> str:
     """Format status with color."""
     colors = {
         "pending": "dim",
+        "queued": "dim",
         "running": "blue",
         "rate_limited": "yellow",
+        "stalled": "yellow",
+        "over_budget": "red",
         "completed": "green",
         "failed": "red",
         "uncertain": "yellow",
+        "cancelled": "dim",
     }
     color = colors.get(status, "white")
     return f"[{color}]{status}[/{color}]"
 
 
+def _make_emitter(output: str, output_fd: int, deltas: bool) -> Optional["JsonlEmitter"]:
+    """Create the event emitter for --output jsonl, or None for rich output."""
+    from tempo.events import JsonlEmitter
+    
+    if output != "jsonl":
+        return None
+    
+    # Keep the event stream clean: any remaining messages go to stderr
+    console.file = sys.stderr
+    return JsonlEmitter(fd=output_fd, deltas=deltas)
+
+
+def _validate_patterns(patterns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Check that each user-supplied pattern is a valid regex."""
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise click.BadParameter(f"{pattern!r}: {e}", param_hint="--rate-limit-pattern")
+    return patterns
+
+
 def _load_sequence(path: str) -> list:
     """Load a sequence of prompts from a YAML file."""
+    import yaml
+    
+    from tempo.session import PromptItem, validate_dependencies
+    
     try:
         with open(path, "r") as f:
             data = yaml.safe_load(f)
         
         prompts = []
         for item in data.get("prompts", []):
+            depends_on = item.get("depends_on") or []
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            
             prompts.append(PromptItem(
                 name=item.get("name", f"Step {len(prompts) + 1}"),
                 prompt=item["prompt"],
+                depends_on=[str(dep) for dep in depends_on],
             ))
         
+        validate_dependencies(prompts)
         return prompts
         
     except Exception as e:
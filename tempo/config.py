@@ -4,6 +4,19 @@
 # This is injected via --append-system-prompt
 COMPLETION_CODE = "<<<TEMPO_TASK_COMPLETE_7x9k2m>>>"
 
+# Seconds to let Claude finish trailing output after the completion code
+# is seen before the child process is terminated
+COMPLETION_GRACE_SECONDS = 30
+
+# Default number of projects `tempo run-many` runs at the same time
+RUN_MANY_CONCURRENCY = 4
+
+# Default number of independent sequence steps run in parallel
+DAG_CONCURRENCY = 4
+
+# Frames per second when rendering streamed Claude output to a terminal
+RENDER_FPS = 20
+
 # Patterns to detect rate limiting
 RATE_LIMIT_PATTERNS = [
     r"Limit reached",
@@ -15,6 +28,29 @@ RATE_LIMIT_PATTERNS = [
     r"spending cap",
 ]
 
+# Confidence assigned to a rate limit signal, by where it was found.
+# Structured fields (error types, system subtypes) are trusted fully; regex
+# matches are only applied to channels that carry CLI/API errors, never to
+# text written by the model.
+RATE_LIMIT_CONFIDENCE = {
+    "structured": 1.0,
+    "result_error": 0.9,
+    "synthetic": 0.9,
+    "error": 0.8,
+    "plain": 0.7,
+    "system": 0.6,
+}
+
+# Minimum confidence needed to treat a run as rate limited
+RATE_LIMIT_MIN_CONFIDENCE = 0.6
+
+# Structured error types / system subtypes that mean "rate limited"
+RATE_LIMIT_ERROR_TYPES = ("rate_limit_error", "rate_limit", "rate_limited")
+
+# Characters of previous output kept when matching rate limit patterns
+# across streamed chunks
+RATE_LIMIT_MATCH_WINDOW = 256
+
 # Patterns to extract reset time from Claude's message
 # Format 1: "resets 4am (America/Toronto)" - with timezone
 # Format 2: "resets 4am" - without timezone (uses local)
@@ -24,7 +60,119 @@ RESET_TIME_PATTERN_NO_TZ = r"resets\s+(\d{1,2}(?::\d{2})?(?:am|pm)?)"
 # Buffer time (seconds) to add after reset time before retrying
 RESET_BUFFER_SECONDS = 60
 
+# Where the wall clock can't be watched (no timerfd, so outside Linux), the
+# longest stretch (seconds) a wait sleeps before re-checking it. Bounds how
+# late tempo notices a passed reset after a suspend or clock jump there.
+WAIT_RECONCILE_SECONDS = 5
+
+# Adaptive probing when a rate limit's reset time can't be parsed: wait,
+# send a minimal prompt to see if the limit has lifted, and back off
+# exponentially between probes. At most PROBE_MAX_PER_WINDOW probes are
+# spent per rate limit; after that tempo waits out the fallback window.
+PROBE_INITIAL_DELAY_SECONDS = 15 * 60
+PROBE_BACKOFF = 2.0
+PROBE_MAX_DELAY_SECONDS = 60 * 60
+PROBE_MAX_PER_WINDOW = 6
+PROBE_TIMEOUT_SECONDS = 120
+PROBE_PROMPT = "Reply with only the word OK."
+
+# Characters of the original task quoted in a continuation prompt. The task
+# itself is already in the --continue conversation, so only a short
+# reference is resent after a rate limit.
+CONTINUATION_EXCERPT_CHARS = 160
+
+# Machine-wide rate limit state shared by tempo processes on one account,
+# kept in ~/.tempo (or $TEMPO_HOME). Processes that learn about a limit from
+# another process wake this many seconds apart after the reset.
+QUOTA_STATE_FILE = "quota.json"
+QUOTA_STAGGER_SECONDS = 10
+QUOTA_MAX_STAGGER_SLOTS = 12
+
+# Rate limit history (SQLite, next to the shared quota state). Once enough
+# limits with a known duration are recorded, unparsed limits are predicted
+# from them: the first probe goes out at HISTORY_FIRST_PROBE_QUANTILE of the
+# observed waits, and waiting stops at HISTORY_MAX_WAIT_QUANTILE.
+HISTORY_DB = "history.db"
+HISTORY_MIN_SAMPLES = 3
+HISTORY_FIRST_PROBE_QUANTILE = 0.25
+HISTORY_MAX_WAIT_QUANTILE = 0.95
+
+# Per-user index of sessions across projects (SQLite, in ~/.tempo)
+REGISTRY_DB = "sessions.db"
+
+# Full-text index of every event log (SQLite FTS5, in ~/.tempo)
+SEARCH_DB = "search.db"
+
+# Event log record types whose text is searchable, and the field holding it
+SEARCHABLE_FIELDS = {
+    "prompt": "text",
+    "output": "text",
+    "error": "message",
+}
+
+# `tempo daemon`: its socket (in ~/.tempo), how many jobs run at once, how
+# many of a job's latest events `attach` replays, and how many finished
+# jobs are still listed
+DAEMON_SOCKET = "daemon.sock"
+DAEMON_CONCURRENCY = 4
+DAEMON_REPLAY_EVENTS = 1000
+DAEMON_FINISHED_JOBS = 100
+
+# Files in SESSION_DIR that end a rate limit wait early (see `tempo wake`)
+WAKE_FILE = "wake"
+WAKE_SOCKET = "wake.sock"
+
 # Session file location (relative to project directory)
 SESSION_DIR = ".tempo"
 SESSION_FILE = "session.json"
+
+# Session changes are appended to SESSION_JOURNAL_FILE and fsynced at most
+# every JOURNAL_FSYNC_SECONDS; after JOURNAL_COMPACT_RECORDS appends the
+# journal is folded into a fresh SESSION_FILE snapshot
+SESSION_JOURNAL_FILE = "session.journal"
+JOURNAL_FSYNC_SECONDS = 1.0
+JOURNAL_COMPACT_RECORDS = 256
 TRANSCRIPT_DIR = "transcripts"
+
+# Transcript writes are buffered and flushed every TRANSCRIPT_FLUSH_SECONDS
+# or TRANSCRIPT_FLUSH_CHARS, whichever comes first, and fsynced at cycle
+# boundaries. Past TRANSCRIPT_ROTATE_CHARS characters the markdown
+# transcript, and past EVENTLOG_ROTATE_BYTES bytes its event log, is
+# rotated and the finished segment gzipped.
+TRANSCRIPT_FLUSH_SECONDS = 2.0
+TRANSCRIPT_FLUSH_CHARS = 64 * 1024
+TRANSCRIPT_ROTATE_CHARS = 64 * 1024 * 1024
+EVENTLOG_ROTATE_BYTES = 64 * 1024 * 1024
+
+# Snapshots of earlier sessions in this project, inside SESSION_DIR
+SESSION_ARCHIVE_DIR = "sessions"
+
+# Git worktrees for parallel (depends_on) sequence steps, inside SESSION_DIR
+WORKTREE_DIR = "worktrees"
+
+# Output buffer: characters kept in memory before older output spills to disk
+OUTPUT_BUFFER_MEMORY_CHARS = 1_000_000
+
+# Longest single stream-json line (bytes) accepted from the Claude CLI.
+# Tool results can embed whole files, so this is deliberately generous.
+STREAM_LINE_LIMIT = 256 * 1024 * 1024
+
+# Read size (characters) when streaming buffered output back from disk
+OUTPUT_BUFFER_READ_CHARS = 64 * 1024
+
+# Characters of recent output scanned when parsing a rate limit reset time
+RESET_SCAN_CHARS = 4000
+
+# Stall watchdog: seconds without any output from Claude before the process
+# is treated as hung (0 disables). Long tool calls such as test suites can
+# legitimately be silent for a while, so keep this generous.
+STALL_TIMEOUT_SECONDS = 15 * 60
+
+# Hard wall-clock limit for a single Claude process (0 disables)
+CYCLE_TIMEOUT_SECONDS = 6 * 60 * 60
+
+# Consecutive stalls tolerated before the session is given up on
+MAX_CONSECUTIVE_STALLS = 3
+
+# Seconds a stopped process group gets to exit after SIGTERM before SIGKILL
+KILL_GRACE_SECONDS = 10
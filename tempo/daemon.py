@@ -0,0 +1,471 @@
+"""Long-lived job server that runs tempo sessions submitted over a Unix socket."""
+
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional
+
+from tempo.config import DAEMON_CONCURRENCY, DAEMON_FINISHED_JOBS, DAEMON_REPLAY_EVENTS, DAEMON_SOCKET
+from tempo.quota import tempo_home
+
+if TYPE_CHECKING:
+    from tempo.runner import TempoRunner
+
+# Job options a client may set; anything not given comes from the options
+# the daemon was started with
+_RUNNER_OPTIONS = (
+    "skip_permissions",
+    "verbose",
+    "completion_grace",
+    "stall_timeout",
+    "cycle_timeout",
+    "rate_limit_patterns",
+    "concurrency",
+)
+_BUDGET_OPTIONS = ("max_tokens", "max_cost", "max_prompt_tokens", "max_prompt_cost")
+JOB_OPTIONS = _RUNNER_OPTIONS + _BUDGET_OPTIONS
+
+# Longest request line (prompts are sent inline)
+_MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+# Unsent output an attached client may fall behind by before it is dropped
+_MAX_ATTACH_BACKLOG = 4 * 1024 * 1024
+
+
+class DaemonError(Exception):
+    """The daemon isn't running, or it rejected a request."""
+
+
+def default_socket_path() -> Path:
+    """Get the daemon's socket: ~/.tempo/daemon.sock."""
+    return tempo_home() / DAEMON_SOCKET
+
+
+def runner_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn job options into TempoRunner keyword arguments."""
+    from tempo.session import Budget
+    
+    kwargs = {key: options[key] for key in _RUNNER_OPTIONS if key in options}
+    kwargs["prompt_budget"] = Budget(options.get("max_prompt_tokens"), options.get("max_prompt_cost"))
+    kwargs["session_budget"] = Budget(options.get("max_tokens"), options.get("max_cost"))
+    return kwargs
+
+
+class Job:
+    """
+    A session submitted to the daemon.
+    
+    Also the stream its runner's JsonlEmitter writes to: each event line is
+    kept (the latest DAEMON_REPLAY_EVENTS of them) and sent on to every
+    attached client.
+    """
+    
+    def __init__(self, job_id: int, project_dir: str, request: Dict[str, Any]):
+        self.id = job_id
+        self.project_dir = project_dir
+        self.prompt: Optional[str] = request.get("prompt")
+        self.prompts: Optional[List[Dict[str, Any]]] = request.get("prompts")
+        self.resume = bool(request.get("resume"))
+        self.force = bool(request.get("force"))
+        self.options: Dict[str, Any] = request.get("options") or {}
+        
+        # queued, running, then completed, cancelled or the session's
+        # final status (failed, over_budget, ...)
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+        
+        self.runner: Optional["TempoRunner"] = None
+        self.task: Optional[asyncio.Task] = None
+        self.events: Deque[str] = deque(maxlen=DAEMON_REPLAY_EVENTS)
+        self.watchers: List[asyncio.StreamWriter] = []
+    
+    @property
+    def active(self) -> bool:
+        """Whether the job is queued or running."""
+        return self.status in ("queued", "running")
+    
+    def write(self, text: str) -> None:
+        """Take one event line from the runner's emitter."""
+        self.publish(text.rstrip("\n"))
+    
+    def flush(self) -> None:
+        """Lines are passed on as they are written."""
+    
+    def publish(self, line: str) -> None:
+        """Keep an event line and send it to attached clients."""
+        self.events.append(line)
+        data = (line + "\n").encode("utf-8")
+        for writer in list(self.watchers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > _MAX_ATTACH_BACKLOG:
+                # Gone, or not reading: drop it rather than buffer without bound
+                self.watchers.remove(writer)
+                writer.close()
+            else:
+                writer.write(data)
+    
+    def describe(self) -> Dict[str, Any]:
+        """Summarize the job for clients."""
+        if self.prompts:
+            task = f"{len(self.prompts)} prompts"
+        elif self.resume:
+            task = "resume"
+        else:
+            lines = (self.prompt or "").strip().splitlines()
+            task = lines[0][:80] if lines else ""
+        session = self.runner.session if self.runner else None
+        return {
+            "id": self.id,
+            "status": self.status,
+            "project_dir": self.project_dir,
+            "task": task,
+            "session_id": session.session_id if session else None,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class TempoDaemon:
+    """
+    Runs tempo sessions for clients of a Unix socket.
+    
+    Like `tempo run-many`, every job runs on one event loop in one process,
+    so the runner is imported and the configuration loaded once, and all
+    jobs share the WaitScheduler and the rate limit state: when one job
+    hits the limit, the others wait for the shared reset instead of
+    starting Claude. At most `concurrency` jobs run at a time; the rest
+    queue in submission order. Each project directory runs one job at a
+    time, since the session lives there.
+    
+    Requests are one JSON object per line:
+        
+        {"op": "submit", "project_dir": ..., "prompt": ...}
+            (or "prompts": [{"name", "prompt", "depends_on"}], or
+            "resume": true; plus "force" and "options", see JOB_OPTIONS)
+        {"op": "list"}
+        {"op": "cancel", "job": N}
+        {"op": "attach", "job": N}
+        {"op": "stop"}
+    
+    Each gets one JSON reply line with "ok" (and "error" if it is False).
+    After its reply, attach streams the job's JSONL events, starting with
+    the latest DAEMON_REPLAY_EVENTS, until a final job_end event.
+    """
+    
+    def __init__(
+        self,
+        socket_path: Optional[Path] = None,
+        concurrency: int = DAEMON_CONCURRENCY,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.concurrency = concurrency
+        
+        # Defaults for every job's options
+        self.options = options or {}
+        
+        self.jobs: Dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._quota = None
+        self._history = None
+    
+    async def serve(self) -> None:
+        """Accept requests until stop() is called or SIGINT/SIGTERM arrive."""
+        # Warm the imports every job needs
+        from tempo.history import HistoryStore
+        from tempo.quota import QuotaCoordinator
+        from tempo.runner import TempoRunner  # noqa: F401
+        
+        if _listening(self.socket_path):
+            raise DaemonError(f"tempo daemon is already running on {self.socket_path}")
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        
+        self._quota = QuotaCoordinator()
+        self._history = HistoryStore()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._stopped = asyncio.Event()
+        
+        server = await asyncio.start_unix_server(
+            self._handle, path=str(self.socket_path), limit=_MAX_REQUEST_BYTES
+        )
+        os.chmod(self.socket_path, 0o600)
+        
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+        
+        self._log(f"listening on {self.socket_path} ({self.concurrency} jobs at a time)")
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+            
+            active = [job for job in self.jobs.values() if job.active]
+            for job in active:
+                self.cancel(job.id)
+            if active:
+                await asyncio.wait([job.task for job in active])
+            
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            self._log("stopped")
+    
+    def stop(self) -> None:
+        """Cancel every job and stop serving."""
+        if self._stopped is not None:
+            self._stopped.set()
+    
+    def submit(self, request: Dict[str, Any]) -> Job:
+        """Queue a session to run."""
+        project_dir = Path(request["project_dir"]).resolve()
+        if not project_dir.is_dir():
+            raise DaemonError(f"Not a directory: {project_dir}")
+        if not (request.get("prompt") or request.get("prompts") or request.get("resume")):
+            raise DaemonError("Nothing to run: give a prompt, prompts or resume")
+        
+        busy = next(
+            (job for job in self.jobs.values() if job.active and job.project_dir == str(project_dir)),
+            None,
+        )
+        if busy:
+            raise DaemonError(f"Job {busy.id} is already {busy.status} in {project_dir}")
+        
+        job = Job(next(self._ids), str(project_dir), request)
+        self.jobs[job.id] = job
+        job.task = asyncio.ensure_future(self._run(job))
+        self._log(f"job {job.id} queued for {project_dir}")
+        self._forget_finished()
+        return job
+    
+    def cancel(self, job_id: int) -> Job:
+        """Stop a job, or take it out of the queue."""
+        job = self._job(job_id)
+        if not job.active:
+            return job
+        
+        job.cancelled = True
+        if job.runner is not None:
+            job.runner.cancel()
+        else:
+            job.task.cancel()
+        return job
+    
+    async def _run(self, job: Job) -> None:
+        """Run a job once a slot is free."""
+        success = False
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                self._log(f"job {job.id} running in {job.project_dir}")
+                
+                job.runner = self._make_runner(job)
+                if job.prompts:
+                    success = await job.runner.run_sequence_async(_prompt_items(job.prompts))
+                else:
+                    success = await job.runner.run_async(prompt=job.prompt, resume=job.resume)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            job.publish(json.dumps({"event": "error", "ts": round(time.time(), 3), "message": str(e)}))
+        finally:
+            self._finish(job, success)
+    
+    def _make_runner(self, job: Job) -> "TempoRunner":
+        """Create a job's runner, sharing the daemon's rate limit state."""
+        from tempo.events import JsonlEmitter
+        from tempo.runner import TempoRunner
+        
+        options = {**self.options, **{k: v for k, v in job.options.items() if k in JOB_OPTIONS}}
+        runner = TempoRunner(
+            job.project_dir,
+            emitter=JsonlEmitter(deltas=True, stream=job),
+            quota=self._quota,
+            history=self._history,
+            **runner_options(options),
+        )
+        if job.force:
+            runner.session_manager.delete()
+        return runner
+    
+    def _finish(self, job: Job, success: bool) -> None:
+        """Record how a job ended and let attached clients go."""
+        session = job.runner.session if job.runner else None
+        if success:
+            job.status = "completed"
+        elif job.cancelled:
+            job.status = "cancelled"
+        elif session and session.status not in ("pending", "running", "completed"):
+            job.status = session.status
+        else:
+            job.status = "failed"
+        job.finished_at = time.time()
+        
+        job.publish(json.dumps({"event": "job_end", "ts": round(job.finished_at, 3), **job.describe()}))
+        job.watchers.clear()
+        self._log(f"job {job.id} {job.status}")
+    
+    def _forget_finished(self) -> None:
+        """Keep only the latest DAEMON_FINISHED_JOBS finished jobs."""
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - DAEMON_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+    
+    def _job(self, job_id: Any) -> Job:
+        """Look up a job by id."""
+        try:
+            return self.jobs[int(job_id)]
+        except (KeyError, TypeError, ValueError):
+            raise DaemonError(f"No job {job_id}")
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection: a request, then its reply."""
+        try:
+            try:
+                request = json.loads(await reader.readline())
+                op = request["op"]
+                if op == "attach":
+                    await self._attach(self._job(request.get("job")), writer)
+                    return
+                reply = self._dispatch(op, request)
+            except DaemonError as e:
+                reply = {"ok": False, "error": str(e)}
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"ok": False, "error": f"Bad request: {e}"}
+            
+            writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    def _dispatch(self, op: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Carry out a request other than attach."""
+        if op == "submit":
+            return {"ok": True, "job": self.submit(request).describe()}
+        if op == "list":
+            return {"ok": True, "jobs": [job.describe() for job in self.jobs.values()]}
+        if op == "cancel":
+            return {"ok": True, "job": self.cancel(request.get("job")).describe()}
+        if op == "stop":
+            self.stop()
+            return {"ok": True}
+        raise DaemonError(f"Unknown op {op!r}")
+    
+    async def _attach(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        """Stream a job's events to a client until the job ends."""
+        writer.write(json.dumps({"ok": True, "job": job.describe()}).encode("utf-8") + b"\n")
+        writer.writelines((line + "\n").encode("utf-8") for line in job.events)
+        if job.active:
+            job.watchers.append(writer)
+            await asyncio.wait([job.task])
+        await writer.drain()
+    
+    def _log(self, message: str) -> None:
+        """Print a line to the daemon's own output."""
+        print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {message}", flush=True)
+
+
+def _prompt_items(prompts: List[Dict[str, Any]]) -> list:
+    """Turn submitted prompts back into validated PromptItems."""
+    from tempo.session import PromptItem, validate_dependencies
+    
+    items = [
+        PromptItem(
+            name=str(p.get("name") or f"Step {i + 1}"),
+            prompt=p["prompt"],
+            depends_on=[str(dep) for dep in p.get("depends_on") or []],
+        )
+        for i, p in enumerate(prompts)
+    ]
+    validate_dependencies(items)
+    return items
+
+
+def _listening(path: Path) -> bool:
+    """Whether a daemon is accepting connections on a socket path."""
+    if not path.exists() or not hasattr(socket, "AF_UNIX"):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+
+
+def _connect(socket_path: Optional[Path]) -> socket.socket:
+    """Open a connection to the daemon."""
+    path = Path(socket_path) if socket_path else default_socket_path()
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("tempo daemon needs Unix domain sockets")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        raise DaemonError(f"tempo daemon is not running (no socket at {path}); start it with `tempo daemon`")
+    return sock
+
+
+def request(message: Dict[str, Any], socket_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Send one request to the daemon.
+    
+    Returns:
+        The reply
+    
+    Raises:
+        DaemonError: The daemon isn't running or refused the request
+    """
+    with _connect(socket_path) as sock:
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    reply = json.loads(line) if line else {"ok": False, "error": "No reply from tempo daemon"}
+    if not reply.get("ok"):
+        raise DaemonError(reply.get("error", "Request failed"))
+    return reply
+
+
+def attach(job_id: int, socket_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a job's events from the daemon, from its latest kept ones on.
+    
+    Yields:
+        Event records, ending with job_end
+    
+    Raises:
+        DaemonError: The daemon isn't running or has no such job
+    """
+    with _connect(socket_path) as sock:
+        sock.sendall(json.dumps({"op": "attach", "job": job_id}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+            reply = json.loads(line) if line else {"ok": False, "error": "No reply from tempo daemon"}
+            if not reply.get("ok"):
+                raise DaemonError(reply.get("error", "Request failed"))
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
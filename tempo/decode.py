@@ -0,0 +1,71 @@
+"""Lazy, selective decoding of Claude's stream-json output."""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The CLI writes the event type as the first key of every event, so it can
+# be read from the start of the raw line without parsing the rest
+_TYPE_PREFIX = re.compile(rb'\s*\{\s*"type"\s*:\s*"([A-Za-z0-9_.-]{1,64})"')
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON with orjson when it is installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def peek_type(line: bytes) -> Optional[str]:
+    """Read the top-level event type of a raw stream-json line, if it leads."""
+    match = _TYPE_PREFIX.match(line)
+    if match:
+        return match.group(1).decode("ascii")
+    return None
+
+
+class EventDecoder:
+    """
+    Decodes only the stream-json events someone has subscribed to.
+    
+    Most of the stream by volume is tool_use/tool_result traffic (whole
+    files read or written by tools) that tempo never inspects. The event
+    type is peeked from the raw bytes first and unsubscribed events are
+    skipped without being decoded at all. Lines whose type can't be peeked
+    are fully decoded, so nothing subscribed is ever missed.
+    """
+    
+    def __init__(self, types: Iterable[str] = ()):
+        self.types = set(types)
+    
+    def subscribe(self, *types: str) -> None:
+        """Also decode events of these types."""
+        self.types.update(types)
+    
+    def decode(self, line: bytes) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Decode one raw line.
+        
+        Returns:
+            (event_type, event) - event is None if the type isn't subscribed
+        
+        Raises:
+            ValueError: If the line is not a JSON object (plain CLI output)
+        """
+        event_type = peek_type(line)
+        if event_type is not None and event_type not in self.types:
+            return event_type, None
+        
+        event = loads(line)
+        if not isinstance(event, dict):
+            raise ValueError("stream-json line is not an object")
+        
+        event_type = event.get("type", "")
+        if event_type not in self.types:
+            return event_type, None
+        return event_type, event
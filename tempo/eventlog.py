@@ -0,0 +1,357 @@
+"""Structured, seekable event log of a tempo session."""
+
+import gzip
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from tempo.config import EVENTLOG_ROTATE_BYTES
+
+# One index entry: byte offset, cycle, prompt index, timestamp
+_INDEX_ENTRY = struct.Struct("<qiid")
+
+INDEX_SUFFIX = ".idx"
+
+# First record of every part of a log after the first, holding the offset
+# of the part's first byte in the log as a whole
+CONTINUED_EVENT = "log_continued"
+
+
+class EventLog:
+    """
+    Appends session events to a JSONL file, with an offset index.
+    
+    Every record has a sequence number, a type, the rate limit cycle and
+    prompt it belongs to, and a timestamp taken from the monotonic clock
+    (anchored to the wall clock when the log was opened, so it never goes
+    backwards even if the system clock is changed).
+    
+    Whenever the cycle or prompt changes, a fixed-size entry with the
+    record's byte offset is appended to <log>.idx. Cycles and prompts only
+    move forward in a run, so EventIndex can binary search the index to
+    seek straight to either.
+    
+    Like the markdown transcript, the log is rotated at the next entry once
+    it passes `rotate_bytes`: the finished part is gzipped to
+    <name>.<n>.jsonl.gz and a new log file, starting with a CONTINUED_EVENT
+    record, takes its place. Offsets count from the start of the whole log,
+    so the index, the search index and `tempo logs --offset` stay valid
+    across parts; read_lines and read_events read them back.
+    """
+    
+    def __init__(self, path: Path, rotate_bytes: int = EVENTLOG_ROTATE_BYTES):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.rotate_bytes = rotate_bytes
+        
+        self._file: Optional[IO[bytes]] = open(self.path, "ab")
+        self._index: Optional[IO[bytes]] = open(self.index_path, "ab")
+        self._segment = len(log_parts(self.path))
+        self._base = part_base(self.path)
+        self._offset = self._base + self._file.tell()
+        self._seq = 0
+        self._position: Optional[Tuple[int, int]] = None
+        
+        self._wall_start = time.time()
+        self._mono_start = time.monotonic()
+        self._last_ts = 0.0
+    
+    def append(
+        self,
+        event_type: str,
+        cycle: int = 0,
+        prompt: str = "",
+        prompt_index: int = -1,
+        **fields: Any,
+    ) -> Dict[str, Any]:
+        """
+        Append one event.
+        
+        Returns:
+            The record as written
+        """
+        # Rotated at the next entry, so nothing follows a log's session_end
+        if event_type != CONTINUED_EVENT and self.rotate_bytes and self._offset - self._base >= self.rotate_bytes:
+            self._rotate(cycle, prompt, prompt_index)
+        
+        ts = max(self._last_ts, self._wall_start + time.monotonic() - self._mono_start)
+        self._last_ts = ts
+        self._seq += 1
+        record = {
+            "seq": self._seq,
+            "ts": round(ts, 6),
+            "type": event_type,
+            "cycle": cycle,
+            "prompt": prompt,
+            "prompt_index": prompt_index,
+            **fields,
+        }
+        
+        if self._position != (cycle, prompt_index):
+            self._position = (cycle, prompt_index)
+            self._index.write(_INDEX_ENTRY.pack(self._offset, cycle, prompt_index, ts))
+        
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        self._file.write(line)
+        self._offset += len(line)
+        return record
+    
+    def _rotate(self, cycle: int, prompt: str, prompt_index: int) -> None:
+        """Compress the current part and continue in a fresh log file."""
+        self.sync()
+        segment = segment_path(self.path, self._segment)
+        pending = segment.with_name(segment.name + ".tmp")
+        with open(self.path, "rb") as src, gzip.open(pending, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(pending, segment)
+        
+        # The next part is started under another name and swapped in whole,
+        # so readers never see the log file empty or half rewritten. Neither
+        # file may be open while it is replaced (Windows refuses), so the
+        # log is reopened afterwards.
+        fresh = self.path.with_name(self.path.name + ".tmp")
+        self._file.close()
+        self._file = open(fresh, "wb")
+        self._segment += 1
+        self._base = self._offset
+        self.append(CONTINUED_EVENT, cycle, prompt, prompt_index, part=self._segment, offset=self._base)
+        self._file.close()
+        os.replace(fresh, self.path)
+        self._file = open(self.path, "ab")
+    
+    def flush(self) -> None:
+        """Hand buffered records to the OS."""
+        if self._file is not None:
+            self._file.flush()
+            self._index.flush()
+    
+    def sync(self) -> None:
+        """Flush and fsync the log and its index."""
+        self.flush()
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            os.fsync(self._index.fileno())
+    
+    def close(self) -> None:
+        """Sync and close the log."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._index.close()
+            self._file = None
+            self._index = None
+
+
+class EventIndex:
+    """
+    Read access to an event log's offset index.
+    
+    The index file is memory-mapped and binary searched in place, so
+    finding a cycle or prompt costs O(log n) regardless of how large the
+    log is.
+    """
+    
+    def __init__(self, log_path: Path):
+        self.path = Path(log_path).with_name(Path(log_path).name + INDEX_SUFFIX)
+    
+    def _entries(self) -> Optional[mmap.mmap]:
+        """Map the index, or None if it is missing or empty."""
+        try:
+            with open(self.path, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+    
+    def seek(self, cycle: Optional[int] = None, prompt_index: Optional[int] = None) -> Optional[int]:
+        """
+        Find the byte offset of the first event of a cycle or prompt.
+        
+        Returns:
+            Offset into the log, or None if no such cycle or prompt was logged
+        """
+        entries = self._entries()
+        if entries is None:
+            return None
+        
+        try:
+            count = len(entries) // _INDEX_ENTRY.size
+            
+            def key(i: int) -> Tuple[int, int]:
+                _, entry_cycle, entry_prompt, _ = _INDEX_ENTRY.unpack_from(entries, i * _INDEX_ENTRY.size)
+                return entry_cycle, entry_prompt
+            
+            # Leftmost entry whose cycle (or prompt) is at least the target
+            field, target = (0, cycle) if cycle is not None else (1, prompt_index)
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if key(mid)[field] < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            
+            if lo == count or key(lo)[field] != target:
+                # Parallel (depends_on) steps interleave, so prompts aren't
+                # always in order; scan the index (not the log) for those
+                lo = next((i for i in range(count) if key(i)[field] == target), None)
+                if lo is None:
+                    return None
+            return _INDEX_ENTRY.unpack_from(entries, lo * _INDEX_ENTRY.size)[0]
+        finally:
+            entries.close()
+
+
+def segment_path(path: Path, segment: int) -> Path:
+    """Path of a finished, compressed part of a log."""
+    return path.with_name(f"{path.stem}.{segment:03d}{path.suffix}.gz")
+
+
+def log_parts(path: Path) -> List[Path]:
+    """
+    Get every file of a log, in order.
+    
+    Args:
+        path: The log's .jsonl path (the file still being written)
+    """
+    pattern = re.compile(re.escape(path.stem) + r"\.(\d+)" + re.escape(path.suffix) + r"\.gz$")
+    segments = []
+    for candidate in path.parent.glob(f"{path.stem}.*{path.suffix}.gz"):
+        match = pattern.match(candidate.name)
+        if match:
+            segments.append((int(match.group(1)), candidate))
+    
+    parts = [candidate for _, candidate in sorted(segments)]
+    if path.exists():
+        parts.append(path)
+    return parts
+
+
+def part_base(part: Path) -> int:
+    """Offset of a log part's first byte in the log as a whole."""
+    try:
+        with (gzip.open(part, "rb") if part.suffix == ".gz" else open(part, "rb")) as f:
+            return _first_offset(f.readline())
+    except (OSError, EOFError):
+        return 0
+
+
+def _first_offset(line: bytes) -> int:
+    """Offset a part starts at, given its first line."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return 0
+    if isinstance(record, dict) and record.get("type") == CONTINUED_EVENT:
+        return int(record.get("offset", 0))
+    return 0
+
+
+def log_end(path: Path) -> int:
+    """Offset just past the last byte written to a log."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            return _first_offset(f.readline()) + size if size else 0
+    except OSError:
+        return 0
+
+
+def read_lines(path: Path, offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """
+    Read complete lines of a log from an offset, across its parts.
+    
+    Parts before the one holding offset are never decompressed. The file
+    being written is memory-mapped, so only the pages from offset on are
+    touched, and a trailing line without its newline (still being
+    written) is left for the next call. Each part's start is read from the
+    file actually opened, so a rotation midway ends the read early rather
+    than misplacing it; reading again picks up from there.
+    
+    Yields:
+        (offset after the line, line)
+    """
+    parts = log_parts(path)
+    first = 0
+    for i in range(len(parts) - 1, 0, -1):
+        if part_base(parts[i]) <= offset:
+            first = i
+            break
+    
+    for part in parts[first:]:
+        reader = _read_compressed if part.suffix == ".gz" else _read_mapped
+        for offset, line in reader(part, offset):
+            yield offset, line
+
+
+def _read_compressed(path: Path, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """Read the complete lines of a gzipped part from an offset in the log."""
+    try:
+        with gzip.open(path, "rb") as f:
+            base = _first_offset(f.readline())
+            if base > offset:
+                return
+            f.seek(offset - base)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                yield offset, line[:-1]
+    except (OSError, EOFError):
+        return
+
+
+def _read_mapped(path: Path, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """Read the complete lines of a part from an offset in the log, memory-mapped."""
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return
+    
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            end = mm.find(b"\n")
+            base = _first_offset(mm[:end]) if end >= 0 else 0
+            pos = offset - base
+            if pos < 0:
+                return
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    break
+                yield base + end + 1, mm[pos:end]
+                pos = end + 1
+
+
+def line_start(path: Path, offset: int) -> int:
+    """Move an offset forward to the start of the next whole line."""
+    if offset <= 0:
+        return 0
+    # The first line read from offset - 1 ends where the next one starts
+    for end, _ in read_lines(path, offset - 1):
+        return end
+    return offset
+
+
+def read_events(path: Path, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Read events from a log, starting at a byte offset.
+    
+    Yields:
+        (offset, record) for each complete record; a torn last line is skipped
+    """
+    for end, line in read_lines(path, offset):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break
+        yield offset, record
+        offset = end
@@ -0,0 +1,43 @@
+"""Machine-readable JSONL event stream for headless runs."""
+
+import json
+import os
+import threading
+import time
+from typing import Any, IO, Optional
+
+
+class JsonlEmitter:
+    """
+    Writes one compact JSON object per line for each runner event.
+    
+    Used by `--output jsonl` in place of all rich rendering. Every record
+    has an `event` name and a wall-clock `ts`; the other fields depend on
+    the event (prompt_start, delta, rate_limit, wait_start, wait_end,
+    stall, completion, error, session_start, session_end).
+    
+    Output is block-buffered and flushed after every event except text
+    deltas, so log shippers see state changes immediately without paying a
+    syscall per delta.
+    """
+    
+    def __init__(self, fd: int = 1, deltas: bool = False, stream: Optional[IO[str]] = None):
+        self.deltas = deltas
+        self._file = stream or os.fdopen(fd, "w", encoding="utf-8", closefd=False)
+        self._lock = threading.Lock()
+    
+    def emit(self, event: str, **fields: Any) -> None:
+        """Write a single event record."""
+        record = {"event": event, "ts": round(time.time(), 3)}
+        record.update((key, value) for key, value in fields.items() if value is not None)
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+        
+        with self._lock:
+            self._file.write(line + "\n")
+            if event != "delta":
+                self._file.flush()
+    
+    def close(self) -> None:
+        """Flush any buffered events."""
+        with self._lock:
+            self._file.flush()
@@ -0,0 +1,174 @@
+"""Following a session's event log as it is written."""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from tempo.eventlog import line_start, read_lines
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVE_SELF = 0x00000800
+_IN_DELETE_SELF = 0x00000400
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# How often to stat the file where inotify isn't available
+POLL_SECONDS = 0.5
+
+
+class _Inotify:
+    """Blocks until a file is modified, using Linux inotify through libc."""
+    
+    # Attribute changes include the link count dropping when the file is
+    # replaced, as the event log is on rotation
+    _MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVE_SELF | _IN_DELETE_SELF
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.wd = -1
+        
+        try:
+            self._watch()
+        except OSError:
+            os.close(self.fd)
+            raise
+    
+    def _watch(self) -> None:
+        """Watch the file now at the path, instead of the one watched before."""
+        if self.wd >= 0:
+            # Fails harmlessly if the kernel already dropped it with the file
+            self.libc.inotify_rm_watch(self.fd, self.wd)
+            self.wd = -1
+        
+        self.inode = _inode(self.path)
+        self.wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(self.path)), self._MASK)
+        if self.wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {self.path}")
+    
+    def wait(self, timeout: float) -> None:
+        """Return when the file changes or timeout seconds pass."""
+        if _inode(self.path) != self.inode:
+            # Replaced since the last wait: watch the new file, and return
+            # so whatever it already holds is read
+            try:
+                self._watch()
+            except OSError:
+                pass
+            return
+        
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            # Drain the queued events; only "something changed" matters
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+    
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class _Poller:
+    """Fallback for platforms without inotify: watch the file size."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+    
+    def wait(self, timeout: float) -> None:
+        """Return when the file grows or timeout seconds pass."""
+        size = _size(self.path)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(min(POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+            if _size(self.path) != size:
+                return
+    
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+def _inode(path: Path) -> int:
+    """Inode of a file, 0 if it's gone."""
+    try:
+        return path.stat().st_ino
+    except OSError:
+        return 0
+
+
+def _size(path: Path) -> int:
+    """Size of a file, 0 if it's gone."""
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _watcher(path: Path) -> Union[_Inotify, _Poller]:
+    """Get the best available change watcher for a file."""
+    if sys.platform.startswith("linux"):
+        try:
+            return _Inotify(path)
+        except (OSError, AttributeError):
+            pass
+    return _Poller(path)
+
+
+def follow_events(
+    path: Path,
+    offset: int = 0,
+    follow: bool = False,
+    keep: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    timeout: float = 1.0,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Read an event log from an offset, optionally waiting for new records.
+    
+    Each byte is read once: the position after the last complete record is
+    kept, and new data is read from there when the watcher reports a
+    change. Following stops after the session_end record.
+    
+    Args:
+        path: The .jsonl event log
+        offset: Byte offset to start at (moved to the next line start)
+        follow: Keep waiting for new records
+        keep: Only yield records this returns True for
+        timeout: Longest wait between checks of the file
+    
+    Yields:
+        (offset after the record, record)
+    """
+    offset = line_start(path, offset)
+    watcher = _watcher(path) if follow else None
+    try:
+        while True:
+            ended = False
+            for offset, line in read_lines(path, offset):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                ended = record.get("type") == "session_end"
+                if keep is None or keep(record):
+                    yield offset, record
+            
+            if not follow or ended:
+                return
+            watcher.wait(timeout)
+    finally:
+        if watcher is not None:
+            watcher.close()
@@ -0,0 +1,184 @@
+"""Persistent history of rate limit events, shared across runs."""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from tempo.config import (
+    HISTORY_DB,
+    HISTORY_FIRST_PROBE_QUANTILE,
+    HISTORY_MAX_WAIT_QUANTILE,
+    HISTORY_MIN_SAMPLES,
+)
+from tempo.quota import default_account, tempo_home
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    project TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    cycle INTEGER NOT NULL,
+    channel TEXT,
+    detected_at REAL NOT NULL,
+    reset_at REAL,
+    resumed_at REAL,
+    tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS rate_limits_detected ON rate_limits (account, detected_at);
+"""
+
+# Databases whose schema this process has already set up
+_ready: Set[str] = set()
+
+
+@dataclass
+class WaitPrediction:
+    """How long an unparsed rate limit is likely to last, from history."""
+    
+    # Seconds after detection to send the first probe
+    first_probe: float
+    
+    # Seconds after detection to stop waiting regardless
+    max_wait: float
+    
+    # Number of past rate limits the prediction is based on
+    samples: int
+
+
+def _quantile(values: List[float], q: float) -> float:
+    """Nearest-rank quantile of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def limit_duration(event: Dict[str, Any]) -> Optional[float]:
+    """
+    Seconds a recorded rate limit actually lasted.
+    
+    The parsed reset time is used when there is one; otherwise the time
+    until the task resumed successfully (an upper bound). None if neither
+    is known yet.
+    """
+    ends = [t for t in (event["reset_at"], event["resumed_at"]) if t]
+    if not ends:
+        return None
+    return max(0.0, min(ends) - event["detected_at"])
+
+
+class HistoryStore:
+    """
+    Records every rate limit hit in a local SQLite database.
+    
+    Each row holds when the limit was detected, the reset time if one was
+    parsed, when the task first resumed successfully afterwards and how
+    many tokens were spent in the window leading up to it. The observed
+    durations are used to predict limits whose reset time can't be parsed
+    and are summarized by `tempo limits`.
+    
+    History is best effort: database errors are swallowed so they can never
+    stop a run.
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None, account: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else tempo_home() / HISTORY_DB
+        self.account = account or default_account()
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open the database in a transaction, creating it if needed.
+        
+        WAL mode and the schema are set up on the first connection in each
+        process, as in SessionRegistry._connect.
+        """
+        key = str(self.db_path)
+        setup = key not in _ready or not self.db_path.exists()
+        if setup:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, timeout=10)
+        try:
+            conn.row_factory = sqlite3.Row
+            if setup:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _ready.add(key)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def record_limit(
+        self,
+        project: str,
+        session_id: str,
+        cycle: int,
+        channel: Optional[str] = None,
+        reset_at: Optional[float] = None,
+        tokens: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        Record a rate limit hit.
+        
+        Returns:
+            Row id, to pass to record_resume later (None if not recorded)
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO rate_limits "
+                    "(account, project, session_id, cycle, channel, detected_at, reset_at, tokens) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.account, project, session_id, cycle, channel, time.time(), reset_at, tokens),
+                )
+                return cursor.lastrowid
+        except (sqlite3.Error, OSError):
+            return None
+    
+    def record_resume(self, limit_id: Optional[int]) -> None:
+        """Record the first successful Claude run after a rate limit."""
+        if limit_id is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE rate_limits SET resumed_at = ? WHERE id = ? AND resumed_at IS NULL",
+                    (time.time(), limit_id),
+                )
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def events(self, since: float = 0.0, project: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get recorded rate limits for this account, oldest first."""
+        query = "SELECT * FROM rate_limits WHERE account = ? AND detected_at >= ?"
+        params: list = [self.account, since]
+        if project:
+            query += " AND project = ?"
+            params.append(project)
+        query += " ORDER BY detected_at"
+        
+        try:
+            with self._connect() as conn:
+                return [dict(row) for row in conn.execute(query, params)]
+        except (sqlite3.Error, OSError):
+            return []
+    
+    def observed_waits(self, since: float = 0.0) -> List[float]:
+        """Seconds each past rate limit lasted, where known."""
+        durations = (limit_duration(event) for event in self.events(since))
+        return [d for d in durations if d is not None]
+    
+    def predict_wait(self) -> Optional[WaitPrediction]:
+        """Predict an unparsed rate limit's duration from history, if there's enough."""
+        waits = self.observed_waits()
+        if len(waits) < HISTORY_MIN_SAMPLES:
+            return None
+        return WaitPrediction(
+            first_probe=_quantile(waits, HISTORY_FIRST_PROBE_QUANTILE),
+            max_wait=_quantile(waits, HISTORY_MAX_WAIT_QUANTILE),
+            samples=len(waits),
+        )
@@ -0,0 +1,100 @@
+"""Run Tempo against many project directories concurrently."""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from tempo.config import RUN_MANY_CONCURRENCY
+from tempo.runner import TempoRunner, cancel_on_signal
+
+console = Console()
+
+
+def _make_labels(project_dirs: List[Path]) -> List[str]:
+    """Label each directory by name, disambiguating duplicates."""
+    labels = []
+    seen: Dict[str, int] = {}
+    for project_dir in project_dirs:
+        name = project_dir.name or str(project_dir)
+        seen[name] = seen.get(name, 0) + 1
+        labels.append(name if seen[name] == 1 else f"{name}#{seen[name]}")
+    return labels
+
+
+async def run_many_async(
+    runners: List[TempoRunner],
+    prompt: Optional[str] = None,
+    resume: bool = False,
+    concurrency: int = RUN_MANY_CONCURRENCY,
+) -> List[bool]:
+    """
+    Drive several runners on one event loop.
+    
+    At most `concurrency` sessions have a Claude process or wait in flight
+    at a time. Each runner keeps its own SessionManager and TranscriptWriter.
+    
+    Returns:
+        Success flag for each runner, in order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_one(runner: TempoRunner) -> bool:
+        async with semaphore:
+            try:
+                return await runner.run_async(prompt=prompt, resume=resume)
+            except Exception as e:
+                console.print(f"[red]{runner.label}: {e}[/red]")
+                return False
+    
+    return await asyncio.gather(*(run_one(runner) for runner in runners))
+
+
+def run_many(
+    project_dirs: List[str],
+    prompt: Optional[str] = None,
+    resume: bool = False,
+    concurrency: int = RUN_MANY_CONCURRENCY,
+    **runner_kwargs,
+) -> bool:
+    """
+    Run the same prompt (or resume sessions) across many project directories.
+    
+    Args:
+        project_dirs: Project directories to run in
+        prompt: The prompt to send (ignored if resuming)
+        resume: Resume the existing session in each directory
+        concurrency: Maximum number of sessions running at once
+        **runner_kwargs: Passed through to each TempoRunner
+    
+    Returns:
+        True if every session completed successfully
+    """
+    paths = [Path(d).resolve() for d in project_dirs]
+    runners = [
+        TempoRunner(str(path), label=label, **runner_kwargs)
+        for path, label in zip(paths, _make_labels(paths))
+    ]
+    
+    results = asyncio.run(cancel_on_signal(runners, run_many_async(runners, prompt, resume, concurrency)))
+    
+    # Summary table
+    table = Table(title="Run Summary")
+    table.add_column("Project", style="bold")
+    table.add_column("Session")
+    table.add_column("Status")
+    table.add_column("Cycles", justify="right")
+    
+    for runner, success in zip(runners, results):
+        session = runner.session
+        table.add_row(
+            runner.label,
+            session.session_id if session else "-",
+            "[green]completed[/green]" if success else f"[yellow]{session.status if session else 'not started'}[/yellow]",
+            str(session.cycle_count) if session else "-",
+        )
+    
+    console.print(table)
+    return all(results)
@@ -3,13 +3,17 @@
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from dateutil import parser as date_parser
 from dateutil import tz
 
 from tempo.config import (
     COMPLETION_CODE,
+    RATE_LIMIT_CONFIDENCE,
+    RATE_LIMIT_ERROR_TYPES,
+    RATE_LIMIT_MATCH_WINDOW,
     RATE_LIMIT_PATTERNS,
     RESET_TIME_PATTERN_WITH_TZ,
     RESET_TIME_PATTERN_NO_TZ,
@@ -34,18 +38,272 @@ class ParseResult:
     rate_limit_info: Optional[RateLimitInfo] = None
 
 
+class CompletionDetector:
+    """
+    Incrementally detects the completion code in streamed text.
+    
+    Keeps the last len(marker) - 1 characters between calls so the marker
+    is found even when it is split across several text deltas.
+    """
+    
+    def __init__(self, marker: str = COMPLETION_CODE):
+        self.marker = marker
+        self.found = False
+        self._carry = ""
+    
+    def feed(self, text: str) -> bool:
+        """Feed the next piece of text. Returns True once the marker was seen."""
+        if self.found or not text:
+            return self.found
+        
+        window = self._carry + text
+        if self.marker in window:
+            self.found = True
+            self._carry = ""
+            return True
+        
+        keep = len(self.marker) - 1
+        self._carry = window[-keep:] if keep else ""
+        return False
+    
+    def reset(self) -> None:
+        """Forget all text seen so far."""
+        self.found = False
+        self._carry = ""
+
+
 def detect_completion(output: str) -> bool:
     """Check if output contains the completion code."""
     return COMPLETION_CODE in output
 
 
+@dataclass
+class RateLimitMatch:
+    """A single rate limit pattern match."""
+    
+    # The source pattern that matched
+    pattern: str
+    
+    # The matched text
+    text: str
+    
+    # Character offsets of the match (stream offsets when matching incrementally)
+    start: int
+    end: int
+
+
+def _casefold_pattern(pattern: str) -> str:
+    """
+    Lowercase the literal parts of a regex.
+    
+    Escaped characters (e.g. \\S, \\W) and the P of named-group syntax are
+    left alone, so the pattern keeps its meaning when matched against
+    lowercased text.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if pattern.startswith("(?P", i):
+            out.append("(?P")
+            i += 3
+            continue
+        out.append(char.lower())
+        i += 1
+    return "".join(out)
+
+
+class RateLimitMatcher:
+    """
+    Matches all rate limit patterns in a single regex pass.
+    
+    The configured patterns (plus any extra, user-supplied ones) are
+    compiled once into one case-folded, non-capturing alternation and
+    matched against lowercased text, which lets the regex engine use its
+    fast literal search instead of IGNORECASE matching. `search` scans a
+    single piece of text; `feed` scans a stream of chunks, keeping a short
+    window of previous text so matches spanning chunk boundaries are
+    still found.
+    """
+    
+    def __init__(
+        self,
+        patterns: Optional[Sequence[str]] = None,
+        extra_patterns: Optional[Sequence[str]] = None,
+        window: int = RATE_LIMIT_MATCH_WINDOW,
+    ):
+        self.patterns = list(RATE_LIMIT_PATTERNS if patterns is None else patterns)
+        self.patterns.extend(extra_patterns or [])
+        self.window = window
+        
+        folded = [_casefold_pattern(pattern) for pattern in self.patterns]
+        self._regex = re.compile("|".join(f"(?:{pattern})" for pattern in folded))
+        
+        # Individual patterns, only used to report which one matched
+        self._each = [re.compile(pattern) for pattern in folded]
+        
+        self._carry = ""
+        self._consumed = 0
+    
+    def search(self, text: str) -> Optional[RateLimitMatch]:
+        """Return the first rate limit match in text, if any."""
+        lowered = text.lower()
+        match = self._regex.search(lowered)
+        if not match:
+            return None
+        return self._to_match(match, text, lowered, 0)
+    
+    def feed(self, chunk: str) -> Optional[RateLimitMatch]:
+        """
+        Scan the next chunk of a stream.
+        
+        Only matches that end inside the new chunk are reported, so the
+        same match is never returned twice.
+        """
+        window = self._carry + chunk
+        lowered = window.lower()
+        base = self._consumed - len(self._carry)
+        self._consumed += len(chunk)
+        
+        result = None
+        match = self._regex.search(lowered)
+        while match:
+            if match.end() > len(self._carry):
+                result = self._to_match(match, window, lowered, base)
+                break
+            match = self._regex.search(lowered, match.start() + 1)
+        
+        self._carry = window[-self.window:] if self.window else ""
+        return result
+    
+    def reset(self) -> None:
+        """Forget any streamed text."""
+        self._carry = ""
+        self._consumed = 0
+    
+    def _to_match(self, match: re.Match, text: str, lowered: str, offset: int) -> RateLimitMatch:
+        """Build a RateLimitMatch from a regex match over lowered text."""
+        # The alternation picks the first pattern that matches at this position
+        pattern = ""
+        for source, regex in zip(self.patterns, self._each):
+            if regex.match(lowered, match.start()):
+                pattern = source
+                break
+        
+        # Lowercasing can change the length of some non-ASCII text
+        source_text = text if len(text) == len(lowered) else lowered
+        
+        return RateLimitMatch(
+            pattern=pattern,
+            text=source_text[match.start():match.end()],
+            start=offset + match.start(),
+            end=offset + match.end(),
+        )
+
+
+@dataclass
+class RateLimitSignal:
+    """A rate limit indication and how far it can be trusted."""
+    
+    # Where it was found: structured, result_error, synthetic, error, system, plain
+    channel: str
+    
+    # 0.0 - 1.0, see config.RATE_LIMIT_CONFIDENCE
+    confidence: float
+    
+    # The message to parse the reset time from
+    message: str
+    
+    # The regex match, if the signal came from text matching
+    match: Optional[RateLimitMatch] = None
+
+
+def _signal(channel: str, message: str, match: Optional[RateLimitMatch] = None) -> RateLimitSignal:
+    """Build a signal with the configured confidence for its channel."""
+    return RateLimitSignal(
+        channel=channel,
+        confidence=RATE_LIMIT_CONFIDENCE[channel],
+        message=message,
+        match=match,
+    )
+
+
+def _text_signal(channel: str, text: str, matcher: "RateLimitMatcher") -> Optional[RateLimitSignal]:
+    """Fall back to regex matching on an error-carrying channel."""
+    match = matcher.search(text)
+    return _signal(channel, text, match) if match else None
+
+
+def detect_event_rate_limit(
+    event: Dict[str, Any],
+    matcher: Optional["RateLimitMatcher"] = None,
+) -> Optional[RateLimitSignal]:
+    """
+    Check a stream-json event for a rate limit.
+    
+    Structured fields (error types, HTTP status, system subtypes, is_error)
+    decide first. Regex matching is only used as a fallback on channels that
+    carry CLI or API errors; ordinary assistant text is never matched, so
+    code or prose *about* rate limiting can't trigger a wait.
+    """
+    matcher = matcher or get_rate_limit_matcher()
+    event_type = event.get("type", "")
+    
+    if event_type == "error":
+        error = event.get("error", {})
+        if isinstance(error, dict):
+            if error.get("type") in RATE_LIMIT_ERROR_TYPES or error.get("status") == 429:
+                return _signal("structured", str(error.get("message") or error))
+        return _text_signal("error", str(error), matcher)
+    
+    if event_type == "result":
+        # A successful result's text is the model's own final answer
+        if not event.get("is_error", False):
+            return None
+        if event.get("subtype") in RATE_LIMIT_ERROR_TYPES:
+            return _signal("structured", str(event.get("result", "")))
+        return _text_signal("result_error", str(event.get("result", "")), matcher)
+    
+    if event_type == "system":
+        subtype = event.get("subtype", "")
+        message = str(event.get("message", ""))
+        if subtype in RATE_LIMIT_ERROR_TYPES:
+            return _signal("structured", message)
+        return _text_signal("system", message, matcher)
+    
+    if event_type == "assistant":
+        # Only messages synthesized by the CLI itself (not the model) count
+        message = event.get("message", {})
+        if message.get("model") != "<synthetic>":
+            return None
+        text = "".join(
+            block.get("text", "")
+            for block in message.get("content", [])
+            if block.get("type") == "text"
+        )
+        return _text_signal("synthetic", text, matcher)
+    
+    return None
+
+
+@lru_cache(maxsize=8)
+def get_rate_limit_matcher(extra_patterns: Tuple[str, ...] = ()) -> RateLimitMatcher:
+    """Get a shared matcher for the default patterns plus any extra ones."""
+    return RateLimitMatcher(extra_patterns=extra_patterns)
+
+
+def match_rate_limit(output: str) -> Optional[RateLimitMatch]:
+    """Find the first rate limit indication in output."""
+    return get_rate_limit_matcher().search(output)
+
+
 def detect_rate_limit(output: str) -> bool:
     """Check if output indicates a rate limit."""
-    output_lower = output.lower()
-    return any(
-        re.search(pattern, output_lower, re.IGNORECASE)
-        for pattern in RATE_LIMIT_PATTERNS
-    )
+    return match_rate_limit(output) is not None
 
 
 def parse_reset_time(output: str) -> Optional[RateLimitInfo]:
@@ -0,0 +1,179 @@
+"""Machine-wide rate limit state shared by every tempo process."""
+
+import copy
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from tempo.config import (
+    QUOTA_MAX_STAGGER_SLOTS,
+    QUOTA_STAGGER_SECONDS,
+    QUOTA_STATE_FILE,
+    RESET_BUFFER_SECONDS,
+    SESSION_DIR,
+)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def tempo_home() -> Path:
+    """Get the per-user tempo directory: $TEMPO_HOME or ~/.tempo."""
+    home = os.environ.get("TEMPO_HOME")
+    return Path(home).expanduser() if home else Path.home() / SESSION_DIR
+
+
+def default_state_path() -> Path:
+    """Get the shared rate limit state file."""
+    return tempo_home() / QUOTA_STATE_FILE
+
+
+def default_account() -> str:
+    """Identify the Claude account the CLI will use."""
+    return os.environ.get("CLAUDE_CONFIG_DIR") or "default"
+
+
+class QuotaCoordinator:
+    """
+    Shares what one tempo process learns about a rate limit with the rest.
+    
+    State lives in a small JSON file in the user's home directory,
+    protected by an exclusive file lock. When a runner learns the reset
+    time it publishes it. Before spawning Claude, every runner checks the
+    file and, if the account is known to be limited, waits instead of
+    launching a child that is bound to fail.
+    
+    Waiters claim stagger slots, so they wake QUOTA_STAGGER_SECONDS apart
+    after the reset instead of all hitting the API in the same second. The
+    process that published the reset waits for it without a stagger, so it
+    has slot 0 to itself: claims are numbered from 1 and wrap around
+    without coming back to 0.
+    """
+    
+    def __init__(self, state_path: Optional[Path] = None, account: Optional[str] = None):
+        self.state_path = Path(state_path) if state_path else default_state_path()
+        self.account = account or default_account()
+    
+    async def publish_reset_async(self, reset_time: datetime) -> None:
+        """publish_reset() in a worker thread, so the file lock never blocks the event loop."""
+        import asyncio
+        
+        await asyncio.get_running_loop().run_in_executor(None, self.publish_reset, reset_time)
+    
+    async def claim_wait_async(self) -> Optional[float]:
+        """claim_wait() in a worker thread, so the file lock never blocks the event loop."""
+        import asyncio
+        
+        return await asyncio.get_running_loop().run_in_executor(None, self.claim_wait)
+    
+    def publish_reset(self, reset_time: datetime) -> None:
+        """Record that the account is rate limited until reset_time."""
+        reset_at = reset_time.timestamp()
+        try:
+            with self._state() as state:
+                current = state.get(self.account)
+                if current and abs(current.get("reset_at", 0) - reset_at) < 1:
+                    return
+                state[self.account] = {
+                    "reset_at": reset_at,
+                    "next_slot": 1,
+                    "published_by": os.getpid(),
+                    "published_at": time.time(),
+                }
+        except OSError:
+            # Sharing is best effort; this process still waits on its own
+            pass
+    
+    def claim_wait(self) -> Optional[float]:
+        """
+        Check whether the account is known to be rate limited.
+        
+        Returns:
+            Wall-clock time to wait until (reset time, buffer and this
+            caller's stagger), or None if Claude can be started now
+        """
+        now = time.time()
+        try:
+            with self._state() as state:
+                current = state.get(self.account)
+                if not current or current.get("reset_at", 0) <= now:
+                    return None
+                
+                slot = current.get("next_slot", 1)
+                current["next_slot"] = slot + 1
+                stagger = ((slot - 1) % (QUOTA_MAX_STAGGER_SLOTS - 1) + 1) * QUOTA_STAGGER_SECONDS
+                return current["reset_at"] + RESET_BUFFER_SECONDS + stagger
+        except OSError:
+            return None
+    
+    def current_reset(self) -> Optional[datetime]:
+        """Get the shared reset time, if the account is currently limited."""
+        state = self._read()
+        current = state.get(self.account)
+        if not current or current.get("reset_at", 0) <= time.time():
+            return None
+        return datetime.fromtimestamp(current["reset_at"])
+    
+    def clear(self) -> None:
+        """Forget the shared rate limit (e.g. it was lifted early)."""
+        try:
+            with self._state() as state:
+                state.pop(self.account, None)
+        except OSError:
+            pass
+    
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """Read and modify the state under the lock, rewriting it atomically if it changed."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self.state_path.with_name(self.state_path.name + ".lock")
+        
+        with open(lock_path, "a+") as lock:
+            _lock(lock)
+            try:
+                state = self._read()
+                original = copy.deepcopy(state)
+                yield state
+                if state == original:
+                    return
+                
+                tmp_path = self.state_path.with_name(self.state_path.name + f".{os.getpid()}.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f, indent=2)
+                os.replace(tmp_path, self.state_path)
+            finally:
+                _unlock(lock)
+    
+    def _read(self) -> Dict[str, Any]:
+        """Load the state file, treating a missing or corrupt file as empty."""
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+
+def _lock(f) -> None:
+    """Take an exclusive lock on an open file, blocking until available."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock(f) -> None:
+    """Release a lock taken by _lock."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
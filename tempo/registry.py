@@ -0,0 +1,185 @@
+"""Per-user index of every tempo session, across projects."""
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from tempo.config import REGISTRY_DB
+from tempo.quota import tempo_home
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    project TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cycle_count INTEGER NOT NULL DEFAULT 0,
+    current_prompt TEXT,
+    prompts_done INTEGER NOT NULL DEFAULT 0,
+    prompts_total INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT,
+    path TEXT,
+    archived INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project, session_id)
+);
+CREATE INDEX IF NOT EXISTS sessions_status ON sessions (status, updated_at);
+CREATE INDEX IF NOT EXISTS sessions_project ON sessions (project, updated_at);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+"""
+
+# Databases whose schema this process has already set up
+_ready: Set[str] = set()
+
+# Session fields shown in the registry; saves that change none of them
+# (other than updated_at) don't touch the database
+INDEXED_FIELDS = frozenset({"status", "cycle_count", "current_prompt_index", "prompts", "usage"})
+
+
+def _current_prompt(data: Dict[str, Any]) -> str:
+    """Name of the prompt a session dict is working on."""
+    prompts = data.get("prompts") or []
+    index = data.get("current_prompt_index", -1)
+    if not prompts:
+        return "main"
+    if any(p.get("depends_on") for p in prompts):
+        running = [p["name"] for p in prompts if p.get("status") == "running"]
+        return ", ".join(running)
+    if 0 <= index < len(prompts):
+        return prompts[index]["name"]
+    return ""
+
+
+class SessionRegistry:
+    """
+    Indexes every session on this machine in a local SQLite database.
+    
+    SessionManager reports each session here when it is created, when a
+    save changes one of the INDEXED_FIELDS and when it is archived, so
+    `tempo status --all` can list sessions across projects without
+    walking the filesystem. Rows for archived sessions point at the
+    snapshot kept in the project's .tempo/sessions directory.
+    
+    Like the rate limit history, the registry is best effort: database
+    errors are swallowed so they can never stop a run.
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else tempo_home() / REGISTRY_DB
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open the database in a transaction, creating it if needed.
+        
+        WAL mode is stored in the database file and the schema only needs
+        creating once, so both are set up on the first connection in each
+        process (or again if the file has been removed since).
+        """
+        key = str(self.db_path)
+        setup = key not in _ready or not self.db_path.exists()
+        if setup:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, timeout=10)
+        try:
+            conn.row_factory = sqlite3.Row
+            if setup:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _ready.add(key)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def record(self, data: Dict[str, Any], path: Path) -> None:
+        """Insert or update a session from its dict form (Session.to_dict)."""
+        prompts = data.get("prompts") or []
+        usage = data.get("usage") or {}
+        tokens = sum(
+            usage.get(key, 0)
+            for key in ("input_tokens", "output_tokens", "cache_creation_tokens", "cache_read_tokens")
+        )
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO sessions "
+                    "(project, session_id, status, cycle_count, current_prompt, prompts_done, "
+                    "prompts_total, tokens, cost_usd, created_at, updated_at, path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (project, session_id) DO UPDATE SET "
+                    "status = excluded.status, cycle_count = excluded.cycle_count, "
+                    "current_prompt = excluded.current_prompt, prompts_done = excluded.prompts_done, "
+                    "prompts_total = excluded.prompts_total, tokens = excluded.tokens, "
+                    "cost_usd = excluded.cost_usd, updated_at = excluded.updated_at, "
+                    "path = excluded.path",
+                    (
+                        data["project_dir"],
+                        data["session_id"],
+                        data.get("status", "pending"),
+                        data.get("cycle_count", 0),
+                        _current_prompt(data),
+                        sum(1 for p in prompts if p.get("completed")),
+                        len(prompts),
+                        tokens,
+                        usage.get("cost_usd", 0.0),
+                        data.get("created_at", ""),
+                        data.get("updated_at", ""),
+                        str(path),
+                    ),
+                )
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def archive(self, project: str, session_id: str, path: Path) -> None:
+        """Mark a session as archived, with the path of its kept snapshot."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE sessions SET archived = 1, path = ? WHERE project = ? AND session_id = ?",
+                    (str(path), project, session_id),
+                )
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def forget(self, project: str) -> None:
+        """Drop every session of a project directory that no longer exists."""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM sessions WHERE project = ?", (project,))
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def sessions(
+        self,
+        status: Optional[str] = None,
+        project: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Get sessions, most recently updated first."""
+        query = "SELECT * FROM sessions WHERE 1 = 1"
+        params: list = []
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        if project:
+            query += " AND project = ?"
+            params.append(project)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+        
+        try:
+            with self._connect() as conn:
+                return [dict(row) for row in conn.execute(query, params)]
+        except (sqlite3.Error, OSError):
+            return []
+    
+    def projects(self) -> List[str]:
+        """Get every project directory with a registered session."""
+        try:
+            with self._connect() as conn:
+                return [row["project"] for row in conn.execute("SELECT DISTINCT project FROM sessions")]
+        except (sqlite3.Error, OSError):
+            return []
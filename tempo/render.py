@@ -0,0 +1,84 @@
+"""Frame-rate-throttled terminal output for streamed Claude text."""
+
+import threading
+from typing import List, Optional
+
+from rich.console import Console
+
+from tempo.config import RENDER_FPS
+
+
+class StreamRenderer:
+    """
+    Sits between the runner's read loop and the terminal.
+    
+    Streamed model text is raw, so it is written straight to the console's
+    file without rich markup parsing. On a TTY, text is only queued by
+    write() and a background thread flushes it as one frame `fps` times a
+    second, so the read loop never waits on terminal I/O. When output is not
+    a TTY (pipes, log files), text is written through immediately.
+    """
+    
+    def __init__(self, console: Console, fps: float = RENDER_FPS):
+        self.console = console
+        self.fps = fps
+        self.is_tty = console.is_terminal
+        
+        # _lock only guards _pending, so write() never waits on the
+        # terminal; _flush_lock keeps concurrent flushes in order
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the frame thread (no-op when not a TTY)."""
+        if not self.is_tty or self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tempo-render", daemon=True)
+        self._thread.start()
+    
+    def write(self, text: str) -> None:
+        """Queue raw text for the next frame."""
+        if not text:
+            return
+        
+        if not self.is_tty or self._thread is None:
+            self._write_through(text)
+            return
+        
+        with self._lock:
+            self._pending.append(text)
+    
+    def flush(self) -> None:
+        """Write all queued text now."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                text = "".join(self._pending)
+                self._pending = []
+            self._write_through(text)
+    
+    def stop(self) -> None:
+        """Stop the frame thread and flush anything left."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+    
+    def _run(self) -> None:
+        """Flush a frame every 1/fps seconds until stopped."""
+        interval = 1.0 / self.fps if self.fps > 0 else 0.05
+        while not self._stop.wait(interval):
+            self.flush()
+    
+    def _write_through(self, text: str) -> None:
+        """Write text to the terminal, bypassing rich rendering."""
+        file = self.console.file
+        file.write(text)
+        file.flush()
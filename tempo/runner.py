@@ -1,31 +1,79 @@
 """Core automation runner using Claude CLI."""
 
-import json
+import asyncio
 import os
 import signal
-import subprocess
-import sys
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Awaitable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 from rich.console import Console
 from rich.panel import Panel
-from rich.live import Live
-from rich.text import Text
-from rich.spinner import Spinner
 
+from tempo.buffer import OutputBuffer
 from tempo.config import (
     COMPLETION_CODE,
+    COMPLETION_GRACE_SECONDS,
+    CONTINUATION_EXCERPT_CHARS,
+    CYCLE_TIMEOUT_SECONDS,
+    DAG_CONCURRENCY,
+    KILL_GRACE_SECONDS,
+    MAX_CONSECUTIVE_STALLS,
+    PROBE_BACKOFF,
+    PROBE_INITIAL_DELAY_SECONDS,
+    PROBE_MAX_DELAY_SECONDS,
+    PROBE_MAX_PER_WINDOW,
+    PROBE_PROMPT,
+    PROBE_TIMEOUT_SECONDS,
+    RATE_LIMIT_CONFIDENCE,
+    RATE_LIMIT_MIN_CONFIDENCE,
+    RENDER_FPS,
+    RESET_SCAN_CHARS,
+    SESSION_DIR,
+    STALL_TIMEOUT_SECONDS,
+    STREAM_LINE_LIMIT,
+    TRANSCRIPT_DIR,
 )
-from tempo.parser import detect_completion, detect_rate_limit, parse_reset_time
-from tempo.scheduler import wait_seconds_with_progress, wait_until_reset
-from tempo.session import Session, SessionManager
+from tempo.decode import EventDecoder
+from tempo.events import JsonlEmitter
+from tempo.history import HistoryStore
+from tempo.parser import (
+    CompletionDetector,
+    RateLimitMatcher,
+    RateLimitInfo,
+    RateLimitSignal,
+    detect_event_rate_limit,
+    parse_reset_time,
+)
+from tempo.quota import QuotaCoordinator
+from tempo.registry import SessionRegistry
+from tempo.render import StreamRenderer
+from tempo.scheduler import (
+    calculate_wait_seconds,
+    format_duration,
+    get_scheduler,
+    wait_seconds_async,
+    wait_until_reset_async,
+)
+from tempo.search import SearchIndex
+from tempo.session import Budget, Session, SessionManager, Usage
 from tempo.transcript import TranscriptWriter
+from tempo.worktree import (
+    WorktreeError,
+    create_worktree,
+    is_git_repo,
+    merge_worktree,
+    remove_worktree,
+)
 
 console = Console()
 
-# Default fallback wait time if we can't parse reset time (4.5 hours)
+T = TypeVar("T")
+
+# Longest wait if we can't parse the reset time and probes don't find it
+# lifted (4.5 hours)
 FALLBACK_WAIT_SECONDS = 4.5 * 60 * 60
 
 # System prompt appended via --append-system-prompt
@@ -37,6 +85,72 @@ CRITICAL INSTRUCTION: When you have fully completed ALL tasks and there is absol
 
 Output this marker ONLY when you are 100% finished with everything requested. Do not output it prematurely."""
 
+# Sent with --continue after an interruption. The text never changes, so
+# every continuation shares the same prefix; the task is only referenced.
+CONTINUATION_PROMPT = (
+    "Continue working on the task from earlier in this conversation. "
+    "The previous session was interrupted by a rate limit. "
+    "Pick up where you left off."
+)
+
+def continuation_prompt(prompt: str, name: Optional[str] = None) -> str:
+    """
+    Build the prompt sent when continuing an interrupted task.
+    
+    The original prompt is already part of the conversation being
+    continued, so resending it in full only costs tokens. Instead the
+    task is referenced by name or a one-line excerpt, after the fixed
+    CONTINUATION_PROMPT.
+    """
+    if name:
+        reference = name
+    else:
+        first_line = prompt.strip().splitlines()[0] if prompt.strip() else ""
+        reference = first_line[:CONTINUATION_EXCERPT_CHARS]
+        if len(prompt.strip()) > len(reference):
+            reference = reference.rstrip() + "..."
+    return f"{CONTINUATION_PROMPT} Task: {reference}" if reference else CONTINUATION_PROMPT
+
+
+def _signal_process_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    """Send a signal to a child process and everything it spawned."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, sig)
+        else:
+            process.send_signal(sig)
+    except ProcessLookupError:
+        pass
+
+
+async def cancel_on_signal(runners: List["TempoRunner"], coro: Awaitable[T]) -> T:
+    """
+    Await coro, cancelling the runners on SIGINT or SIGTERM.
+    
+    Claude runs in its own process group, so a Ctrl-C in the terminal
+    never reaches it; the handler cancels each runner instead, which
+    terminates its Claude processes and lets the event loop unwind and
+    save the session. cancel() is scheduled on the loop rather than run
+    inside the handler, which may interrupt a session save.
+    """
+    loop = asyncio.get_running_loop()
+    
+    def handle_signal(signum, frame):
+        for runner in runners:
+            loop.call_soon_threadsafe(runner.cancel)
+    
+    previous = {sig: signal.signal(sig, handle_signal) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        return await coro
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+# Stream-json event types the runner inspects; everything else (tool_use and
+# tool_result traffic, mostly) is skipped without being decoded
+HANDLED_EVENT_TYPES = ("assistant", "content_block_delta", "result", "error", "system")
+
 
 class TempoRunner:
     """
@@ -47,6 +161,10 @@ class TempoRunner:
     - Parses JSON events for progress, errors, rate limits
     - Waits for rate limit reset and continues with --continue flag
     - Persists session for crash recovery
+    
+    The loop runs on asyncio so several runners (one per project directory)
+    can share one event loop; see tempo.multi. `run()` is the blocking
+    entry point for a single project.
     """
     
     def __init__(
@@ -54,31 +172,161 @@ class TempoRunner:
         project_dir: str,
         skip_permissions: bool = True,
         verbose: bool = False,
+        completion_grace: float = COMPLETION_GRACE_SECONDS,
+        rate_limit_patterns: Optional[List[str]] = None,
+        label: Optional[str] = None,
+        concurrency: int = DAG_CONCURRENCY,
+        render_fps: float = RENDER_FPS,
+        emitter: Optional[JsonlEmitter] = None,
+        stall_timeout: float = STALL_TIMEOUT_SECONDS,
+        cycle_timeout: float = CYCLE_TIMEOUT_SECONDS,
+        prompt_budget: Optional[Budget] = None,
+        session_budget: Optional[Budget] = None,
+        quota: Optional[QuotaCoordinator] = None,
+        history: Optional[HistoryStore] = None,
+        registry: Optional[SessionRegistry] = None,
+        search_index: Optional[SearchIndex] = None,
     ):
         self.project_dir = Path(project_dir).resolve()
         self.skip_permissions = skip_permissions
         self.verbose = verbose
+        self.completion_grace = completion_grace
+        self.rate_limit_patterns = rate_limit_patterns
+        
+        # Stall watchdog limits in seconds (0 disables each)
+        self.stall_timeout = stall_timeout
+        self.cycle_timeout = cycle_timeout
+        
+        # Hard caps on tokens/cost for each prompt and for the whole session
+        self.prompt_budget = prompt_budget or Budget()
+        self.session_budget = session_budget or Budget()
+        
+        # Maximum number of independent sequence steps run in parallel
+        self.concurrency = concurrency
+        
+        # When set, status lines are prefixed with the label and streamed
+        # text isn't echoed (used when several runners share a terminal)
+        self.label = label
+        
+        # Coalesces streamed text into frames so terminal I/O can't slow
+        # down the read loop
+        self.renderer = StreamRenderer(console, fps=render_fps)
+        
+        # Headless mode: emit JSONL events instead of any rich rendering
+        self.emitter = emitter
+        
+        # Compiled once: default rate limit patterns plus user-added ones
+        self.rate_limit_matcher = RateLimitMatcher(extra_patterns=rate_limit_patterns)
+        
+        # Only subscribed event types are fully decoded
+        self.decoder = EventDecoder(HANDLED_EVENT_TYPES)
+        
+        # The per-user stores below can be passed in to share them, as DAG
+        # nodes do with their parent's
+        self.session_manager = SessionManager(str(self.project_dir), registry=registry)
+        
+        # Rate limit reset times shared with other tempo processes
+        self.quota = quota or QuotaCoordinator()
+        
+        # Every rate limit hit is recorded to learn how long limits last.
+        # Tokens are counted from result events since the last limit.
+        self.history = history or HistoryStore()
+        self._window_tokens = 0
+        self._pending_limit_id: Optional[int] = None
         
-        self.session_manager = SessionManager(str(self.project_dir))
+        # Transcripts are indexed for `tempo search` as they are written
+        self.search_index = search_index or SearchIndex()
+        
+        # `tempo wake` pokes this directory to end a rate limit wait early
+        self.wake_dir = self.project_dir / SESSION_DIR
         self.session: Optional[Session] = None
         self.transcript: Optional[TranscriptWriter] = None
         
         # Buffer for accumulating output text
-        self.output_buffer = ""
+        self.output_buffer = OutputBuffer()
+        
+        # Streaming completion detection for the current Claude process
+        self._completion = CompletionDetector()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._grace_timer: Optional[asyncio.TimerHandle] = None
+        
+        # Strongest rate limit signal seen in the current Claude process
+        self.rate_limit_signal: Optional[RateLimitSignal] = None
+        
+        # Usage of the current Claude process: per assistant message while
+        # streaming, then the authoritative totals from its result event
+        self._live_usage: Dict[str, Usage] = {}
+        self._run_usage: Optional[Usage] = None
+        self._run_continuation = False
+        
+        # Set when the current Claude process reported a successful result
+        self._run_succeeded = False
+        
+        # Conversation id the current Claude process was resumed with (empty
+        # if none) and the id it reported in its init event
+        self._resumed_id = ""
+        self._run_session_id = ""
+        
+        # Set when the watchdog killed the current Claude process:
+        # (reason, seconds)
+        self.stall: Optional[Tuple[str, float]] = None
+        
+        # Runners for DAG nodes currently in flight. Git commands that touch
+        # the project's repository (adding, merging and removing worktrees)
+        # take the lock, so they run one at a time.
+        self._dag_nodes: List["TempoRunner"] = []
+        self._git_lock: Optional[asyncio.Lock] = None
         
         # Flag for graceful shutdown
         self._shutdown_requested = False
     
-    def _setup_signal_handlers(self) -> None:
-        """Set up signal handlers for graceful shutdown."""
-        def handle_signal(signum, frame):
-            self._shutdown_requested = True
-            console.print("\n[yellow]Shutdown requested, saving session...[/yellow]")
-            self._save_session()
-            sys.exit(0)
+    def request_shutdown(self) -> None:
+        """Stop after the current step and save the session."""
+        self._shutdown_requested = True
+        self._print("\n[yellow]Shutdown requested, saving session...[/yellow]")
+        for node in self._dag_nodes:
+            node.request_shutdown()
+        self._save_session()
+    
+    def cancel(self) -> None:
+        """
+        Stop as soon as possible.
+        
+        Like request_shutdown(), but also terminates the running Claude
+        processes and ends any rate limit wait instead of letting them
+        finish. Must be called on the runner's event loop.
+        """
+        self.request_shutdown()
+        for runner in [self, *self._dag_nodes]:
+            runner._terminate_process()
+        get_scheduler().wake(self.wake_dir)
+    
+    def _print(self, *objects, **kwargs) -> None:
+        """Print a status message, prefixed with the runner label if set."""
+        if self.emitter:
+            return
         
-        signal.signal(signal.SIGINT, handle_signal)
-        signal.signal(signal.SIGTERM, handle_signal)
+        # Keep status lines ordered after any streamed text still queued
+        self.renderer.flush()
+        
+        if self.label and objects and isinstance(objects[0], str):
+            prefix = f"[bold cyan]\\[{self.label}][/bold cyan] "
+            objects = (prefix + objects[0].lstrip("\n"),) + objects[1:]
+        console.print(*objects, **kwargs)
+    
+    def _echo(self, text: str, end: str = "") -> None:
+        """Echo streamed Claude output to the terminal."""
+        if self.emitter:
+            if self.emitter.deltas:
+                self._emit("delta", text=text + end)
+        elif not self.label:
+            self.renderer.write(text + end)
+    
+    def _emit(self, event: str, **fields) -> None:
+        """Emit a headless event tagged with the session and runner label."""
+        if self.emitter:
+            session_id = self.session.session_id if self.session else None
+            self.emitter.emit(event, session=session_id, label=self.label, **fields)
     
     def _build_command(self, prompt: str, is_continuation: bool = False) -> list:
         """Build the Claude CLI command."""
@@ -97,185 +345,647 @@ class TempoRunner:
         # Add our system prompt for completion detection
         cmd.extend(["--append-system-prompt", SYSTEM_PROMPT_APPEND])
         
-        # Continue previous conversation if resuming
+        # Continue the prompt's own conversation by id; --continue (the most
+        # recent conversation in the directory) only if the id is unknown
+        self._resumed_id = ""
         if is_continuation:
-            cmd.append("--continue")
-            # When continuing, ask Claude to proceed
-            prompt = f"Continue working on the task. The previous session was interrupted by a rate limit. Pick up where you left off. Original task was: {prompt}"
+            self._resumed_id = self.session.claude_session_id if self.session else ""
+            if self._resumed_id:
+                cmd.extend(["--resume", self._resumed_id])
+            else:
+                cmd.append("--continue")
+            # The task is already in the conversation; only reference it
+            name = self.session.get_current_prompt_name() if self.session and self.session.prompts else None
+            prompt = continuation_prompt(prompt, name)
         
         # Add the prompt
         cmd.append(prompt)
         
         return cmd
     
-    def _run_claude(self, prompt: str, is_continuation: bool = False) -> tuple[str, bool, bool]:
+    async def _run_claude(self, prompt: str, is_continuation: bool = False) -> tuple[OutputBuffer, bool, bool]:
         """
         Run Claude CLI and process output.
         
         Returns:
-            (output_text, is_complete, is_rate_limited)
+            (output_buffer, is_complete, is_rate_limited)
         """
         cmd = self._build_command(prompt, is_continuation)
         
         if self.verbose:
-            console.print(f"[dim]Running: {' '.join(cmd[:5])}...[/dim]")
+            self._print(f"[dim]Running: {' '.join(cmd[:5])}...[/dim]")
         
-        self.output_buffer = ""
+        self.output_buffer.close()
+        self.output_buffer = OutputBuffer()
+        self._completion.reset()
+        self.rate_limit_matcher.reset()
+        self.rate_limit_signal = None
+        self.stall = None
+        self._live_usage = {}
+        self._run_usage = None
+        self._run_continuation = is_continuation
+        self._run_succeeded = False
+        self._run_session_id = ""
         is_complete = False
         is_rate_limited = False
-        rate_limit_message = ""
         
         try:
-            process = subprocess.Popen(
-                cmd,
+            # Own process group, so a stall kill also reaches tools Claude spawned
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
                 cwd=str(self.project_dir),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=STREAM_LINE_LIMIT,
+                start_new_session=True,
             )
+            self._process = process
+            self.renderer.start()
+            
+            loop = asyncio.get_running_loop()
+            started = last_output = loop.time()
             
-            # Process streaming JSON output
-            for line in iter(process.stdout.readline, ''):
+            # Process streaming JSON output without blocking the event loop
+            while True:
                 if self._shutdown_requested:
-                    process.terminate()
+                    self._terminate_process()
+                    break
+                
+                try:
+                    raw_line = await asyncio.wait_for(
+                        process.stdout.readline(),
+                        self._read_timeout(started, last_output, loop.time()),
+                    )
+                except asyncio.TimeoutError:
+                    self.stall = self._classify_stall(started, last_output, loop.time())
+                    await self._kill_process(process)
+                    break
+                
+                if not raw_line:
                     break
+                last_output = loop.time()
                 
-                line = line.strip()
+                line = raw_line.strip()
                 if not line:
                     continue
                 
-                # Try to parse as JSON
-                try:
-                    event = json.loads(line)
-                    event_type = event.get("type", "")
-                    
-                    # Handle different event types
-                    if event_type == "assistant":
-                        # Assistant message content
-                        message = event.get("message", {})
-                        content_blocks = message.get("content", [])
-                        for block in content_blocks:
-                            if block.get("type") == "text":
-                                text = block.get("text", "")
-                                self.output_buffer += text
-                                console.print(text, end="")
-                                
-                                # Check for rate limit in assistant message
-                                if detect_rate_limit(text):
-                                    is_rate_limited = True
-                                    rate_limit_message = text
-                    
-                    elif event_type == "content_block_delta":
-                        # Streaming text delta
-                        delta = event.get("delta", {})
-                        if delta.get("type") == "text_delta":
-                            text = delta.get("text", "")
-                            self.output_buffer += text
-                            console.print(text, end="")
-                    
-                    elif event_type == "result":
-                        # Final result - check is_error flag and result text
-                        result_text = event.get("result", "")
-                        is_error = event.get("is_error", False)
-                        
-                        if result_text:
-                            if result_text not in self.output_buffer:
-                                self.output_buffer += result_text
-                                console.print(result_text, end="")
-                            
-                            # Check for rate limit in result
-                            if is_error or detect_rate_limit(result_text):
-                                if detect_rate_limit(result_text):
-                                    is_rate_limited = True
-                                    rate_limit_message = result_text
-                    
-                    elif event_type == "error":
-                        # Error message - check for rate limit
-                        error_msg = event.get("error", {})
-                        error_text = str(error_msg)
-                        console.print(f"\n[red]{error_text}[/red]")
-                        
-                        if detect_rate_limit(error_text):
-                            is_rate_limited = True
-                            rate_limit_message = error_text
-                    
-                    elif event_type == "system":
-                        # System message
-                        msg = event.get("message", "")
-                        if self.verbose:
-                            console.print(f"[dim]System: {event.get('subtype', '')}[/dim]")
-                        
-                        # Check for rate limit in system messages too
-                        if detect_rate_limit(str(msg)):
-                            is_rate_limited = True
-                            rate_limit_message = str(msg)
-                    
-                except json.JSONDecodeError:
-                    # Not JSON - might be plain text or error
-                    self.output_buffer += line + "\n"
-                    console.print(line)
-                    
-                    # Check for rate limit in plain text
-                    if detect_rate_limit(line):
-                        is_rate_limited = True
-                        rate_limit_message = line
+                self._process_line(line)
             
-            process.wait()
+            await process.wait()
             
-            # Check for completion in final output
-            if detect_completion(self.output_buffer):
+            # Completion was detected while streaming
+            if self._completion.found:
                 is_complete = True
             
-            # Store rate limit message for parsing
-            if is_rate_limited:
-                self.output_buffer += f"\n{rate_limit_message}"
+            rate_limit = self.rate_limit_signal
+            if rate_limit and rate_limit.confidence >= RATE_LIMIT_MIN_CONFIDENCE:
+                is_rate_limited = True
+                # Store rate limit message for parsing
+                self.output_buffer.append(f"\n{rate_limit.message}")
+            elif rate_limit and self.verbose:
+                self._print(
+                    f"\n[dim]Ignoring low-confidence rate limit signal "
+                    f"({rate_limit.channel}, {rate_limit.confidence:.2f})[/dim]"
+                )
             
         except Exception as e:
-            console.print(f"\n[red]Error running Claude: {e}[/red]")
+            self._print(f"\n[red]Error running Claude: {e}[/red]")
+            self._emit("error", message=f"Error running Claude: {e}")
             if self.verbose:
                 import traceback
                 console.print(traceback.format_exc())
+        finally:
+            self.renderer.stop()
+            if self._grace_timer:
+                self._grace_timer.cancel()
+                self._grace_timer = None
+            self._process = None
         
         return self.output_buffer, is_complete, is_rate_limited
     
+    def _process_line(self, raw_line: bytes) -> None:
+        """Handle one line of Claude's stream-json output."""
+        try:
+            event_type, event = self.decoder.decode(raw_line)
+        except ValueError:
+            # Not JSON - might be plain text or error from the CLI
+            line = raw_line.decode("utf-8", errors="replace")
+            self._append_output(line + "\n")
+            self._echo(line, end="\n")
+            
+            # Check for rate limit in plain text, which may span lines
+            match = self.rate_limit_matcher.feed(line + "\n")
+            if match:
+                self._record_rate_limit_signal(RateLimitSignal(
+                    channel="plain",
+                    confidence=RATE_LIMIT_CONFIDENCE["plain"],
+                    message=line,
+                    match=match,
+                ))
+            return
+        
+        if event is None:
+            return
+        
+        # Handle different event types
+        if event_type == "assistant":
+            # Assistant message content
+            message = event.get("message", {})
+            content_blocks = message.get("content", [])
+            self.output_buffer.start_message(message.get("id"))
+            
+            if message.get("usage") and message.get("id"):
+                # Each content block repeats its message's usage, so key by id
+                self._live_usage[message["id"]] = Usage.from_usage(message["usage"])
+                self._check_live_budget()
+            for block in content_blocks:
+                if block.get("type") == "text":
+                    text = block.get("text", "")
+                    self._append_output(text)
+                    self._echo(text)
+        
+        elif event_type == "content_block_delta":
+            # Streaming text delta
+            delta = event.get("delta", {})
+            if delta.get("type") == "text_delta":
+                text = delta.get("text", "")
+                self._append_output(text)
+                self._echo(text)
+        
+        elif event_type == "result":
+            self._run_usage = Usage.from_result(event)
+            self._window_tokens += self._run_usage.total_tokens
+            self._run_succeeded = not event.get("is_error", False)
+            
+            # Final result text
+            result_text = event.get("result", "")
+            
+            if result_text:
+                if not self.output_buffer.contains_block(result_text):
+                    self._append_output(result_text)
+                    self._echo(result_text)
+        
+        elif event_type == "error":
+            # Error message
+            error_text = str(event.get("error", {}))
+            self._print(f"\n[red]{error_text}[/red]")
+            self._emit("error", message=error_text)
+        
+        elif event_type == "system":
+            # System message
+            if self.verbose:
+                self._print(f"[dim]System: {event.get('subtype', '')}[/dim]")
+            if event.get("subtype") == "init" and event.get("session_id"):
+                self._on_claude_session(event["session_id"])
+        
+        # Structured fields first, regex only on error channels
+        self._record_rate_limit_signal(
+            detect_event_rate_limit(event, self.rate_limit_matcher)
+        )
+    
+    def _on_claude_session(self, claude_session_id: str) -> None:
+        """Remember the conversation Claude is running, to resume it later."""
+        self._run_session_id = claude_session_id
+        if self.session and self.session.claude_session_id != claude_session_id:
+            self.session.claude_session_id = claude_session_id
+            self._save_session()
+    
+    def _resume_failed(self, is_complete: bool, is_rate_limited: bool) -> bool:
+        """
+        Check whether Claude rejected the conversation id it was resumed with.
+        
+        A process started with --resume that never reports an init event
+        (and wasn't limited or stalled) couldn't open the conversation,
+        e.g. because it was deleted or belongs to another directory.
+        """
+        return bool(
+            self._resumed_id
+            and not self._run_session_id
+            and not is_complete
+            and not is_rate_limited
+            and not self.stall
+        )
+    
+    def _current_run_usage(self) -> Usage:
+        """Usage of the current Claude process so far."""
+        if self._run_usage is not None:
+            return self._run_usage
+        
+        # No result event (yet): sum the per-message usage seen so far
+        usage = Usage(runs=1)
+        for message_usage in self._live_usage.values():
+            usage.add(message_usage)
+        return usage
+    
+    def _check_live_budget(self) -> None:
+        """Stop Claude mid-run once a token budget is used up."""
+        if not (self.prompt_budget or self.session_budget) or not self.session:
+            return
+        
+        live = self._current_run_usage()
+        prompt_usage = Usage()
+        prompt_usage.add(self.session.current_prompt_usage())
+        prompt_usage.add(live)
+        session_usage = Usage()
+        session_usage.add(self.session.usage)
+        session_usage.add(live)
+        
+        if self.prompt_budget.exceeded(prompt_usage) or self.session_budget.exceeded(session_usage):
+            self._terminate_process()
+    
+    def _budget_exceeded(self) -> Optional[str]:
+        """Describe the budget the session or current prompt has used up, if any."""
+        reason = self.session_budget.exceeded(self.session.usage)
+        if reason:
+            return f"Session budget reached: {reason}"
+        reason = self.prompt_budget.exceeded(self.session.current_prompt_usage())
+        if reason:
+            return f"Prompt budget reached ({self.session.get_current_prompt_name()}): {reason}"
+        return None
+    
+    def _stop_over_budget(self, reason: str) -> bool:
+        """Stop the session because a budget was used up. Returns False."""
+        self.session.status = "over_budget"
+        self._save_session()
+        
+        self._print(f"\n[red]{reason}. Stopping.[/red]")
+        self._print("[dim]Raise the limit and use 'tempo resume' to continue.[/dim]")
+        if self.transcript:
+            self.transcript.log_error(reason)
+            self.transcript.log_session_end("over_budget")
+        self._emit("error", message=reason)
+        self._emit("session_end", status="over_budget", cycles=self.session.cycle_count)
+        return False
+    
+    def _record_usage(self) -> None:
+        """Add the finished Claude process's usage to the session."""
+        usage = self._current_run_usage()
+        if not usage.total_tokens and not usage.cost_usd:
+            return
+        
+        self.session.record_usage(usage, continuation=self._run_continuation)
+        self._save_session()
+        if self.transcript:
+            self.transcript.log_usage(usage, self.session.usage)
+        self._emit(
+            "usage",
+            prompt=self.session.get_current_prompt_name(),
+            cycle=self.session.cycle_count,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_creation_tokens=usage.cache_creation_tokens,
+            cache_read_tokens=usage.cache_read_tokens,
+            cache_hit_rate=None if usage.cache_hit_rate is None else round(usage.cache_hit_rate, 4),
+            cost_usd=round(usage.cost_usd, 6),
+            session_cost_usd=round(self.session.usage.cost_usd, 6),
+        )
+    
+    def _record_rate_limit_signal(self, signal: Optional[RateLimitSignal]) -> None:
+        """Keep the most confident rate limit signal seen this cycle."""
+        if signal is None:
+            return
+        if self.rate_limit_signal is None or signal.confidence > self.rate_limit_signal.confidence:
+            self.rate_limit_signal = signal
+    
+    def _append_output(self, text: str) -> None:
+        """Add text to the output buffer and watch it for the completion code."""
+        self.output_buffer.append(text)
+        
+        if not self._completion.found and self._completion.feed(text):
+            self._on_completion_detected()
+    
+    def _on_completion_detected(self) -> None:
+        """Give Claude a grace period to finish, then stop the child process."""
+        if self.verbose:
+            self._print(
+                f"\n[dim]Completion marker seen, stopping Claude in "
+                f"{self.completion_grace:g}s...[/dim]"
+            )
+        
+        loop = asyncio.get_running_loop()
+        self._grace_timer = loop.call_later(self.completion_grace, self._terminate_process)
+    
+    def _terminate_process(self) -> None:
+        """Terminate the running Claude process group if it is still alive."""
+        process = self._process
+        if process and process.returncode is None:
+            _signal_process_group(process, signal.SIGTERM)
+    
+    def _read_timeout(self, started: float, last_output: float, now: float) -> Optional[float]:
+        """Seconds the next read may block before the watchdog fires."""
+        deadlines = []
+        if self.stall_timeout > 0:
+            deadlines.append(last_output + self.stall_timeout)
+        if self.cycle_timeout > 0:
+            deadlines.append(started + self.cycle_timeout)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+    
+    def _classify_stall(self, started: float, last_output: float, now: float) -> Tuple[str, float]:
+        """Work out which watchdog limit was hit."""
+        if self.cycle_timeout > 0 and now - started >= self.cycle_timeout:
+            return "cycle_timeout", now - started
+        return "inactivity", now - last_output
+    
+    async def _kill_process(self, process: asyncio.subprocess.Process) -> None:
+        """Stop a hung process group: SIGTERM, then SIGKILL if it lingers."""
+        _signal_process_group(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), KILL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            # Windows has no SIGKILL; SIGTERM already terminates the process there
+            _signal_process_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+            await process.wait()
+    
     def _save_session(self) -> None:
         """Save current session state."""
         if self.session:
-            self.session.last_output_chunk = self.output_buffer[-2000:] if self.output_buffer else ""
+            self.session.last_output_chunk = self.output_buffer.tail(2000)
             self.session_manager.save(self.session)
     
-    def _handle_rate_limit(self, output: str) -> None:
+    async def _handle_rate_limit(self, output: OutputBuffer) -> None:
         """Handle rate limit by waiting and preparing to resume."""
         self.session.status = "rate_limited"
         self.session.increment_cycle()
+        if self.rate_limit_signal:
+            self.session.rate_limit_channel = self.rate_limit_signal.channel
+            self.session.rate_limit_confidence = self.rate_limit_signal.confidence
         self._save_session()
         
-        rate_limit_info = parse_reset_time(output)
+        # The rate limit message is appended last, so the tail is enough
+        rate_limit_info = parse_reset_time(output.tail(RESET_SCAN_CHARS))
+        
+        self._pending_limit_id = self.history.record_limit(
+            project=str(self.project_dir),
+            session_id=self.session.session_id,
+            cycle=self.session.cycle_count,
+            channel=self.rate_limit_signal.channel if self.rate_limit_signal else None,
+            reset_at=rate_limit_info.reset_time.timestamp() if rate_limit_info else None,
+            tokens=self._window_tokens,
+        )
+        self._window_tokens = 0
+        
+        signal = self.rate_limit_signal
+        self._emit(
+            "rate_limit",
+            cycle=self.session.cycle_count,
+            reset_time=rate_limit_info.reset_time.isoformat() if rate_limit_info else None,
+            channel=signal.channel if signal else None,
+            confidence=signal.confidence if signal else None,
+        )
         
         if rate_limit_info:
+            await self.quota.publish_reset_async(rate_limit_info.reset_time)
             reset_time_str = rate_limit_info.reset_time.strftime("%I:%M %p %Z")
             
             if self.transcript:
-                self.transcript.log_rate_limit(reset_time_str, self.session.cycle_count)
+                self.transcript.log_rate_limit(
+                    reset_time_str, self.session.cycle_count, self._describe_rate_limit_signal()
+                )
             
-            wait_until_reset(rate_limit_info)
+            self._emit("wait_start", seconds=round(calculate_wait_seconds(rate_limit_info)), reason="reset_time")
+            self._print("[dim]Run 'tempo wake' to resume early if the limit is lifted sooner.[/dim]")
+            woken = await wait_until_reset_async(
+                rate_limit_info,
+                show_progress=not self.label,
+                quiet=self.emitter is not None,
+                wake_dir=self.wake_dir,
+            )
         else:
-            # Couldn't parse reset time, use fallback
-            console.print(
-                "[yellow]Couldn't parse reset time, using fallback wait (4.5 hours)...[/yellow]"
+            # Couldn't parse reset time, probe until the limit lifts
+            self._print(
+                "[yellow]Couldn't parse reset time, probing for the limit to lift...[/yellow]"
             )
             if self.transcript:
-                self.transcript.log_rate_limit("unknown (4.5h fallback)", self.session.cycle_count)
+                self.transcript.log_rate_limit(
+                    "unknown (probing)", self.session.cycle_count, self._describe_rate_limit_signal()
+                )
             
-            wait_seconds_with_progress(
-                FALLBACK_WAIT_SECONDS,
-                "Waiting for rate limit reset...",
-            )
+            self._emit("wait_start", seconds=FALLBACK_WAIT_SECONDS, reason="probing")
+            self._print("[dim]Run 'tempo wake' to resume early if the limit is lifted sooner.[/dim]")
+            woken = await self._wait_with_probes()
         
+        self._emit("wait_end", cycle=self.session.cycle_count, woken=woken)
         if self.transcript:
             self.transcript.log_resume()
     
+    async def _wait_for_shared_reset(self) -> None:
+        """Wait if another tempo process on this account is rate limited."""
+        wake_at = await self.quota.claim_wait_async()
+        if wake_at is None:
+            return
+        
+        seconds = wake_at - time.time()
+        self._print(
+            f"\n[yellow]Another tempo process hit the rate limit; waiting until "
+            f"{datetime.fromtimestamp(wake_at).strftime('%I:%M:%S %p')}.[/yellow]"
+        )
+        self._emit("wait_start", seconds=round(seconds), reason="shared")
+        woken = await wait_seconds_async(
+            seconds,
+            "Waiting for shared rate limit reset...",
+            show_progress=not self.label,
+            quiet=self.emitter is not None,
+            wake_dir=self.wake_dir,
+        )
+        self._emit("wait_end", cycle=self.session.cycle_count, woken=woken)
+    
+    async def _wait_with_probes(self) -> bool:
+        """
+        Wait out a rate limit whose reset time is unknown.
+        
+        Probes are spaced with exponential backoff, starting at
+        PROBE_INITIAL_DELAY_SECONDS and capped at PROBE_MAX_DELAY_SECONDS.
+        The wait ends as soon as a probe gets through. If a probe's rate
+        limit message does include a reset time, that time is waited for
+        instead. Once PROBE_MAX_PER_WINDOW probes are spent, the rest of the
+        FALLBACK_WAIT_SECONDS window is waited out.
+        
+        With enough rate limit history, the first probe and the window
+        come from how long past limits lasted instead of the constants.
+        
+        Returns:
+            True if the wait was ended early by a wake-up
+        """
+        window = FALLBACK_WAIT_SECONDS
+        delay = PROBE_INITIAL_DELAY_SECONDS
+        
+        prediction = self.history.predict_wait()
+        if prediction:
+            # Never probe more often than once a minute
+            delay = max(60.0, prediction.first_probe)
+            window = max(prediction.max_wait, delay)
+            self._print(
+                f"[dim]From {prediction.samples} past rate limits: first probe in "
+                f"{format_duration(delay)}, giving up after {format_duration(window)}.[/dim]"
+            )
+        deadline = time.time() + window
+        
+        for attempt in range(1, PROBE_MAX_PER_WINDOW + 1):
+            delay = min(delay, deadline - time.time())
+            if delay <= 0:
+                return False
+            
+            if await wait_seconds_async(
+                delay,
+                f"Waiting to probe rate limit ({attempt}/{PROBE_MAX_PER_WINDOW})...",
+                show_progress=not self.label,
+                quiet=self.emitter is not None,
+                wake_dir=self.wake_dir,
+            ):
+                return True
+            
+            outcome, rate_limit_info = await self._probe()
+            self.session.record_probe(outcome, attempt)
+            self._save_session()
+            if self.transcript:
+                self.transcript.log_probe(outcome, attempt, PROBE_MAX_PER_WINDOW)
+            self._emit("probe", outcome=outcome, attempt=attempt, cycle=self.session.cycle_count)
+            
+            if outcome == "lifted":
+                self._print("[green]✓ Probe got through, the rate limit has lifted.[/green]")
+                return False
+            
+            if rate_limit_info:
+                self._print("[dim]Probe reported the reset time.[/dim]")
+                await self.quota.publish_reset_async(rate_limit_info.reset_time)
+                return await wait_until_reset_async(
+                    rate_limit_info,
+                    show_progress=not self.label,
+                    quiet=self.emitter is not None,
+                    wake_dir=self.wake_dir,
+                )
+            
+            delay = min(delay * PROBE_BACKOFF, PROBE_MAX_DELAY_SECONDS)
+            self._print(
+                f"[dim]Probe {attempt}/{PROBE_MAX_PER_WINDOW}: "
+                f"{'still rate limited' if outcome == 'limited' else 'failed'}.[/dim]"
+            )
+        
+        remaining = deadline - time.time()
+        self._print(
+            f"[yellow]Probe budget spent, waiting out the remaining "
+            f"{format_duration(max(0, remaining))}...[/yellow]"
+        )
+        return await wait_seconds_async(
+            remaining,
+            "Waiting for rate limit reset...",
+            show_progress=not self.label,
+            quiet=self.emitter is not None,
+            wake_dir=self.wake_dir,
+        )
+    
+    async def _probe(self) -> Tuple[str, Optional[RateLimitInfo]]:
+        """
+        Send a minimal prompt to check whether the rate limit has lifted.
+        
+        The probe runs in a scratch directory, so it doesn't become the
+        project's most recent conversation (which --continue would pick up).
+        
+        Returns:
+            ("lifted" | "limited" | "error", reset time from the probe's
+            rate limit message, if any)
+        """
+        cmd = [
+            "claude", "--print", "--output-format", "stream-json", "--verbose",
+            "--max-turns", "1", PROBE_PROMPT,
+        ]
+        try:
+            with tempfile.TemporaryDirectory(prefix="tempo-probe-") as cwd:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    cwd=cwd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    limit=STREAM_LINE_LIMIT,
+                    start_new_session=True,
+                )
+                try:
+                    output, _ = await asyncio.wait_for(process.communicate(), PROBE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    await self._kill_process(process)
+                    return "error", None
+        except Exception as e:
+            if self.verbose:
+                self._print(f"[dim]Probe failed: {e}[/dim]")
+            return "error", None
+        
+        got_result = False
+        best: Optional[RateLimitSignal] = None
+        for line in output.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event_type, event = self.decoder.decode(line)
+            except ValueError:
+                text = line.decode("utf-8", errors="replace")
+                match = self.rate_limit_matcher.search(text)
+                signal = RateLimitSignal(
+                    channel="plain",
+                    confidence=RATE_LIMIT_CONFIDENCE["plain"],
+                    message=text,
+                    match=match,
+                ) if match else None
+            else:
+                if event is None:
+                    continue
+                if event_type == "result" and not event.get("is_error", False):
+                    got_result = True
+                signal = detect_event_rate_limit(event, self.rate_limit_matcher)
+            
+            if signal and (best is None or signal.confidence > best.confidence):
+                best = signal
+        
+        if best and best.confidence >= RATE_LIMIT_MIN_CONFIDENCE:
+            return "limited", parse_reset_time(best.message)
+        if got_result:
+            return "lifted", None
+        return "error", None
+    
+    def _handle_stall(self, attempt: int) -> bool:
+        """
+        Record a stalled Claude process.
+        
+        Returns:
+            True to continue the conversation, False if too many stalls in a
+            row and the session was stopped
+        """
+        reason, seconds = self.stall
+        stall = self.session.record_stall(reason, seconds)
+        
+        what = "No output" if reason == "inactivity" else "Cycle time limit reached"
+        self._print(f"\n[yellow]⚠ {what} after {seconds:.0f}s, stopped Claude.[/yellow]")
+        self._emit("stall", reason=reason, seconds=stall.seconds, attempt=attempt)
+        if self.transcript:
+            self.transcript.log_stall(reason, seconds, attempt)
+        
+        if attempt < MAX_CONSECUTIVE_STALLS:
+            self._save_session()
+            self._print("[dim]Continuing the conversation...[/dim]")
+            return True
+        
+        self.session.status = "stalled"
+        self._save_session()
+        self._print(
+            f"[red]Claude stalled {attempt} times in a row, giving up.[/red]\n"
+            "[dim]Use 'tempo resume' to try again.[/dim]"
+        )
+        if self.transcript:
+            self.transcript.log_error(f"Stalled {attempt} times in a row")
+            self.transcript.log_session_end("stalled")
+        self._emit("error", message=f"Stalled {attempt} times in a row")
+        self._emit("session_end", status="stalled", cycles=self.session.cycle_count)
+        return False
+    
+    def _describe_rate_limit_signal(self) -> Optional[str]:
+        """Describe how the current rate limit was detected."""
+        signal = self.rate_limit_signal
+        if not signal:
+            return None
+        return f"{signal.channel} (confidence {signal.confidence:.2f})"
+    
     def run(
         self,
         prompt: Optional[str] = None,
@@ -291,39 +1001,72 @@ class TempoRunner:
         Returns:
             True if completed successfully, False otherwise
         """
-        self._setup_signal_handlers()
+        return asyncio.run(cancel_on_signal([self], self.run_async(prompt=prompt, resume=resume)))
+    
+    async def run_async(
+        self,
+        prompt: Optional[str] = None,
+        resume: bool = False,
+    ) -> bool:
+        """
+        Run the automation loop on the current event loop.
         
+        Same as run(), but doesn't install signal handlers, so several
+        runners can be driven concurrently.
+        """
         # Load or create session
         if resume:
             self.session = self.session_manager.load()
             if not self.session:
-                console.print("[red]No existing session found to resume.[/red]")
+                self._print("[red]No existing session found to resume.[/red]")
+                self._emit("error", message="No existing session found to resume.")
                 return False
-            console.print(f"[green]Resuming session {self.session.session_id}...[/green]")
+            self._print(f"[green]Resuming session {self.session.session_id}...[/green]")
             prompt = self.session.get_current_prompt()
         else:
             if not prompt:
-                console.print("[red]No prompt provided.[/red]")
+                self._print("[red]No prompt provided.[/red]")
+                self._emit("error", message="No prompt provided.")
                 return False
             
             # Check for existing session
             if self.session_manager.exists():
                 existing = self.session_manager.load()
                 if existing and existing.status not in ("completed", "failed"):
-                    console.print(
+                    self._print(
                         f"[yellow]Existing session found ({existing.session_id}). "
                         f"Use --resume to continue or --force to start fresh.[/yellow]"
                     )
+                    self._emit("error", message=f"Existing session found ({existing.session_id})")
                     return False
             
             self.session = self.session_manager.create_new(prompt=prompt)
-            console.print(f"[green]Created session {self.session.session_id}[/green]")
+            self._print(f"[green]Created session {self.session.session_id}[/green]")
         
+        self._emit("session_start", resumed=resume, project=str(self.project_dir))
+        return await self._run_loop(resume=resume)
+    
+    async def _run_loop(self, resume: bool = False) -> bool:
+        """Drive the loaded session, then make sure its state is on disk."""
+        try:
+            return await self._drive_session(resume=resume)
+        finally:
+            self.session_manager.close()
+            if self.transcript:
+                self.transcript.close()
+    
+    async def _drive_session(self, resume: bool = False) -> bool:
+        """Drive the loaded session until it completes or stops."""
         # Create transcript
-        self.transcript = TranscriptWriter(str(self.project_dir), self.session.session_id)
+        self.transcript = TranscriptWriter(
+            str(self.project_dir),
+            self.session.session_id,
+            session=self.session,
+            search=self.search_index,
+        )
         
         # Print banner
-        console.print(
+        self._print(
             Panel(
                 f"[bold]Tempo[/bold] - Automated Claude Code Runner\n\n"
                 f"Session: {self.session.session_id}\n"
@@ -334,11 +1077,26 @@ class TempoRunner:
             )
         )
         
+        # Sequences with depends_on edges run as a DAG of parallel steps
+        if self.session.is_dag():
+            return await self._run_dag()
+        
         is_continuation = self.session.cycle_count > 0 or resume
         original_prompt = self.session.get_current_prompt()
+        consecutive_stalls = 0
         
         # Main automation loop
         while not self._shutdown_requested:
+            # A resumed session may already be over budget
+            reason = self._budget_exceeded()
+            if reason:
+                return self._stop_over_budget(reason)
+            
+            # Don't spawn a doomed Claude if another process hit the limit
+            await self._wait_for_shared_reset()
+            if self._shutdown_requested:
+                break
+            
             self.session.status = "running"
             self._save_session()
             
@@ -348,38 +1106,61 @@ class TempoRunner:
                     self.session.get_current_prompt_name(),
                 )
             
-            console.print(f"\n[blue]{'Continuing' if is_continuation else 'Sending'} prompt...[/blue]\n")
-            console.print("─" * 60)
+            self._print(f"\n[blue]{'Continuing' if is_continuation else 'Sending'} prompt...[/blue]\n")
+            self._emit(
+                "prompt_start",
+                prompt=self.session.get_current_prompt_name(),
+                cycle=self.session.cycle_count,
+                continuation=is_continuation,
+            )
+            self._echo("─" * 60, end="\n")
             
             # Run Claude
-            output, is_complete, is_rate_limited = self._run_claude(
+            output, is_complete, is_rate_limited = await self._run_claude(
                 original_prompt,
                 is_continuation=is_continuation,
             )
             
-            console.print("\n" + "─" * 60)
+            self._echo("\n" + "─" * 60, end="\n")
             
             # Log output
             if self.transcript:
                 self.transcript.log_output(output)
+            self._record_usage()
+            budget_reason = None if is_complete else self._budget_exceeded()
+            
+            if not self.stall:
+                consecutive_stalls = 0
+            
+            # The first run after a rate limit that Claude actually answered
+            # tells the history how long the limit really lasted; errors,
+            # stalls and runs without a result prove nothing
+            if not is_rate_limited and (is_complete or self._run_succeeded):
+                self.history.record_resume(self._pending_limit_id)
+                self._pending_limit_id = None
             
             # Handle result
             if is_complete:
+                completed_name = self.session.get_current_prompt_name()
+                self._emit("completion", prompt=completed_name)
                 has_more = self.session.mark_current_complete()
+                if has_more:
+                    # The next prompt starts a conversation of its own
+                    self.session.claude_session_id = ""
                 self._save_session()
                 
                 if self.transcript:
-                    self.transcript.log_complete(self.session.get_current_prompt_name())
+                    self.transcript.log_complete(completed_name)
                 
                 if has_more:
-                    console.print(
+                    self._print(
                         f"\n[green]✓ Task complete. Moving to next prompt...[/green]"
                     )
                     is_continuation = False
                     original_prompt = self.session.get_current_prompt()
                     continue
                 else:
-                    console.print(
+                    self._print(
                         Panel(
                             "[bold green]All tasks completed![/bold green]\n\n"
                             f"Session: {self.session.session_id}\n"
@@ -391,24 +1172,47 @@ class TempoRunner:
                     )
                     if self.transcript:
                         self.transcript.log_session_end("completed")
+                    self._emit("session_end", status="completed", cycles=self.session.cycle_count)
                     return True
                     
+            elif budget_reason:
+                # Over budget mid-prompt: don't wait or continue
+                return self._stop_over_budget(budget_reason)
+            
+            elif self._resume_failed(is_complete, is_rate_limited):
+                # Forget the id; the next attempt falls back to --continue
+                self._print(
+                    f"\n[yellow]Couldn't resume conversation {self._resumed_id}, "
+                    f"continuing the most recent one instead.[/yellow]"
+                )
+                self._emit("error", message=f"Could not resume conversation {self._resumed_id}")
+                self.session.claude_session_id = ""
+                self._save_session()
+                continue
+            
             elif is_rate_limited:
-                console.print("\n[yellow]Rate limit detected.[/yellow]")
-                self._handle_rate_limit(output)
+                self._print("\n[yellow]Rate limit detected.[/yellow]")
+                await self._handle_rate_limit(output)
                 is_continuation = True
                 continue
+            
+            elif self.stall:
+                consecutive_stalls += 1
+                if self._handle_stall(consecutive_stalls):
+                    is_continuation = True
+                    continue
+                return False
                 
             else:
                 # Process exited without completion or rate limit
                 # Could be an error or Claude just finished without the marker
-                console.print(
+                self._print(
                     "\n[yellow]Claude exited without completion marker.[/yellow]"
                 )
                 
                 # Check if this looks like a successful completion anyway
-                if "error" not in output.lower() and len(output) > 100:
-                    console.print(
+                if "error" not in output.tail().lower() and len(output) > 100:
+                    self._print(
                         "[dim]Task may be complete - Claude didn't output the completion marker.\n"
                         "Use 'tempo resume' to continue, or 'tempo clear' to start fresh.[/dim]"
                     )
@@ -419,11 +1223,224 @@ class TempoRunner:
                 if self.transcript:
                     self.transcript.log_error("Exited without completion marker")
                     self.transcript.log_session_end("uncertain")
+                self._emit("error", message="Exited without completion marker")
+                self._emit("session_end", status="uncertain", cycles=self.session.cycle_count)
                 
                 return False
         
+        self._emit("session_end", status=self.session.status, cycles=self.session.cycle_count)
         return False
     
+    async def _run_dag(self) -> bool:
+        """
+        Run a dependency-aware sequence.
+        
+        Every prompt whose dependencies are complete runs in its own git
+        worktree, up to self.concurrency at a time. A finished node's
+        worktree is committed and merged back into the project before its
+        dependents start, so they branch from a tree that includes its work.
+        Per-node state is saved in the session, so `tempo resume` restarts
+        only the nodes that didn't finish.
+        """
+        if not await is_git_repo(self.project_dir):
+            self._print("[red]Sequences with depends_on need a git repository with at least one commit.[/red]")
+            self._emit("error", message="Sequences with depends_on need a git repository")
+            self.session.status = "failed"
+            self._save_session()
+            return False
+        
+        self.session.reset_unfinished_prompts()
+        self.session.status = "running"
+        self._save_session()
+        
+        self._git_lock = asyncio.Lock()
+        running: dict = {}
+        over_budget = None
+        try:
+            while running or not self._shutdown_requested:
+                # Once the session budget is used up or a shutdown is
+                # requested, let running steps finish but don't start new ones
+                over_budget = over_budget or self.session_budget.exceeded(self.session.usage)
+                stopping = over_budget or self._shutdown_requested
+                for index in [] if stopping else self.session.ready_prompts():
+                    if len(running) >= self.concurrency:
+                        break
+                    task = asyncio.ensure_future(self._run_dag_node(index))
+                    running[task] = index
+                
+                if not running:
+                    break
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = running.pop(task)
+                    try:
+                        success = task.result()
+                    except Exception as e:
+                        # One broken step fails on its own; the others carry on
+                        self.session.prompts[index].error = f"{type(e).__name__}: {e}"
+                        success = False
+                    await self._finish_dag_node(index, success)
+        finally:
+            # Tasks are only left over if this coroutine itself was cancelled
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        
+        if self._shutdown_requested and not all(p.completed for p in self.session.prompts):
+            # Interrupted steps stay running, so `tempo resume` restarts them
+            self._save_session()
+            self._emit("session_end", status=self.session.status)
+            return False
+        
+        if all(p.completed for p in self.session.prompts):
+            self.session.status = "completed"
+            self._save_session()
+            self._print(
+                Panel(
+                    "[bold green]All tasks completed![/bold green]\n\n"
+                    f"Session: {self.session.session_id}\n"
+                    f"Steps: {len(self.session.prompts)}\n"
+                    f"Transcript: {self.transcript.get_path()}",
+                    title="✅ Complete",
+                    border_style="green",
+                )
+            )
+            if self.transcript:
+                self.transcript.log_session_end("completed")
+            self._emit("session_end", status="completed")
+            return True
+        
+        failed = [p.name for p in self.session.prompts if p.status == "failed"]
+        if over_budget:
+            return self._stop_over_budget(f"Session budget reached: {over_budget}")
+        
+        self.session.status = "failed" if failed else "uncertain"
+        self._save_session()
+        
+        if failed:
+            self._print(f"\n[red]Steps failed: {', '.join(failed)}[/red]")
+            self._print("[dim]Fix the problem, then use 'tempo resume' to retry unfinished steps.[/dim]")
+        if self.transcript:
+            self.transcript.log_session_end(self.session.status)
+        self._emit("session_end", status=self.session.status, failed=failed or None)
+        return False
+    
+    async def _run_dag_node(self, index: int) -> bool:
+        """Run one DAG node in its worktree. Returns True if it completed."""
+        item = self.session.prompts[index]
+        
+        try:
+            async with self._git_lock:
+                path, branch = await create_worktree(self.project_dir, self.session.session_id, item.name)
+        except WorktreeError as e:
+            item.error = str(e)
+            return False
+        
+        item.worktree = str(path)
+        item.branch = branch
+        self.session.mark_prompt_started(index)
+        self._save_session()
+        
+        if self.transcript:
+            self.transcript.log_prompt(item.prompt, item.name)
+        self._print(f"[blue]▶ Starting {item.name}[/blue]")
+        
+        node = TempoRunner(
+            str(path),
+            skip_permissions=self.skip_permissions,
+            verbose=self.verbose,
+            completion_grace=self.completion_grace,
+            rate_limit_patterns=self.rate_limit_patterns,
+            label=item.name,
+            emitter=self.emitter,
+            stall_timeout=self.stall_timeout,
+            cycle_timeout=self.cycle_timeout,
+            prompt_budget=self.prompt_budget,
+            quota=self.quota,
+            history=self.history,
+            registry=self.session_manager.registry,
+            search_index=self.search_index,
+        )
+        # Nodes wait in their worktrees, but wake with the main project
+        node.wake_dir = self.wake_dir
+        self._dag_nodes.append(node)
+        try:
+            # A node that was interrupted resumes its own conversation
+            existing = node.session_manager.load()
+            if existing and existing.status == "completed":
+                return True
+            if existing:
+                return await node.run_async(resume=True)
+            return await node.run_async(prompt=item.prompt)
+        finally:
+            self._dag_nodes.remove(node)
+            if node.session:
+                if node.session.status == "over_budget":
+                    item.error = "Prompt budget reached"
+                self._record_node_usage(index, node.session.usage)
+    
+    async def _remove_dag_worktree(self, path: Path, branch: str) -> None:
+        """Remove a merged node's worktree, moving its sessions and logs to the project."""
+        async with self._git_lock:
+            copied = await remove_worktree(self.project_dir, path, branch)
+        
+        # The node registered and indexed itself under the worktree path
+        source = path / SESSION_DIR / TRANSCRIPT_DIR
+        for log in copied:
+            if log.suffix == ".jsonl":
+                self.search_index.move_log(source / log.name, log, str(self.project_dir))
+        if self.session_manager.registry:
+            self.session_manager.registry.forget(str(path))
+    
+    def _record_node_usage(self, index: int, usage: Usage) -> None:
+        """Copy a DAG node's usage into its prompt and the session total."""
+        self.session.prompts[index].usage = usage
+        
+        total = Usage()
+        for prompt in self.session.prompts:
+            total.add(prompt.usage)
+        self.session.usage = total
+    
+    async def _finish_dag_node(self, index: int, success: bool) -> None:
+        """Merge a finished node back into the project and record its state."""
+        item = self.session.prompts[index]
+        
+        if success and item.worktree:
+            path = Path(item.worktree)
+            try:
+                async with self._git_lock:
+                    merged = await merge_worktree(self.project_dir, path, item.branch, item.name)
+            except WorktreeError as e:
+                merged = False
+                item.error = str(e)
+            
+            if merged:
+                await self._remove_dag_worktree(path, item.branch)
+                self.session.mark_prompt_complete(index)
+                if self.transcript:
+                    self.transcript.log_complete(item.name)
+                self._print(f"[green]✓ {item.name} complete and merged[/green]")
+                self._emit("completion", prompt=item.name, merged=True)
+            else:
+                self.session.mark_prompt_failed(
+                    index, item.error or f"Merge conflict merging {item.branch}; worktree kept at {path}"
+                )
+        elif self._shutdown_requested and not item.error:
+            # Stopped by an interrupt, not failed: left running for resume
+            return
+        else:
+            self.session.mark_prompt_failed(index, item.error or "Step did not complete")
+        
+        if item.status == "failed":
+            self._print(f"[red]✗ {item.name}: {item.error}[/red]")
+            self._emit("error", prompt=item.name, message=item.error)
+            if self.transcript:
+                self.transcript.log_error(f"{item.name}: {item.error}")
+        
+        self._save_session()
+    
     def run_sequence(self, prompts: list) -> bool:
         """
         Run a sequence of prompts.
@@ -434,15 +1451,19 @@ class TempoRunner:
         Returns:
             True if all prompts completed successfully
         """
-        self._setup_signal_handlers()
+        return asyncio.run(cancel_on_signal([self], self.run_sequence_async(prompts)))
+    
+    async def run_sequence_async(self, prompts: list) -> bool:
+        """
+        Run a sequence of prompts on the current event loop.
         
+        Same as run_sequence(), but doesn't install signal handlers.
+        """
         # Create session with prompt sequence
         self.session = self.session_manager.create_new(prompts=prompts)
-        console.print(f"[green]Created sequence session {self.session.session_id}[/green]")
-        console.print(f"[dim]Prompts: {len(prompts)}[/dim]")
-        
-        # Create transcript
-        self.transcript = TranscriptWriter(str(self.project_dir), self.session.session_id)
+        self._print(f"[green]Created sequence session {self.session.session_id}[/green]")
+        self._print(f"[dim]Prompts: {len(prompts)}[/dim]")
+        self._emit("session_start", resumed=False, project=str(self.project_dir), prompts=len(prompts))
         
         # Run using main loop
-        return self.run(prompt=self.session.get_current_prompt())
+        return await self._run_loop()
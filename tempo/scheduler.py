@@ -1,18 +1,50 @@
 """Scheduling utilities for waiting until reset time."""
 
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import signal
+import socket
+import sys
 import time
-from datetime import datetime, timedelta
-from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
-from dateutil import tz
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+from rich.progress import Progress, ProgressColumn, SpinnerColumn, Task, TimeElapsedColumn
+from rich.text import Text
 
-from tempo.config import RESET_BUFFER_SECONDS
+from tempo.config import RESET_BUFFER_SECONDS, WAIT_RECONCILE_SECONDS, WAKE_FILE, WAKE_SOCKET
 from tempo.parser import RateLimitInfo
 
 console = Console()
 
+# timerfd_create(2) constants
+_CLOCK_REALTIME = 0
+_TFD_NONBLOCK = 0o4000
+_TFD_CLOEXEC = 0o2000000
+_TFD_TIMER_ABSTIME = 1
+_TFD_TIMER_CANCEL_ON_SET = 2
+
+# inotify(7) constants
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
 
 def calculate_wait_seconds(rate_limit_info: RateLimitInfo) -> float:
     """
@@ -47,24 +79,388 @@ def format_duration(seconds: float) -> str:
     return " ".join(parts)
 
 
-def wait_until_reset(
-    rate_limit_info: RateLimitInfo,
-    check_interval: float = 60.0,
-) -> None:
+class _ClockTimer:
+    """
+    A one-shot timer for a wall-clock time, calling back on the event loop.
+    
+    On Linux it is a timerfd on CLOCK_REALTIME: it fires at the wall-clock
+    time even if the machine was suspended meanwhile, and fires early when
+    the clock is set, so the callback can check its deadlines again.
+    Elsewhere nothing reports a suspend or clock change, so the event
+    loop's monotonic timer is armed for at most WAIT_RECONCILE_SECONDS.
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback: Callable[[], None]):
+        self.loop = loop
+        self.callback = callback
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._libc = None
+        self._fd = -1
+        
+        if sys.platform.startswith("linux"):
+            try:
+                self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                self._fd = self._libc.timerfd_create(_CLOCK_REALTIME, _TFD_NONBLOCK | _TFD_CLOEXEC)
+            except (OSError, AttributeError):
+                self._fd = -1
+        if self._fd >= 0:
+            loop.add_reader(self._fd, self._fire)
+    
+    def arm(self, when: Optional[float]) -> None:
+        """Fire at a time.time() value, or never if None."""
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        
+        if self._fd >= 0:
+            spec = _Itimerspec()
+            if when is not None:
+                # An all-zero value disarms, so never pass exactly zero
+                spec.it_value.tv_sec = int(when)
+                spec.it_value.tv_nsec = max(1, int((when - int(when)) * 1e9))
+            flags = _TFD_TIMER_ABSTIME | _TFD_TIMER_CANCEL_ON_SET
+            if self._libc.timerfd_settime(self._fd, flags, ctypes.byref(spec), None) == 0:
+                return
+            # Not settable after all: fall back to the loop's timer
+            self.close()
+        
+        if when is not None:
+            delay = min(max(0.0, when - time.time()), WAIT_RECONCILE_SECONDS)
+            self._handle = self.loop.call_later(delay, self.callback)
+    
+    def _fire(self) -> None:
+        try:
+            os.read(self._fd, 8)
+        except OSError:
+            # ECANCELED: the clock was set, which is worth a check too
+            pass
+        self.callback()
+    
+    def close(self) -> None:
+        """Release the timer."""
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        if self._fd >= 0:
+            self.loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _WakeFileWatcher:
+    """
+    Calls back when a wake file appears in a watched directory.
+    
+    Uses Linux inotify through libc; where it isn't available, start()
+    returns False and the wake file is only checked when a wait's timer
+    fires.
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback: Callable[[], None]):
+        self.loop = loop
+        self.callback = callback
+        self._watches: Dict[Path, int] = {}
+        self._libc = None
+        self._fd = -1
+    
+    def start(self) -> bool:
+        """Set up inotify if possible. Returns True if directories can be watched."""
+        if self._fd >= 0:
+            return True
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return False
+        if self._fd < 0:
+            return False
+        self.loop.add_reader(self._fd, self._changed)
+        return True
+    
+    def watch(self, wake_dir: Path) -> bool:
+        """Watch a directory for its wake file. Returns True if watched."""
+        if wake_dir in self._watches:
+            return True
+        if not self.start():
+            return False
+        mask = _IN_CREATE | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(wake_dir)), mask)
+        if wd < 0:
+            return False
+        self._watches[wake_dir] = wd
+        return True
+    
+    def unwatch(self, wake_dir: Path) -> None:
+        """Stop watching a directory."""
+        wd = self._watches.pop(wake_dir, None)
+        if wd is not None:
+            self._libc.inotify_rm_watch(self._fd, wd)
+    
+    def _changed(self) -> None:
+        # Drain the queued events; the callback looks for the files itself
+        try:
+            while os.read(self._fd, 4096):
+                pass
+        except OSError:
+            pass
+        self.callback()
+    
+    def close(self) -> None:
+        """Stop watching everything."""
+        self._watches.clear()
+        if self._fd >= 0:
+            self.loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = -1
+
+
+@dataclass
+class _PendingWait:
+    """One wait managed by a WaitScheduler."""
+    
+    # Wall-clock (time.time()) deadline
+    deadline: float
+    future: asyncio.Future
+    wake_dir: Optional[Path] = None
+
+
+class WaitScheduler:
+    """
+    Manages any number of pending waits on a single wall-clock timer.
+    
+    Deadlines are wall-clock times, because rate limit resets are. The one
+    timer is armed for the earliest deadline; when it fires, or the clock
+    is set, every deadline is checked against the wall clock and the timer
+    re-armed. On Linux the timer follows the wall clock through suspends,
+    so a laptop that resumes after the reset time continues right away
+    (see _ClockTimer for other platforms).
+    
+    Waits can also end early ("the limit is back, go now"):
+    - SIGUSR1 wakes every pending wait in the process
+    - touching `.tempo/wake` wakes the waits for that project (watched
+      with inotify on Linux, otherwise seen at the next timer check)
+    - a message on the `.tempo/wake.sock` Unix socket does the same,
+      immediately (this is what `tempo wake` uses)
+    """
+    
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        
+        self._waits: List[_PendingWait] = []
+        self._timer: Optional[_ClockTimer] = None
+        self._wake_files = _WakeFileWatcher(self.loop, self._check_wake_files)
+        self._servers: Dict[Path, asyncio.AbstractServer] = {}
+        self._signal_installed = False
+    
+    async def wait_until(self, deadline: float, wake_dir: Optional[Path] = None) -> bool:
+        """
+        Wait until a wall-clock deadline.
+        
+        Args:
+            deadline: time.time() value to wait for
+            wake_dir: Directory watched for the wake file and socket
+        
+        Returns:
+            True if woken early, False if the deadline passed
+        """
+        wait = _PendingWait(
+            deadline=deadline,
+            future=self.loop.create_future(),
+            wake_dir=Path(wake_dir) if wake_dir else None,
+        )
+        if wait.wake_dir:
+            _consume_wake_file(wait.wake_dir)
+            await self._listen(wait.wake_dir)
+        
+        self._waits.append(wait)
+        self._install_signal()
+        self._arm()
+        
+        try:
+            return await wait.future
+        finally:
+            self._waits.remove(wait)
+            if wait.wake_dir and not any(w.wake_dir == wait.wake_dir for w in self._waits):
+                self._close_server(wait.wake_dir)
+            if not self._waits:
+                self._remove_signal()
+                self._wake_files.close()
+                if self._timer:
+                    self._timer.close()
+                    self._timer = None
+            self._arm()
+    
+    async def wait_for(self, seconds: float, **kwargs) -> bool:
+        """Wait for a number of seconds of wall-clock time."""
+        return await self.wait_until(time.time() + seconds, **kwargs)
+    
+    def wake(self, wake_dir: Optional[Path] = None) -> int:
+        """
+        End pending waits early.
+        
+        Args:
+            wake_dir: Only wake waits for this directory (all if None)
+        
+        Returns:
+            Number of waits woken
+        """
+        woken = 0
+        for wait in list(self._waits):
+            if wait.future.done():
+                continue
+            if wake_dir is None or wait.wake_dir == Path(wake_dir):
+                wait.future.set_result(True)
+                woken += 1
+        return woken
+    
+    def _arm(self) -> None:
+        """(Re)arm the timer for the earliest pending deadline."""
+        deadlines = [w.deadline for w in self._waits if not w.future.done()]
+        if not deadlines:
+            if self._timer:
+                self._timer.arm(None)
+            return
+        
+        if self._timer is None:
+            self._timer = _ClockTimer(self.loop, self._tick)
+        self._timer.arm(min(deadlines))
+    
+    def _tick(self) -> None:
+        """Check every wait against the wall clock."""
+        now = time.time()
+        for wait in self._waits:
+            if not wait.future.done() and wait.deadline <= now:
+                wait.future.set_result(False)
+        
+        self._check_wake_files()
+        self._arm()
+    
+    def _check_wake_files(self) -> None:
+        """Wake the waits of every directory with a wake file."""
+        for wake_dir in {w.wake_dir for w in self._waits if w.wake_dir and not w.future.done()}:
+            if (wake_dir / WAKE_FILE).exists():
+                _consume_wake_file(wake_dir)
+                self.wake(wake_dir)
+    
+    async def _listen(self, wake_dir: Path) -> None:
+        """Accept wake messages on the directory's Unix socket, and watch for its wake file."""
+        try:
+            wake_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return
+        self._wake_files.watch(wake_dir)
+        
+        if wake_dir in self._servers or not hasattr(asyncio, "start_unix_server"):
+            return
+        
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await reader.read(64)
+                writer.write(f"{self.wake(wake_dir)}\n".encode())
+                await writer.drain()
+            finally:
+                writer.close()
+        
+        path = wake_dir / WAKE_SOCKET
+        try:
+            if path.exists():
+                path.unlink()
+            self._servers[wake_dir] = await asyncio.start_unix_server(handle, path=str(path))
+        except (OSError, NotImplementedError):
+            # Path too long for a socket, or no Unix sockets: the wake
+            # file still works
+            pass
+    
+    def _close_server(self, wake_dir: Path) -> None:
+        """Stop listening on a directory's wake socket and watching its wake file."""
+        self._wake_files.unwatch(wake_dir)
+        server = self._servers.pop(wake_dir, None)
+        if server is None:
+            return
+        server.close()
+        try:
+            (wake_dir / WAKE_SOCKET).unlink()
+        except OSError:
+            pass
+    
+    def _install_signal(self) -> None:
+        """Wake everything on SIGUSR1 while waits are pending."""
+        if self._signal_installed or not hasattr(signal, "SIGUSR1"):
+            return
+        try:
+            self.loop.add_signal_handler(signal.SIGUSR1, self.wake)
+            self._signal_installed = True
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
+    
+    def _remove_signal(self) -> None:
+        """Restore default SIGUSR1 handling."""
+        if self._signal_installed:
+            self.loop.remove_signal_handler(signal.SIGUSR1)
+            self._signal_installed = False
+
+
+_scheduler: Optional[WaitScheduler] = None
+
+
+def get_scheduler() -> WaitScheduler:
+    """Get the shared WaitScheduler for the running event loop."""
+    global _scheduler
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler.loop is not loop:
+        _scheduler = WaitScheduler(loop)
+    return _scheduler
+
+
+def _consume_wake_file(wake_dir: Path) -> None:
+    """Remove a wake file so it only wakes the current waits."""
+    try:
+        (wake_dir / WAKE_FILE).unlink()
+    except OSError:
+        pass
+
+
+def wait_until_reset(rate_limit_info: RateLimitInfo) -> None:
     """
     Wait until the rate limit resets.
     
-    Displays a progress indicator and periodically logs status.
+    Displays a progress indicator with the time remaining.
+    
+    Args:
+        rate_limit_info: Parsed rate limit information
+    """
+    asyncio.run(wait_until_reset_async(rate_limit_info))
+
+
+async def wait_until_reset_async(
+    rate_limit_info: RateLimitInfo,
+    show_progress: bool = True,
+    quiet: bool = False,
+    wake_dir: Optional[Path] = None,
+) -> bool:
+    """
+    Wait until the rate limit resets without blocking the event loop.
     
     Args:
         rate_limit_info: Parsed rate limit information
-        check_interval: Seconds between status updates
+        show_progress: Show a live progress spinner (only one can be
+            active per terminal, so concurrent runners turn this off)
+        quiet: Print nothing at all (headless output modes)
+        wake_dir: Directory whose wake file/socket can end the wait early
+    
+    Returns:
+        True if the wait was ended early by a wake-up
     """
     wait_seconds = calculate_wait_seconds(rate_limit_info)
     
+    if quiet:
+        return await _sleep_with_progress(wait_seconds, str, False, wake_dir)
+    
     if wait_seconds <= 0:
         console.print("[green]Reset time has passed, continuing immediately...[/green]")
-        return
+        return False
     
     reset_time_str = rate_limit_info.reset_time.strftime("%I:%M %p")
     console.print(
@@ -73,30 +469,18 @@ def wait_until_reset(
     )
     console.print(f"[dim]Total wait: {format_duration(wait_seconds)}[/dim]\n")
     
-    start_time = time.time()
-    end_time = start_time + wait_seconds
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Waiting for rate limit reset...", total=None)
-        
-        while time.time() < end_time:
-            remaining = end_time - time.time()
-            progress.update(
-                task,
-                description=f"Waiting... {format_duration(remaining)} remaining",
-            )
-            
-            # Sleep in intervals so we can update the display
-            sleep_time = min(check_interval, remaining)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+    woken = await _sleep_with_progress(
+        wait_seconds,
+        lambda remaining: f"Waiting... {format_duration(remaining)} remaining",
+        show_progress,
+        wake_dir,
+    )
     
-    console.print("[green]✓ Wait complete, resuming...[/green]\n")
+    if woken:
+        console.print("[green]✓ Woken early, resuming...[/green]\n")
+    else:
+        console.print("[green]✓ Wait complete, resuming...[/green]\n")
+    return woken
 
 
 def wait_seconds_with_progress(seconds: float, message: str = "Waiting...") -> None:
@@ -105,33 +489,104 @@ def wait_seconds_with_progress(seconds: float, message: str = "Waiting...") -> N
     
     Useful for fixed waits (e.g., fallback when we can't parse reset time).
     """
+    asyncio.run(wait_seconds_async(seconds, message))
+
+
+async def wait_seconds_async(
+    seconds: float,
+    message: str = "Waiting...",
+    show_progress: bool = True,
+    quiet: bool = False,
+    wake_dir: Optional[Path] = None,
+) -> bool:
+    """
+    Wait for a number of seconds without blocking the event loop.
+    
+    Returns:
+        True if the wait was ended early by a wake-up
+    """
     if seconds <= 0:
-        return
+        return False
+    
+    if quiet:
+        return await _sleep_with_progress(seconds, str, False, wake_dir)
     
     console.print(f"\n[yellow]⏳ {message}[/yellow]")
     console.print(f"[dim]Duration: {format_duration(seconds)}[/dim]\n")
     
-    start_time = time.time()
-    end_time = start_time + seconds
+    woken = await _sleep_with_progress(
+        seconds,
+        lambda remaining: f"{message} {format_duration(remaining)} remaining",
+        show_progress,
+        wake_dir,
+    )
+    
+    console.print("[green]✓ Woken early[/green]\n" if woken else "[green]✓ Wait complete[/green]\n")
+    return woken
+
+
+class _RemainingColumn(ProgressColumn):
+    """Describes a wait from its deadline whenever the progress is drawn."""
+    
+    def __init__(self, deadline: float, describe: Callable[[float], str]):
+        super().__init__()
+        self.deadline = deadline
+        self.describe = describe
+    
+    def render(self, task: Task) -> Text:
+        return Text(self.describe(max(0.0, self.deadline - time.time())), style="progress.description")
+
+
+async def _sleep_with_progress(
+    seconds: float,
+    describe: Callable[[float], str],
+    show_progress: bool,
+    wake_dir: Optional[Path] = None,
+) -> bool:
+    """Wait on the shared scheduler, showing a progress spinner if requested."""
+    scheduler = get_scheduler()
     
+    if not show_progress:
+        return await scheduler.wait_for(seconds, wake_dir=wake_dir)
+    
+    # Rich redraws the spinner from its own thread, so the remaining time
+    # stays current without waking the event loop
+    deadline = time.time() + seconds
     with Progress(
         SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
+        _RemainingColumn(deadline, describe),
         TimeElapsedColumn(),
         console=console,
     ) as progress:
-        task = progress.add_task(message, total=None)
-        
-        while time.time() < end_time:
-            remaining = end_time - time.time()
-            progress.update(
-                task,
-                description=f"{message} {format_duration(remaining)} remaining",
-            )
-            
-            sleep_time = min(60.0, remaining)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-    
-    console.print("[green]✓ Wait complete[/green]\n")
+        progress.add_task("", total=None)
+        return await scheduler.wait_until(deadline, wake_dir=wake_dir)
 
+
+def send_wake(wake_dir: Path) -> bool:
+    """
+    Ask a running tempo to stop waiting for the rate limit reset.
+    
+    Pokes the wake socket if a process is listening on it, which wakes it
+    immediately. Otherwise the wake file is touched, which a waiting
+    process notices right away on Linux and at its next clock check
+    elsewhere.
+    
+    Returns:
+        True if a listening process woke up
+    """
+    path = wake_dir / WAKE_SOCKET
+    if path.exists() and hasattr(socket, "AF_UNIX"):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(2)
+                sock.connect(str(path))
+                sock.sendall(b"wake\n")
+                sock.shutdown(socket.SHUT_WR)
+                if int(sock.recv(64).strip() or 0) > 0:
+                    return True
+        except (OSError, ValueError):
+            pass
+    
+    wake_dir.mkdir(parents=True, exist_ok=True)
+    (wake_dir / WAKE_FILE).touch()
+    return False
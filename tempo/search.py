@@ -0,0 +1,226 @@
+"""Full-text search over every session's event log."""
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from tempo.config import SEARCH_DB, SEARCHABLE_FIELDS, SESSION_DIR, TRANSCRIPT_DIR
+from tempo.decode import loads
+from tempo.eventlog import log_end, read_lines
+from tempo.quota import tempo_home
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5(
+    text,
+    session_id UNINDEXED,
+    project UNINDEXED,
+    prompt UNINDEXED,
+    type UNINDEXED,
+    ts UNINDEXED,
+    log UNINDEXED,
+    offset UNINDEXED,
+    tokenize = 'unicode61'
+);
+CREATE TABLE IF NOT EXISTS logs (
+    path TEXT PRIMARY KEY,
+    indexed_offset INTEGER NOT NULL
+);
+"""
+
+# Databases whose schema this process has already set up
+_ready: Set[str] = set()
+
+
+def event_logs(project_dir: Path) -> List[Path]:
+    """Get a project's event logs."""
+    transcript_dir = Path(project_dir) / SESSION_DIR / TRANSCRIPT_DIR
+    if not transcript_dir.is_dir():
+        return []
+    return sorted(transcript_dir.glob("*.jsonl"))
+
+
+class SearchIndex:
+    """
+    Full-text index of prompts, output and errors from event logs.
+    
+    Uses an SQLite FTS5 table in ~/.tempo. For each log the index keeps
+    the byte offset it has read up to, so indexing a log again only reads
+    the records appended since; logs that haven't grown are skipped after
+    a stat. TranscriptWriter indexes its own log whenever it flushes, and
+    `tempo search` catches up on any other logs first.
+    
+    Each entry records the session, project, prompt, event type and
+    timestamp, plus the log and offset it came from, so a hit can be opened
+    with `tempo logs --offset`.
+    
+    Indexing is best effort: database errors are swallowed so they can
+    never stop a run.
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else tempo_home() / SEARCH_DB
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open the database in a transaction, creating it if needed.
+        
+        WAL mode and the schema are set up on the first connection in each
+        process, as in SessionRegistry._connect.
+        """
+        key = str(self.db_path)
+        setup = key not in _ready or not self.db_path.exists()
+        if setup:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, timeout=10)
+        try:
+            conn.row_factory = sqlite3.Row
+            if setup:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _ready.add(key)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def index_log(self, path: Path, project: Optional[str] = None) -> int:
+        """
+        Index the records appended to an event log since the last call.
+        
+        Returns:
+            Number of entries added
+        """
+        path = Path(path).resolve()
+        if project is None:
+            # <project>/.tempo/transcripts/<log>
+            project = str(path.parent.parent.parent)
+        session_id = path.stem.split("_", 2)[-1]
+        
+        try:
+            with self._connect() as conn:
+                return self._index(conn, path, project, session_id)
+        except (sqlite3.Error, OSError):
+            return 0
+    
+    def index_logs(self, paths: Iterable[Path]) -> int:
+        """Index several event logs, skipping those with nothing new."""
+        added = 0
+        try:
+            with self._connect() as conn:
+                known = {row["path"]: row["indexed_offset"] for row in conn.execute("SELECT * FROM logs")}
+                for path in paths:
+                    path = Path(path).resolve()
+                    try:
+                        size = log_end(path)
+                        if known.get(str(path), 0) >= size:
+                            continue
+                        added += self._index(
+                            conn, path, str(path.parent.parent.parent), path.stem.split("_", 2)[-1]
+                        )
+                    except OSError:
+                        # Removed or unreadable since it was listed; the rest still count
+                        continue
+        except (sqlite3.Error, OSError):
+            pass
+        return added
+    
+    def move_log(self, old: Path, new: Path, project: str) -> None:
+        """
+        Point an indexed log's entries at a copy of it in another project.
+        
+        Used when a DAG node's worktree logs are copied back into the main
+        project, so they aren't indexed a second time.
+        """
+        old, new = str(Path(old).resolve()), str(Path(new).resolve())
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE entries SET log = ?, project = ? WHERE log = ?", (new, project, old))
+                conn.execute(
+                    "INSERT OR REPLACE INTO logs (path, indexed_offset) "
+                    "SELECT ?, indexed_offset FROM logs WHERE path = ?",
+                    (new, old),
+                )
+                conn.execute("DELETE FROM logs WHERE path = ?", (old,))
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def _index(self, conn: sqlite3.Connection, path: Path, project: str, session_id: str) -> int:
+        """Add a log's new records to the index, inside conn's transaction."""
+        row = conn.execute("SELECT indexed_offset FROM logs WHERE path = ?", (str(path),)).fetchone()
+        offset = row["indexed_offset"] if row else 0
+        
+        entries = []
+        for end, line in read_lines(path, offset):
+            try:
+                record = loads(line)
+            except ValueError:
+                record = None
+            field = SEARCHABLE_FIELDS.get(record.get("type")) if isinstance(record, dict) else None
+            if field and record.get(field):
+                entries.append((
+                    record[field],
+                    session_id,
+                    project,
+                    record.get("prompt", ""),
+                    record["type"],
+                    record.get("ts", 0.0),
+                    str(path),
+                    offset,
+                ))
+            offset = end
+        
+        conn.executemany(
+            "INSERT INTO entries (text, session_id, project, prompt, type, ts, log, offset) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            entries,
+        )
+        conn.execute(
+            "INSERT INTO logs (path, indexed_offset) VALUES (?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET indexed_offset = excluded.indexed_offset",
+            (str(path), offset),
+        )
+        return len(entries)
+    
+    def search(
+        self,
+        query: str,
+        project: Optional[str] = None,
+        session_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find entries matching an FTS5 query, best match first.
+        
+        A query that isn't valid FTS5 syntax is searched as a phrase.
+        
+        Returns:
+            Matching entries with a highlighted "snippet"
+        """
+        sql = (
+            "SELECT session_id, project, prompt, type, ts, log, offset, "
+            "snippet(entries, 0, '[', ']', '…', 16) AS snippet "
+            "FROM entries WHERE entries MATCH ?"
+        )
+        params: list = []
+        if project:
+            sql += " AND project = ?"
+            params.append(project)
+        if session_id:
+            sql += " AND session_id LIKE ?"
+            params.append(session_id + "%")
+        if event_type:
+            sql += " AND type = ?"
+            params.append(event_type)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        
+        with self._connect() as conn:
+            try:
+                rows = conn.execute(sql, [query, *params]).fetchall()
+            except sqlite3.OperationalError:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = conn.execute(sql, [phrase, *params]).fetchall()
+            return [dict(row) for row in rows]
@@ -1,13 +1,125 @@
 """Session persistence for crash recovery and state tracking."""
 
+import copy
 import json
 import os
+import time
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import IO, Any, Dict, List, Optional, Tuple
 
-from tempo.config import SESSION_DIR, SESSION_FILE
+from tempo.config import (
+    JOURNAL_COMPACT_RECORDS,
+    JOURNAL_FSYNC_SECONDS,
+    SESSION_ARCHIVE_DIR,
+    SESSION_DIR,
+    SESSION_FILE,
+    SESSION_JOURNAL_FILE,
+)
+from tempo.registry import INDEXED_FIELDS, SessionRegistry
+
+
+@dataclass
+class Usage:
+    """Token and cost totals, from the `result` events of Claude runs."""
+    
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_tokens: int = 0
+    cache_read_tokens: int = 0
+    cost_usd: float = 0.0
+    duration_ms: int = 0
+    
+    # Number of Claude runs counted
+    runs: int = 0
+    
+    @property
+    def total_tokens(self) -> int:
+        """All tokens, including cache reads and writes."""
+        return self.input_tokens + self.output_tokens + self.cache_creation_tokens + self.cache_read_tokens
+    
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        """Fraction of input tokens served from the prompt cache (None if no input)."""
+        prompt_tokens = self.input_tokens + self.cache_creation_tokens + self.cache_read_tokens
+        if not prompt_tokens:
+            return None
+        return self.cache_read_tokens / prompt_tokens
+    
+    @classmethod
+    def from_usage(cls, usage: Dict[str, Any]) -> "Usage":
+        """Create from an API `usage` object (result or assistant message)."""
+        return cls(
+            input_tokens=int(usage.get("input_tokens") or 0),
+            output_tokens=int(usage.get("output_tokens") or 0),
+            cache_creation_tokens=int(usage.get("cache_creation_input_tokens") or 0),
+            cache_read_tokens=int(usage.get("cache_read_input_tokens") or 0),
+        )
+    
+    @classmethod
+    def from_result(cls, event: Dict[str, Any]) -> "Usage":
+        """Create from a stream-json `result` event."""
+        usage = cls.from_usage(event.get("usage") or {})
+        usage.cost_usd = float(event.get("total_cost_usd") or 0.0)
+        usage.duration_ms = int(event.get("duration_ms") or 0)
+        usage.runs = 1
+        return usage
+    
+    def add(self, other: "Usage") -> None:
+        """Add another usage to this one."""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_creation_tokens += other.cache_creation_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cost_usd += other.cost_usd
+        self.duration_ms += other.duration_ms
+        self.runs += other.runs
+    
+    def describe(self) -> str:
+        """Short human-readable summary."""
+        return f"{_format_tokens(self.total_tokens)} tokens, ${self.cost_usd:.2f}"
+
+
+def _format_tokens(count: int) -> str:
+    """Format a token count compactly (e.g. 12.3k, 4.1M)."""
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.1f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.1f}k"
+    return str(count)
+
+
+@dataclass
+class Budget:
+    """Optional hard caps on tokens and cost (None means no cap)."""
+    
+    max_tokens: Optional[int] = None
+    max_cost_usd: Optional[float] = None
+    
+    def __bool__(self) -> bool:
+        return self.max_tokens is not None or self.max_cost_usd is not None
+    
+    def exceeded(self, usage: Usage) -> Optional[str]:
+        """Describe the cap that usage has reached, or None if within budget."""
+        if self.max_tokens is not None and usage.total_tokens >= self.max_tokens:
+            return f"{_format_tokens(usage.total_tokens)} of {_format_tokens(self.max_tokens)} tokens used"
+        if self.max_cost_usd is not None and usage.cost_usd >= self.max_cost_usd:
+            return f"${usage.cost_usd:.2f} of ${self.max_cost_usd:.2f} spent"
+        return None
+
+
+@dataclass
+class CycleUsage:
+    """Usage of a single Claude run."""
+    
+    prompt_name: str
+    cycle: int
+    usage: Usage = field(default_factory=Usage)
+    at: str = ""
+    
+    # Whether the run continued an interrupted conversation (--continue)
+    continuation: bool = False
 
 
 @dataclass
@@ -19,6 +131,57 @@ class PromptItem:
     completed: bool = False
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
+    
+    # Names of prompts that must complete first (enables parallel DAG mode)
+    depends_on: List[str] = field(default_factory=list)
+    
+    # Per-node state in DAG mode: pending, running, completed, failed
+    status: str = "pending"
+    
+    # Git worktree and branch the node runs in (DAG mode)
+    worktree: Optional[str] = None
+    branch: Optional[str] = None
+    
+    # Why the node failed, if it did
+    error: Optional[str] = None
+    
+    # Tokens and cost spent on this prompt
+    usage: Usage = field(default_factory=Usage)
+    
+    def __post_init__(self):
+        if isinstance(self.usage, dict):
+            self.usage = Usage(**self.usage)
+
+
+@dataclass
+class StallEvent:
+    """A Claude process that was killed by the stall watchdog."""
+    
+    # "inactivity" (no output for too long) or "cycle_timeout" (ran too long)
+    reason: str
+    
+    # Seconds since the last output, or since the process started
+    seconds: float
+    
+    # Prompt that was running and the rate limit cycle it stalled in
+    prompt_name: str = "main"
+    cycle: int = 0
+    
+    at: str = ""
+
+
+@dataclass
+class ProbeEvent:
+    """A probe sent to check whether a rate limit has lifted."""
+    
+    # "lifted", "limited" or "error"
+    outcome: str
+    
+    # Probe number within the current rate limit window
+    attempt: int
+    
+    cycle: int = 0
+    at: str = ""
 
 
 @dataclass
@@ -43,12 +206,30 @@ class Session:
     # Number of rate limit cycles completed
     cycle_count: int = 0
     
+    # Claude's id for the conversation of the current prompt (from its
+    # system/init event), used to continue it with --resume
+    claude_session_id: str = ""
+    
+    # How the most recent rate limit was detected, and how confident we were
+    rate_limit_channel: str = ""
+    rate_limit_confidence: float = 0.0
+    
+    # Claude processes killed by the stall watchdog
+    stalls: List[StallEvent] = field(default_factory=list)
+    
+    # Probes sent while waiting out rate limits with no known reset time
+    probes: List[ProbeEvent] = field(default_factory=list)
+    
+    # Tokens and cost for the whole session, and for each Claude run
+    usage: Usage = field(default_factory=Usage)
+    cycle_usage: List[CycleUsage] = field(default_factory=list)
+    
     # Session timestamps
     created_at: str = ""
     updated_at: str = ""
     
     # Current status
-    status: str = "pending"  # pending, running, rate_limited, completed, failed
+    status: str = "pending"  # pending, running, rate_limited, stalled, completed, failed
     
     # Last output chunk (for context when resuming)
     last_output_chunk: str = ""
@@ -80,11 +261,13 @@ class Session:
         
         if self.current_prompt_index >= 0 and self.prompts:
             self.prompts[self.current_prompt_index].completed = True
+            self.prompts[self.current_prompt_index].status = "completed"
             self.prompts[self.current_prompt_index].completed_at = datetime.now().isoformat()
             
             # Check if there are more prompts
             if self.current_prompt_index < len(self.prompts) - 1:
                 self.current_prompt_index += 1
+                self.prompts[self.current_prompt_index].status = "running"
                 self.prompts[self.current_prompt_index].started_at = datetime.now().isoformat()
                 return True
         
@@ -92,11 +275,101 @@ class Session:
         self.status = "completed"
         return False
     
+    def is_dag(self) -> bool:
+        """Check if the sequence declares dependencies (parallel DAG mode)."""
+        return any(p.depends_on for p in self.prompts)
+    
+    def ready_prompts(self) -> List[int]:
+        """Get indices of pending prompts whose dependencies are all complete."""
+        completed = {p.name for p in self.prompts if p.completed}
+        return [
+            i for i, p in enumerate(self.prompts)
+            if p.status == "pending" and all(dep in completed for dep in p.depends_on)
+        ]
+    
+    def mark_prompt_started(self, index: int) -> None:
+        """Mark a DAG node as running."""
+        item = self.prompts[index]
+        item.status = "running"
+        item.error = None
+        item.started_at = item.started_at or datetime.now().isoformat()
+        self.updated_at = datetime.now().isoformat()
+    
+    def mark_prompt_complete(self, index: int) -> None:
+        """Mark a DAG node as complete."""
+        item = self.prompts[index]
+        item.status = "completed"
+        item.completed = True
+        item.completed_at = datetime.now().isoformat()
+        self.updated_at = datetime.now().isoformat()
+        
+        if all(p.completed for p in self.prompts):
+            self.status = "completed"
+    
+    def mark_prompt_failed(self, index: int, error: str) -> None:
+        """Mark a DAG node as failed; its dependents won't run."""
+        item = self.prompts[index]
+        item.status = "failed"
+        item.error = error
+        self.updated_at = datetime.now().isoformat()
+    
+    def reset_unfinished_prompts(self) -> None:
+        """Return interrupted DAG nodes to pending so they are restarted."""
+        for p in self.prompts:
+            if p.status in ("running", "failed") and not p.completed:
+                p.status = "pending"
+    
     def increment_cycle(self) -> None:
         """Increment the rate limit cycle count."""
         self.cycle_count += 1
         self.updated_at = datetime.now().isoformat()
     
+    def record_stall(self, reason: str, seconds: float) -> StallEvent:
+        """Record a stalled Claude process."""
+        stall = StallEvent(
+            reason=reason,
+            seconds=round(seconds, 1),
+            prompt_name=self.get_current_prompt_name(),
+            cycle=self.cycle_count,
+            at=datetime.now().isoformat(),
+        )
+        self.stalls.append(stall)
+        self.updated_at = datetime.now().isoformat()
+        return stall
+    
+    def record_usage(self, usage: Usage, continuation: bool = False) -> None:
+        """Add a Claude run's usage to the session and the current prompt."""
+        self.usage.add(usage)
+        if self.current_prompt_index >= 0 and self.prompts:
+            self.prompts[self.current_prompt_index].usage.add(usage)
+        
+        self.cycle_usage.append(CycleUsage(
+            prompt_name=self.get_current_prompt_name(),
+            cycle=self.cycle_count,
+            usage=usage,
+            at=datetime.now().isoformat(),
+            continuation=continuation,
+        ))
+        self.updated_at = datetime.now().isoformat()
+    
+    def current_prompt_usage(self) -> Usage:
+        """Get usage so far for the current prompt (the session in single-prompt mode)."""
+        if self.current_prompt_index >= 0 and self.prompts:
+            return self.prompts[self.current_prompt_index].usage
+        return self.usage
+    
+    def record_probe(self, outcome: str, attempt: int) -> ProbeEvent:
+        """Record the outcome of a rate limit probe."""
+        probe = ProbeEvent(
+            outcome=outcome,
+            attempt=attempt,
+            cycle=self.cycle_count,
+            at=datetime.now().isoformat(),
+        )
+        self.probes.append(probe)
+        self.updated_at = datetime.now().isoformat()
+        return probe
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         data = asdict(self)
@@ -108,16 +381,65 @@ class Session:
         # Handle prompts specially
         prompts_data = data.pop("prompts", [])
         prompts = [PromptItem(**p) for p in prompts_data]
-        return cls(prompts=prompts, **data)
+        stalls = [StallEvent(**s) for s in data.pop("stalls", [])]
+        probes = [ProbeEvent(**p) for p in data.pop("probes", [])]
+        usage = Usage(**data.pop("usage", {}))
+        cycle_usage = [
+            CycleUsage(**{**c, "usage": Usage(**c.get("usage", {}))})
+            for c in data.pop("cycle_usage", [])
+        ]
+        return cls(
+            prompts=prompts,
+            stalls=stalls,
+            probes=probes,
+            usage=usage,
+            cycle_usage=cycle_usage,
+            **data,
+        )
 
 
 class SessionManager:
-    """Manages session persistence to disk."""
+    """
+    Manages session persistence to disk.
     
-    def __init__(self, project_dir: str):
+    The session is stored as a snapshot (session.json) plus an append-only
+    journal of changes since it. Each save appends one line holding only
+    the fields that changed (new entries for lists that only grow), so the
+    bytes written and synced per save follow the size of the change rather
+    than of the whole session. Finding the change still converts and
+    compares the whole session in memory, which is cheap next to rewriting
+    the file. Appends are flushed at once and fsynced at most every
+    JOURNAL_FSYNC_SECONDS. Every JOURNAL_COMPACT_RECORDS saves the journal
+    is folded into a new snapshot, written to a temp file and renamed into
+    place, so a crash never leaves a half-written session behind.
+    
+    Journal records carry increasing sequence numbers and the snapshot
+    stores the last one it includes, so records already in the snapshot
+    are skipped on replay (e.g. after a crash between writing the snapshot
+    and truncating the journal). A torn last line is ignored.
+    
+    Sessions are also indexed in the per-user SessionRegistry. A session
+    that is replaced or cleared is archived to .tempo/sessions/<id>.json
+    rather than thrown away.
+    """
+    
+    def __init__(self, project_dir: str, registry: Optional[SessionRegistry] = None):
         self.project_dir = Path(project_dir).resolve()
         self.session_dir = self.project_dir / SESSION_DIR
         self.session_file = self.session_dir / SESSION_FILE
+        self.journal_file = self.session_dir / SESSION_JOURNAL_FILE
+        self.archive_dir = self.session_dir / SESSION_ARCHIVE_DIR
+        
+        # Pass a registry to share it (DAG steps use their parent's); set
+        # this to None to stop indexing
+        self.registry = registry if registry is not None else SessionRegistry()
+        
+        # Session as last written, to diff the next save against
+        self._persisted: Optional[Dict[str, Any]] = None
+        self._seq = 0
+        self._journal_records = 0
+        self._journal: Optional[IO[str]] = None
+        self._last_sync = 0.0
     
     def _ensure_dir(self) -> None:
         """Ensure the session directory exists."""
@@ -132,30 +454,164 @@ class SessionManager:
         """Save session to disk."""
         self._ensure_dir()
         session.updated_at = datetime.now().isoformat()
+        data = session.to_dict()
+        
+        if self._persisted is None or self._journal_records >= JOURNAL_COMPACT_RECORDS:
+            indexed = True
+            self.compact(data)
+        else:
+            changes = _diff(self._persisted, data)
+            if not changes:
+                return
+            
+            changed = set(changes.get("set", {})) | set(changes.get("append", {}))
+            indexed = bool(changed & INDEXED_FIELDS)
+            self._seq += 1
+            self._append_journal({"seq": self._seq, **changes})
+            self._journal_records += 1
+            self._persisted = data
+        
+        if indexed and self.registry:
+            self.registry.record(data, self.session_file)
+    
+    def compact(self, data: Optional[Dict[str, Any]] = None) -> None:
+        """Write a full snapshot atomically and start an empty journal."""
+        if data is None:
+            data = self._persisted
+        if data is None:
+            return
+        self._ensure_dir()
         
-        with open(self.session_file, "w") as f:
-            json.dump(session.to_dict(), f, indent=2)
+        _write_atomic(self.session_file, {**data, "journal_seq": self._seq})
+        self._close_journal()
+        with open(self.journal_file, "w"):
+            pass
+        self._journal_records = 0
+        self._persisted = data
+    
+    def sync(self) -> None:
+        """Force journaled changes to disk."""
+        if self._journal is not None:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._last_sync = time.monotonic()
+    
+    def close(self) -> None:
+        """Sync and close the journal."""
+        self._close_journal()
     
     def load(self) -> Optional[Session]:
-        """Load session from disk if it exists."""
+        """Load session from disk if it exists, replaying the journal."""
         if not self.session_file.exists():
             return None
         
         try:
             with open(self.session_file, "r") as f:
                 data = json.load(f)
-            return Session.from_dict(data)
+            seq = data.pop("journal_seq", 0)
+            
+            journal, torn = self._read_journal()
+            records = 0
+            for record in journal:
+                if record.get("seq", 0) <= seq:
+                    continue
+                _apply(data, record)
+                seq = record["seq"]
+                records += 1
+            
+            session = Session.from_dict(copy.deepcopy(data))
         except (json.JSONDecodeError, KeyError, TypeError):
             return None
+        
+        self._persisted = data
+        self._seq = seq
+        # Never append after a torn line: compact on the next save instead
+        self._journal_records = JOURNAL_COMPACT_RECORDS if torn else records
+        return session
     
     def exists(self) -> bool:
         """Check if a session file exists."""
         return self.session_file.exists()
     
     def delete(self) -> None:
-        """Delete the session file."""
-        if self.session_file.exists():
-            self.session_file.unlink()
+        """Remove the current session, keeping a snapshot in the project's history."""
+        self.archive()
+        self._close_journal()
+        for path in (self.session_file, self.journal_file):
+            if path.exists():
+                path.unlink()
+        self._persisted = None
+        self._seq = 0
+        self._journal_records = 0
+    
+    def archive(self) -> Optional[Path]:
+        """
+        Copy the current session into .tempo/sessions.
+        
+        Returns:
+            Path of the archived snapshot, or None if there was no session
+        """
+        session = self.load() if self.exists() else None
+        if session is None:
+            return None
+        
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"{session.session_id}.json"
+        _write_atomic(path, session.to_dict())
+        
+        if self.registry:
+            self.registry.archive(session.project_dir, session.session_id, path)
+        return path
+    
+    def history(self) -> List[Session]:
+        """Load this project's archived sessions, most recent first."""
+        sessions = []
+        for path in self.archive_dir.glob("*.json"):
+            try:
+                with open(path, "r") as f:
+                    sessions.append(Session.from_dict(json.load(f)))
+            except (OSError, json.JSONDecodeError, KeyError, TypeError):
+                continue
+        return sorted(sessions, key=lambda s: s.updated_at, reverse=True)
+    
+    def _append_journal(self, record: Dict[str, Any]) -> None:
+        """Append a record, fsyncing if the last sync is old enough."""
+        if self._journal is None:
+            self._journal = open(self.journal_file, "a", encoding="utf-8")
+        self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        
+        if time.monotonic() - self._last_sync >= JOURNAL_FSYNC_SECONDS:
+            self.sync()
+    
+    def _close_journal(self) -> None:
+        """Sync and close the open journal, if any."""
+        if self._journal is not None:
+            self.sync()
+            self._journal.close()
+            self._journal = None
+    
+    def _read_journal(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Read journal records, stopping at a torn or corrupt line.
+        
+        Returns:
+            (records, torn) - torn is True if unreadable data was skipped
+        """
+        records = []
+        try:
+            with open(self.journal_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        return records, True
+                    if not isinstance(record, dict) or not line.endswith("\n"):
+                        return records, True
+                    records.append(record)
+        except FileNotFoundError:
+            pass
+        return records, False
     
     def create_new(
         self,
@@ -180,9 +636,108 @@ class SessionManager:
             status="pending",
         )
         
-        if prompts:
+        if prompts and not session.is_dag():
+            prompts[0].status = "running"
             prompts[0].started_at = datetime.now().isoformat()
         
+        # Keep the previous session in the project's history
+        if self.exists():
+            self.delete()
+        
         self.save(session)
         return session
 
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Describe how a session dict changed, as a journal record body.
+    
+    Lists that only gained entries at the end are recorded as "append";
+    any other changed field is recorded in full under "set".
+    """
+    changes: Dict[str, Dict[str, Any]] = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if value == previous:
+            continue
+        if (
+            isinstance(value, list)
+            and isinstance(previous, list)
+            and len(value) > len(previous)
+            and value[:len(previous)] == previous
+        ):
+            changes.setdefault("append", {})[key] = value[len(previous):]
+        else:
+            changes.setdefault("set", {})[key] = value
+    return changes
+
+
+def _apply(data: Dict[str, Any], record: Dict[str, Any]) -> None:
+    """Apply a journal record to a session dict in place."""
+    data.update(record.get("set", {}))
+    for key, values in record.get("append", {}).items():
+        data.setdefault(key, []).extend(values)
+
+
+def _write_atomic(path: Path, data: Dict[str, Any]) -> None:
+    """Write JSON to path via a synced temp file and rename."""
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def validate_dependencies(prompts: List[PromptItem]) -> None:
+    """
+    Check that depends_on references exist and contain no cycles.
+    
+    Only sequences that use depends_on are checked: their steps are named
+    by reference and each runs in a worktree and branch named after it, so
+    names must be unique even once made safe for git.
+    
+    Raises:
+        ValueError: If a dependency is unknown, duplicated or cyclic
+    """
+    if not any(p.depends_on for p in prompts):
+        return
+    
+    from tempo.worktree import branch_slug
+    
+    names = [p.name for p in prompts]
+    if len(set(names)) != len(names):
+        raise ValueError("Prompt names must be unique when using depends_on")
+    
+    slugs: Dict[str, str] = {}
+    for name in names:
+        other = slugs.setdefault(branch_slug(name), name)
+        if other != name:
+            raise ValueError(f"Prompt names '{other}' and '{name}' would share a worktree")
+    
+    known = set(names)
+    for p in prompts:
+        for dep in p.depends_on:
+            if dep not in known:
+                raise ValueError(f"'{p.name}' depends on unknown prompt '{dep}'")
+            if dep == p.name:
+                raise ValueError(f"'{p.name}' depends on itself")
+    
+    # Kahn's algorithm: every node must be reachable in topological order
+    deps = {p.name: set(p.depends_on) for p in prompts}
+    done = set()
+    while len(done) < len(deps):
+        ready = [name for name, d in deps.items() if name not in done and d <= done]
+        if not ready:
+            stuck = sorted(set(deps) - done)
+            raise ValueError(f"Dependency cycle between: {', '.join(stuck)}")
+        done.update(ready)
+
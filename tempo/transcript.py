@@ -1,155 +1,504 @@
 """Transcript logging for session history."""
 
+import gzip
 import os
+import re
+import shutil
+import time
+import zlib
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
 
-from tempo.config import SESSION_DIR, TRANSCRIPT_DIR
+from tempo.buffer import OutputBuffer
+from tempo.config import (
+    SESSION_DIR,
+    TRANSCRIPT_DIR,
+    TRANSCRIPT_FLUSH_CHARS,
+    TRANSCRIPT_FLUSH_SECONDS,
+    TRANSCRIPT_ROTATE_CHARS,
+)
+from tempo.eventlog import EventLog
+from tempo.search import SearchIndex
+from tempo.session import Session, Usage
+
+# Characters read at a time when streaming a transcript back
+_READ_CHARS = 64 * 1024
+
+# Most characters of output in one event log record
+_OUTPUT_EVENT_CHARS = 64 * 1024
 
 
 class TranscriptWriter:
-    """Writes conversation transcripts to disk."""
+    """
+    Writes conversation transcripts to disk.
+    
+    Every entry is first appended to a structured event log (<name>.jsonl,
+    see tempo.eventlog) and then rendered to the markdown transcript with
+    render_markdown, so the markdown is just a view of the log.
+    
+    The files stay open and writes are buffered: they reach the OS every
+    TRANSCRIPT_FLUSH_SECONDS or TRANSCRIPT_FLUSH_CHARS, and are fsynced at
+    cycle boundaries (rate limits, completions, session end). Once the
+    markdown passes TRANSCRIPT_ROTATE_CHARS it is rotated at the next
+    entry: the finished part is renamed to <name>.<n>.md.part, writing
+    continues in a fresh <name>.md, and the part is gzipped to
+    <name>.<n>.md.gz in a worker thread. Use read_transcript to read all
+    parts back in order. The event log rotates past EVENTLOG_ROTATE_BYTES,
+    to <name>.<n>.jsonl.gz, keeping its offsets. With a SearchIndex, every
+    flush also indexes the events written since the last one.
+    """
     
-    def __init__(self, project_dir: str, session_id: str):
+    def __init__(
+        self,
+        project_dir: str,
+        session_id: str,
+        session: Optional[Session] = None,
+        search: Optional[SearchIndex] = None,
+    ):
         self.project_dir = Path(project_dir).resolve()
         self.session_id = session_id
         self.transcript_dir = self.project_dir / SESSION_DIR / TRANSCRIPT_DIR
         
+        # Where events are in the session (cycle and prompt), if known
+        self.session = session
+        
+        # Full-text index the event log is added to as it is flushed
+        self.search = search
+        
         # Create unique filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.transcript_file = self.transcript_dir / f"{timestamp}_{session_id}.md"
         
+        self._file: Optional[IO[str]] = None
+        self._segment = 1
+        self._segment_chars = 0
+        self._unflushed_chars = 0
+        self._last_flush = time.monotonic()
+        
         self._ensure_dir()
-        self._write_header()
+        self.events = EventLog(self.transcript_file.with_suffix(".jsonl"))
+        self._file = open(self.transcript_file, "w", encoding="utf-8")
+        self._record("session_start", session_id=session_id, project=str(self.project_dir))
     
     def _ensure_dir(self) -> None:
         """Ensure the transcript directory exists."""
         self.transcript_dir.mkdir(parents=True, exist_ok=True)
     
-    def _write_header(self) -> None:
-        """Write the transcript header."""
-        header = f"""# Tempo Session Transcript
+    def _record(self, event_type: str, prompt_name: Optional[str] = None, **fields) -> None:
+        """Log an event and append its rendered markdown."""
+        record = self.events.append(event_type, **self._position(prompt_name), **fields)
+        self._append(render_markdown(record))
+    
+    def _position(self, prompt_name: Optional[str] = None) -> Dict[str, Any]:
+        """Cycle and prompt of an event, from the session."""
+        if self.session is None:
+            return {"prompt": prompt_name or ""}
+        
+        index = self.session.current_prompt_index
+        if prompt_name is None:
+            prompt_name = self.session.get_current_prompt_name()
+        else:
+            names = [p.name for p in self.session.prompts]
+            index = names.index(prompt_name) if prompt_name in names else index
+        return {"cycle": self.session.cycle_count, "prompt": prompt_name, "prompt_index": index}
+    
+    def log_prompt(self, prompt: str, prompt_name: Optional[str] = None) -> None:
+        """Log a prompt sent to Claude."""
+        self._record("prompt", prompt_name, name=prompt_name, text=prompt)
+    
+    def log_output(self, output: Union[str, OutputBuffer]) -> None:
+        """Log Claude's output, one event per chunk."""
+        chunks = [output] if isinstance(output, str) else output.iter_chunks(_OUTPUT_EVENT_CHARS)
+        
+        # Stream buffered output chunk by chunk instead of joining it
+        pending: List[str] = []
+        pending_chars = 0
+        part = 0
+        for chunk in chunks:
+            pending.append(chunk)
+            pending_chars += len(chunk)
+            if pending_chars < _OUTPUT_EVENT_CHARS:
+                continue
+            
+            text = "".join(pending)
+            while len(text) > _OUTPUT_EVENT_CHARS:
+                self._record("output", text=text[:_OUTPUT_EVENT_CHARS], part=part, final=False)
+                text = text[_OUTPUT_EVENT_CHARS:]
+                part += 1
+            pending, pending_chars = [text], len(text)
+        self._record("output", text="".join(pending), part=part, final=True)
+    
+    def log_rate_limit(self, reset_time: str, cycle: int, detected_via: Optional[str] = None) -> None:
+        """Log a rate limit event."""
+        self._record("rate_limit", reset_time=reset_time, limit_cycle=cycle, detected_via=detected_via)
+        self.sync()
+    
+    def log_stall(self, reason: str, seconds: float, attempt: int) -> None:
+        """Log a Claude process killed by the stall watchdog."""
+        self._record("stall", reason=reason, seconds=round(seconds, 1), attempt=attempt)
+    
+    def log_probe(self, outcome: str, attempt: int, max_probes: int) -> None:
+        """Log a rate limit probe."""
+        self._record("probe", outcome=outcome, attempt=attempt, max_probes=max_probes)
+    
+    def log_usage(self, usage: Usage, total: Usage) -> None:
+        """Log the tokens and cost of one Claude run."""
+        self._record("usage", usage=asdict(usage), total=asdict(total))
+    
+    def log_resume(self) -> None:
+        """Log resuming after rate limit."""
+        self._record("resume")
+    
+    def log_complete(self, prompt_name: Optional[str] = None) -> None:
+        """Log task completion."""
+        self._record("complete", prompt_name, name=prompt_name)
+        self.sync()
+    
+    def log_error(self, error: str) -> None:
+        """Log an error."""
+        self._record("error", message=error)
+    
+    def log_session_end(self, status: str) -> None:
+        """Log session end."""
+        self._record("session_end", status=status)
+        self.sync()
+    
+    def _write(self, content: str) -> None:
+        """Write content to the open transcript without flushing."""
+        if self._file is None:
+            self._file = open(self.transcript_file, "a", encoding="utf-8")
+        self._file.write(content)
+        self._segment_chars += len(content)
+        self._unflushed_chars += len(content)
+    
+    def _append(self, content: str) -> None:
+        """Append an entry, flushing and rotating as needed."""
+        self._write(content)
+        
+        if self._segment_chars >= TRANSCRIPT_ROTATE_CHARS:
+            self._rotate()
+        elif (
+            self._unflushed_chars >= TRANSCRIPT_FLUSH_CHARS
+            or time.monotonic() - self._last_flush >= TRANSCRIPT_FLUSH_SECONDS
+        ):
+            self.flush()
+    
+    def flush(self) -> None:
+        """Hand buffered writes to the OS and index the new events."""
+        self.events.flush()
+        if self._file is not None:
+            self._file.flush()
+        if self.search is not None:
+            self.search.index_log(self.events.path, str(self.project_dir))
+        self._unflushed_chars = 0
+        self._last_flush = time.monotonic()
+    
+    def sync(self) -> None:
+        """Flush and fsync, so the transcript survives a crash."""
+        self.flush()
+        self.events.sync()
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+    
+    def close(self) -> None:
+        """Sync and close the transcript and event log."""
+        self._close_markdown()
+        self.events.close()
+    
+    def _close_markdown(self) -> None:
+        """Sync and close the markdown file."""
+        if self._file is not None:
+            self.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+    
+    def _rotate(self) -> None:
+        """Set the current segment aside for compression and start a new one."""
+        self._close_markdown()
+        
+        # Renaming is instant; the gzip runs off the event loop if there is one
+        segment_path = _segment_path(self.transcript_file, self._segment)
+        finished = _unpacked_path(segment_path)
+        os.replace(self.transcript_file, finished)
+        try:
+            import asyncio
+            
+            asyncio.get_running_loop().run_in_executor(None, _compress_segment, finished, segment_path)
+        except RuntimeError:
+            _compress_segment(finished, segment_path)
+        
+        self._segment += 1
+        self._segment_chars = 0
+        self._file = open(self.transcript_file, "w", encoding="utf-8")
+        self._write(
+            f"<!-- Tempo transcript {self.session_id}, continued (part {self._segment}) -->\n\n"
+        )
+    
+    def get_path(self) -> Path:
+        """Get the transcript file path."""
+        return self.transcript_file
 
-**Session ID:** {self.session_id}
-**Started:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-**Project:** {self.project_dir}
+
+def _clock(record: Dict[str, Any]) -> str:
+    """Time of day of an event."""
+    return datetime.fromtimestamp(record["ts"]).strftime("%H:%M:%S")
+
+
+def _render_session_start(record: Dict[str, Any]) -> str:
+    """Header at the top of the transcript."""
+    started = datetime.fromtimestamp(record["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    return f"""# Tempo Session Transcript
+
+**Session ID:** {record["session_id"]}
+**Started:** {started}
+**Project:** {record["project"]}
 
 ---
 
 """
-        with open(self.transcript_file, "w") as f:
-            f.write(header)
-    
-    def log_prompt(self, prompt: str, prompt_name: Optional[str] = None) -> None:
-        """Log a prompt sent to Claude."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        name_str = f" ({prompt_name})" if prompt_name else ""
-        
-        entry = f"""
-## Prompt{name_str} - {timestamp}
+
+
+def _render_prompt(record: Dict[str, Any]) -> str:
+    """A prompt sent to Claude."""
+    name_str = f" ({record['name']})" if record.get("name") else ""
+    return f"""
+## Prompt{name_str} - {_clock(record)}
 
 ```
-{prompt}
+{record["text"]}
 ```
 
 """
-        self._append(entry)
-    
-    def log_output(self, output: str) -> None:
-        """Log Claude's output."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        entry = f"""
-## Claude Output - {timestamp}
 
-{output}
+
+def _render_output(record: Dict[str, Any]) -> str:
+    """A chunk of Claude's output; the first carries the heading."""
+    header = f"\n## Claude Output - {_clock(record)}\n\n" if record["part"] == 0 else ""
+    footer = "\n\n" if record["final"] else ""
+    return header + record["text"] + footer
+
+
+def _render_rate_limit(record: Dict[str, Any]) -> str:
+    """A rate limit hit."""
+    via_str = f"- Detected via: {record['detected_via']}\n" if record.get("detected_via") else ""
+    return f"""
+---
+
+**⏳ Rate Limited** - {_clock(record)}
+- Cycle: {record["limit_cycle"]}
+- Reset time: {record["reset_time"]}
+{via_str}- Waiting...
+
+---
 
 """
-        self._append(entry)
-    
-    def log_rate_limit(self, reset_time: str, cycle: int) -> None:
-        """Log a rate limit event."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        entry = f"""
+
+
+def _render_stall(record: Dict[str, Any]) -> str:
+    """A Claude process stopped by the stall watchdog."""
+    what = "No output" if record["reason"] == "inactivity" else "Cycle time limit reached"
+    return f"""
 ---
 
-**⏳ Rate Limited** - {timestamp}
-- Cycle: {cycle}
-- Reset time: {reset_time}
-- Waiting...
+**⚠️ Stalled** - {_clock(record)}
+- {what} after {record["seconds"]:.0f}s
+- Attempt: {record["attempt"]}
+- Claude was stopped
 
 ---
 
 """
-        self._append(entry)
-    
-    def log_resume(self) -> None:
-        """Log resuming after rate limit."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        entry = f"""
+
+
+def _render_probe(record: Dict[str, Any]) -> str:
+    """A rate limit probe."""
+    results = {
+        "lifted": "limit lifted",
+        "limited": "still rate limited",
+        "error": "probe failed",
+    }
+    outcome = results.get(record["outcome"], record["outcome"])
+    return f"""
+**🔎 Probe {record["attempt"]}/{record["max_probes"]}** - {_clock(record)} - {outcome}
+
+"""
+
+
+def _render_usage(record: Dict[str, Any]) -> str:
+    """Tokens and cost of one Claude run."""
+    usage = Usage(**record["usage"])
+    total = Usage(**record["total"])
+    hit_rate = usage.cache_hit_rate
+    cache = f"{hit_rate:.0%} cache hit, " if hit_rate is not None else ""
+    return (
+        f"\n*Usage: {usage.input_tokens:,} in, {usage.output_tokens:,} out, "
+        f"{usage.cache_read_tokens:,} cache read, {usage.cache_creation_tokens:,} cache write, "
+        f"{cache}${usage.cost_usd:.4f} (session: {total.describe()})*\n"
+    )
+
+
+def _render_resume(record: Dict[str, Any]) -> str:
+    """Resuming after a rate limit."""
+    return f"""
 ---
 
-**✓ Resumed** - {timestamp}
+**✓ Resumed** - {_clock(record)}
 
 ---
 
 """
-        self._append(entry)
-    
-    def log_complete(self, prompt_name: Optional[str] = None) -> None:
-        """Log task completion."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        name_str = f" ({prompt_name})" if prompt_name else ""
-        
-        entry = f"""
+
+
+def _render_complete(record: Dict[str, Any]) -> str:
+    """A completed prompt."""
+    name_str = f" ({record['name']})" if record.get("name") else ""
+    return f"""
 ---
 
-**✅ Task Complete{name_str}** - {timestamp}
+**✅ Task Complete{name_str}** - {_clock(record)}
 
 ---
 
 """
-        self._append(entry)
-    
-    def log_error(self, error: str) -> None:
-        """Log an error."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        entry = f"""
+
+
+def _render_error(record: Dict[str, Any]) -> str:
+    """An error."""
+    return f"""
 ---
 
-**❌ Error** - {timestamp}
+**❌ Error** - {_clock(record)}
 
 ```
-{error}
+{record["message"]}
 ```
 
 ---
 
 """
-        self._append(entry)
-    
-    def log_session_end(self, status: str) -> None:
-        """Log session end."""
-        entry = f"""
+
+
+def _render_session_end(record: Dict[str, Any]) -> str:
+    """Footer at the end of the session."""
+    ended = datetime.fromtimestamp(record["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+    return f"""
 ---
 
 # Session Ended
 
-**Status:** {status}
-**Ended:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+**Status:** {record["status"]}
+**Ended:** {ended}
 """
-        self._append(entry)
+
+
+_RENDERERS = {
+    "session_start": _render_session_start,
+    "prompt": _render_prompt,
+    "output": _render_output,
+    "rate_limit": _render_rate_limit,
+    "stall": _render_stall,
+    "probe": _render_probe,
+    "usage": _render_usage,
+    "resume": _render_resume,
+    "complete": _render_complete,
+    "error": _render_error,
+    "session_end": _render_session_end,
+}
+
+
+def render_markdown(record: Dict[str, Any]) -> str:
+    """Render one event log record as transcript markdown."""
+    renderer = _RENDERERS.get(record.get("type", ""))
+    return renderer(record) if renderer else ""
+
+
+def _segment_path(path: Path, segment: int) -> Path:
+    """Path of a finished, compressed transcript segment."""
+    return path.with_name(f"{path.stem}.{segment:03d}.md.gz")
+
+
+def _unpacked_path(segment_path: Path) -> Path:
+    """Path a finished segment waits at until it is compressed."""
+    return segment_path.with_suffix(".part")
+
+
+def _compress_segment(finished: Path, segment_path: Path) -> None:
+    """
+    Gzip a finished segment into place and remove the uncompressed copy.
     
-    def _append(self, content: str) -> None:
-        """Append content to the transcript file."""
-        with open(self.transcript_file, "a") as f:
-            f.write(content)
+    The archive is written under a temporary name and renamed, so a crash
+    never leaves a truncated .md.gz; on error the .part is kept instead.
+    """
+    tmp_path = segment_path.with_name(segment_path.name + ".tmp")
+    try:
+        with open(finished, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, segment_path)
+        finished.unlink()
+    except OSError:
+        pass
+
+
+def transcript_parts(path: Path) -> List[Path]:
+    """
+    Get every file of a transcript, in order.
     
-    def get_path(self) -> Path:
-        """Get the transcript file path."""
-        return self.transcript_file
+    Args:
+        path: The transcript's .md path (it may only exist as segments)
+    """
+    pattern = re.compile(re.escape(path.stem) + r"\.(\d+)\.md\.(gz|part)$")
+    segments: Dict[int, Path] = {}
+    for candidate in path.parent.glob(f"{path.stem}.*.md.*"):
+        match = pattern.match(candidate.name)
+        # A segment still waiting for compression only counts until it's done
+        if match and (match.group(2) == "gz" or int(match.group(1)) not in segments):
+            segments[int(match.group(1))] = candidate
+    
+    parts = [segments[n] for n in sorted(segments)]
+    if path.exists():
+        parts.append(path)
+    return parts
+
+
+def read_transcript(path: Path) -> Iterator[str]:
+    """
+    Yield a transcript's text across all its segments, decompressing as needed.
+    
+    A damaged segment (e.g. cut short by a crash) is read up to the damage
+    and the rest of the transcript follows it.
+    """
+    for part in transcript_parts(path):
+        if part.suffix == ".part" and not part.exists():
+            # Compressed since it was listed
+            part = part.with_suffix(".gz")
+        opener = gzip.open if part.suffix == ".gz" else open
+        try:
+            with opener(part, "rt", encoding="utf-8", errors="replace") as f:
+                while True:
+                    chunk = f.read(_READ_CHARS)
+                    if not chunk:
+                        break
+                    yield chunk
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            continue
+
+
+def find_transcripts(project_dir: Path) -> List[Path]:
+    """List a project's transcripts (their .md paths), oldest first."""
+    transcript_dir = Path(project_dir) / SESSION_DIR / TRANSCRIPT_DIR
+    if not transcript_dir.is_dir():
+        return []
+    
+    names = set()
+    for candidate in transcript_dir.iterdir():
+        name = candidate.name
+        if name.endswith(".md.gz"):
+            # <stem>.<n>.md.gz belongs to <stem>.md
+            name = name[: -len(".md.gz")].rsplit(".", 1)[0] + ".md"
+        if name.endswith(".md"):
+            names.add(name)
+    return [transcript_dir / name for name in sorted(names)]
 
@@ -0,0 +1,139 @@
+"""
+Git worktree helpers for running sequence steps in parallel.
+
+These run git as asyncio subprocesses, so a slow checkout or merge doesn't
+stall the other steps' output.
+"""
+
+import asyncio
+import re
+import shutil
+from pathlib import Path
+from typing import List, Tuple
+
+from tempo.config import SESSION_DIR, TRANSCRIPT_DIR, WORKTREE_DIR
+
+
+class WorktreeError(Exception):
+    """A git worktree operation failed."""
+
+
+async def _git(cwd: Path, *args: str) -> str:
+    """Run a git command and return its stdout, raising WorktreeError on failure."""
+    process = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=str(cwd),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        message = (stderr or stdout).decode("utf-8", errors="replace").strip()
+        raise WorktreeError(f"git {' '.join(args)}: {message}")
+    return stdout.decode("utf-8", errors="replace")
+
+
+def branch_slug(name: str) -> str:
+    """Make a prompt name safe for branch and directory names."""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-.").lower()
+    return slug or "step"
+
+
+async def is_git_repo(project_dir: Path) -> bool:
+    """Check if a directory is inside a git work tree with at least one commit."""
+    try:
+        await _git(project_dir, "rev-parse", "--verify", "HEAD")
+        return True
+    except (WorktreeError, FileNotFoundError):
+        return False
+
+
+async def create_worktree(project_dir: Path, session_id: str, name: str) -> Tuple[Path, str]:
+    """
+    Create a worktree on a new branch from the current HEAD.
+    
+    Worktrees live under .tempo/worktrees, which is git-ignored. An existing
+    worktree at the same path is reused (e.g. when resuming after a crash).
+    
+    Returns:
+        (worktree_path, branch_name)
+    """
+    slug = branch_slug(name)
+    path = project_dir / SESSION_DIR / WORKTREE_DIR / f"{session_id}-{slug}"
+    branch = f"tempo/{session_id}/{slug}"
+    
+    if path.exists():
+        return path, branch
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    await _git(project_dir, "worktree", "add", "-b", branch, str(path), "HEAD")
+    return path, branch
+
+
+async def commit_worktree(path: Path, message: str) -> bool:
+    """
+    Commit all changes in a worktree.
+    
+    Returns:
+        True if a commit was made, False if there was nothing to commit
+    """
+    await _git(path, "add", "-A")
+    if not (await _git(path, "status", "--porcelain")).strip():
+        return False
+    await _git(path, "commit", "-m", message, "--no-verify")
+    return True
+
+
+async def merge_worktree(project_dir: Path, path: Path, branch: str, name: str) -> bool:
+    """
+    Commit a finished worktree and merge its branch back into the project.
+    
+    On a merge conflict the merge is aborted and the worktree is left in
+    place for manual resolution.
+    
+    Returns:
+        True if the branch was merged
+    """
+    await commit_worktree(path, f"tempo: {name}")
+    try:
+        await _git(project_dir, "merge", "--no-ff", "--no-edit", "-m", f"Merge tempo step: {name}", branch)
+        return True
+    except WorktreeError:
+        try:
+            await _git(project_dir, "merge", "--abort")
+        except WorktreeError:
+            pass
+        return False
+
+
+async def remove_worktree(project_dir: Path, path: Path, branch: str) -> List[Path]:
+    """
+    Remove a worktree and its branch, keeping its transcripts.
+    
+    Returns:
+        The transcripts and event logs copied into the project
+    """
+    copied = _collect_transcripts(project_dir, path)
+    
+    if path.exists():
+        await _git(project_dir, "worktree", "remove", "--force", str(path))
+    try:
+        await _git(project_dir, "branch", "-D", branch)
+    except WorktreeError:
+        pass
+    return copied
+
+
+def _collect_transcripts(project_dir: Path, path: Path) -> List[Path]:
+    """Copy a worktree's transcripts into the project's transcript directory."""
+    source = path / SESSION_DIR / TRANSCRIPT_DIR
+    target = project_dir / SESSION_DIR / TRANSCRIPT_DIR
+    if not source.is_dir():
+        return []
+    
+    target.mkdir(parents=True, exist_ok=True)
+    copied = []
+    for transcript in source.iterdir():
+        if transcript.is_file():
+            copied.append(Path(shutil.copy2(transcript, target / transcript.name)))
+    return copied